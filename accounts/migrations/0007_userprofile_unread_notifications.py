@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:17
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_counts(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    Notification = apps.get_model('items', 'Notification')
+    unread = (
+        Notification.objects.filter(recipient_id=OuterRef('user_id'), is_read=False)
+        .order_by()
+        .values('recipient_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    UserProfile.objects.update(
+        unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_emailverificationtoken'),
+        ('items', '0015_notification_email_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='unread_notifications',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_userprofile_unread_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-karma_points'], name='profile_karma_idx'),
+        ),
+    ]
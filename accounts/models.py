@@ -18,11 +18,55 @@ class UserProfile(models.Model):
     karma_points = models.IntegerField(default=0)
     total_items_returned = models.IntegerField(default=0)
     profile_photo = models.TextField(blank=True, null=True)
+    # Maintained by items.notification_utils; rebuild with `manage.py repair_unread_counts`
+    unread_notifications = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-karma_points']
+        indexes = [
+            # Top-N leaderboard scans and the karma distribution behind ranks
+            models.Index(fields=['-karma_points'], name='profile_karma_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.karma_points} karma points"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        # A field deferred at load time (e.g. by .only()) that now has a value was
+        # assigned or fetched since, so it is written too
+        return [
+            field.name for field in self._meta.concrete_fields
+            if (field.attname not in loaded and field.attname in self.__dict__)
+            or (field.attname in loaded and getattr(self, field.attname) != loaded[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        # Only fields changed on this instance are written, and nothing at all if
+        # none were. The counters (karma, unread notifications) move through atomic
+        # UPDATEs, so saving a stale instance must not write their old values back.
+        changed = self.changed_fields()
+        if not self._state.adding and changed is not None and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            if not changed:
+                return
+            kwargs['update_fields'] = changed + ['updated_at']
+        super().save(*args, **kwargs)
+        saved = kwargs.get('update_fields')
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{
+                field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+                if saved is None or field.name in saved
+            },
+        }
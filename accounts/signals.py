@@ -6,13 +6,8 @@ from .models import UserProfile
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
+    # The profile is created once, with the user. Later User saves (login,
+    # email verification, profile edits) leave it alone; code that changes
+    # profile fields saves the profile itself.
     if created:
-        UserProfile.objects.get_or_create(user=instance)
-
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    try:
-        instance.profile.save()
-    except UserProfile.DoesNotExist:
         UserProfile.objects.create(user=instance)
@@ -2,9 +2,6 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-import cloudinary.uploader
-import tempfile
-import os
 from .forms import SignUpForm, LoginForm, EditProfileForm, EmailLoginForm
 
 
@@ -22,13 +19,12 @@ def signup(request):
                 # Create verification token
                 from .models import EmailVerificationToken
                 token_obj, _ = EmailVerificationToken.objects.get_or_create(user=user)
-                # Send verification email
-                from django.core.mail import send_mail
-                from django.conf import settings
+                # Queue the verification email; the worker delivers it
+                from items.jobs import enqueue_email
                 verify_url = request.build_absolute_uri(f"/accounts/verify-email/{token_obj.token}/")
                 subject = "Verify your email for Campus Lost & Found"
                 message = f"Hello {user.username},\n\nPlease verify your email by clicking the link below:\n{verify_url}\n\nIf you did not sign up, ignore this email."
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=True)
+                enqueue_email(subject, message, [user.email])
                 messages.success(request, f'A verification link has been sent to {user.email}. Please check your inbox to activate your account.', extra_tags='success')
                 return render(request, 'accounts/verify_notice.html', {'email': user.email})
             except Exception as e:
@@ -103,7 +99,7 @@ def logout_view(request):
 @login_required(login_url='accounts:login')
 def profile(request):
     from items.models import Item, Claim
-    from items.karma_utils import get_user_karma, get_user_rank
+    from items.karma_utils import get_user_karma, rank_for_karma
     from django.db.models import Q
 
     # Get user statistics
@@ -113,12 +109,12 @@ def profile(request):
 
     # Get recent activity
     recent_items = user_items.order_by('-created_at')[:5]
-    recent_claims = Claim.objects.filter(claimer=request.user).order_by('-claimed_at')[:5]
+    recent_claims = Claim.objects.filter(claimer=request.user).select_related('item').order_by('-claimed_at')[:5]
 
     # Get karma info
     karma_points = get_user_karma(request.user)
     # Only show rank if user has at least 50 karma points (same as leaderboard)
-    user_rank = get_user_rank(request.user) if karma_points >= 50 else None
+    user_rank = rank_for_karma(karma_points) if karma_points >= 50 else None
     points_to_next_level = max(0, 1000 - karma_points)
     progress_percentage = min(100, (karma_points / 1000) * 100) if karma_points > 0 else 0
 
@@ -154,39 +150,11 @@ def edit_profile(request):
             
             photo_uploaded = False
             if profile_photo:
-                temp_path = None
                 try:
-                    from django.conf import settings
-                    from pathlib import Path
-                    import shutil
-                    import uuid
+                    from items.image_utils import store_upload, publish_upload
                     
-                    temp_dir = tempfile.gettempdir()
-                    temp_path = os.path.join(temp_dir, profile_photo.name)
-                    
-                    with open(temp_path, 'wb') as f:
-                        for chunk in profile_photo.chunks():
-                            f.write(chunk)
-                    
-                    photo_url = None
-                    
-                    try:
-                        cloudinary_config = cloudinary.config()
-                        if cloudinary_config.cloud_name and cloudinary_config.cloud_name != 'your_cloud_name':
-                            cloudinary_result = cloudinary.uploader.upload(temp_path)
-                            photo_url = cloudinary_result.get('secure_url')
-                    except Exception as cloud_err:
-                        pass
-                    
-                    if not photo_url:
-                        media_dir = Path(settings.MEDIA_ROOT) / 'profile_photos'
-                        media_dir.mkdir(parents=True, exist_ok=True)
-                        file_extension = Path(temp_path).suffix
-                        unique_filename = f"{uuid.uuid4()}{file_extension}"
-                        local_path = media_dir / unique_filename
-                        
-                        shutil.copy2(temp_path, local_path)
-                        photo_url = f"{settings.MEDIA_URL}profile_photos/{unique_filename}"
+                    photo_url, _ = store_upload(profile_photo, subdir='profile_photos')
+                    photo_url = publish_upload(photo_url)
                     
                     profile.profile_photo = photo_url
                     profile.save()
@@ -195,13 +163,6 @@ def edit_profile(request):
                 
                 except Exception as e:
                     messages.warning(request, f'Profile photo upload failed: {str(e)}', extra_tags='warning')
-                
-                finally:
-                    if temp_path and os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
             
             form.save(request.user)
             if not photo_uploaded and not profile_photo:
@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(settings):
+    # Per-test in-memory caches so cached fragments never leak between tests
+    settings.CACHES = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+        for alias in settings.CACHES
+    }
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    yield
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Item, Claim, Notification, QRCode, ItemTimeline, LocationHistory
+from .models import Item, Claim, Notification, QRCode, ItemTimeline, LocationHistory, BackgroundJob, AITagResult, ItemMatch, OutgoingEmail, SiteCounter, KarmaEvent
+from .stats_utils import item_type_summary
 
 
 @admin.register(Item)
@@ -8,6 +9,12 @@ class ItemAdmin(admin.ModelAdmin):
     list_filter = ['status', 'category', 'item_type', 'created_at']
     search_fields = ['title', 'description', 'location']
     readonly_fields = ['created_at', 'updated_at']
+    # The per-type summary above the list already gives the totals
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {'item_type_summary': item_type_summary(), **(extra_context or {})}
+        return super().changelist_view(request, extra_context=extra_context)
 
 
 @admin.register(Claim)
@@ -20,7 +27,7 @@ class ClaimAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'recipient', 'claim', 'is_read', 'created_at']
+    list_display = ['id', 'recipient', 'claim', 'match', 'is_read', 'created_at']
     list_filter = ['is_read', 'created_at']
     search_fields = ['recipient__username', 'claim__item__title']
     readonly_fields = ['created_at']
@@ -48,3 +55,55 @@ class LocationHistoryAdmin(admin.ModelAdmin):
     list_filter = ['recorded_at']
     search_fields = ['item__title', 'location_name']
     readonly_fields = ['recorded_at']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['last_error']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(AITagResult)
+class AITagResultAdmin(admin.ModelAdmin):
+    list_display = ['image_hash', 'model_name', 'category', 'hit_count', 'last_hit_at', 'created_at']
+    list_filter = ['model_name', 'category']
+    search_fields = ['image_hash']
+    readonly_fields = ['created_at', 'last_hit_at']
+
+
+@admin.register(ItemMatch)
+class ItemMatchAdmin(admin.ModelAdmin):
+    list_display = ['lost_item', 'found_item', 'score', 'created_at']
+    search_fields = ['lost_item__title', 'found_item__title']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['created_at', 'sent_at', 'message_id']
+
+
+@admin.register(SiteCounter)
+class SiteCounterAdmin(admin.ModelAdmin):
+    list_display = ['key', 'value', 'updated_at']
+    search_fields = ['key']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(KarmaEvent)
+class KarmaEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'points', 'items_returned', 'reason', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'points', 'items_returned', 'reason', 'claim', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -1,5 +1,10 @@
+import io
 import json
 import base64
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
 from pathlib import Path
 from django.conf import settings
 
@@ -9,98 +14,254 @@ except ImportError:
     genai = None
 
 
-def process_image_with_gemini(image_path: str) -> dict:
+MIME_TYPE_MAP = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
+VALID_CATEGORIES = [
+    'electronics', 'clothing', 'accessories', 'books',
+    'jewelry', 'documents', 'keys', 'other'
+]
+
+TAGGING_PROMPT = """Analyze this image and provide:
+1. A primary category (choose ONE from: Electronics, Clothing, Accessories, Books, Jewelry, Documents, Keys, Other)
+2. 3-5 specific tags describing the item (e.g., color, brand, type, distinctive features)
+
+Return as JSON:
+{
+    "category": "category_name",
+    "tags": ["tag1", "tag2", "tag3"]
+}
+
+Only return valid JSON, no other text."""
+
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+
+_gemini_model = None
+
+
+def get_gemini_model():
+    # Configure the SDK and build the model once per process, not per image.
+    global _gemini_model
+    if _gemini_model is None:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _gemini_model
+
+
+def mime_type_for(filename):
+    return MIME_TYPE_MAP.get(Path(filename).suffix.lower(), 'image/jpeg')
+
+
+def parse_tagging_response(response_text):
+    try:
+        # Look for JSON block in the response
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if json_match:
+            data = json.loads(json_match.group(0))
+        else:
+            data = json.loads(response_text)
+    except json.JSONDecodeError:
+        return {
+            'error': 'Could not parse Gemini response as JSON',
+            'raw_response': response_text[:500]
+        }
+
+    category = str(data.get('category', 'Other')).lower()
+    tags = data.get('tags', [])
+
+    if not isinstance(tags, list):
+        tags = [str(tags)]
+
+    tags = [str(tag).strip() for tag in tags if tag]
+
+    if category not in VALID_CATEGORIES:
+        category = 'other'
+
+    return {
+        'category': category,
+        'tags': tags[:5],
+        'confidence': 0.95
+    }
+
+
+def tag_image_with_gemini(image_bytes, mime_type='image/jpeg'):
     if not genai:
         return {
             'error': 'Google Generative AI library not installed. Install with: pip install google-generativeai'
         }
 
-    api_key = settings.GEMINI_API_KEY
-    if not api_key or api_key == '':
+    if not settings.GEMINI_API_KEY:
         return {
             'error': 'GEMINI_API_KEY not set in environment variables'
         }
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-
-        image_path_obj = Path(image_path)
-        if not image_path_obj.exists():
-            return {'error': f'Image file not found: {image_path}'}
-
-        with open(image_path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-
-        file_ext = image_path_obj.suffix.lower()
-        mime_type_map = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp',
-        }
-        mime_type = mime_type_map.get(file_ext, 'image/jpeg')
-
         image_part = {
             'mime_type': mime_type,
-            'data': image_data,
+            'data': base64.standard_b64encode(image_bytes).decode('utf-8'),
+        }
+        response = get_gemini_model().generate_content([image_part, TAGGING_PROMPT])
+        return parse_tagging_response(response.text.strip())
+    except Exception as e:
+        return {
+            'error': f'Gemini API error: {str(e)}'
         }
 
-        prompt = """Analyze this image and provide:
-1. A primary category (choose ONE from: Electronics, Clothing, Accessories, Books, Jewelry, Documents, Keys, Other)
-2. 3-5 specific tags describing the item (e.g., color, brand, type, distinctive features)
 
-Return as JSON:
-{
-    "category": "category_name",
-    "tags": ["tag1", "tag2", "tag3"]
+STUB_COLOR_NAMES = {
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+    'gray': (128, 128, 128),
+    'red': (200, 30, 30),
+    'green': (30, 160, 60),
+    'blue': (30, 60, 200),
+    'yellow': (230, 210, 40),
+    'brown': (120, 80, 40),
 }
 
-Only return valid JSON, no other text."""
 
-        response = model.generate_content([image_part, prompt])
-        response_text = response.text.strip()
-
-        # Try to parse as JSON
-        try:
-            # Look for JSON block in the response
-            import re
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                data = json.loads(json_str)
-            else:
-                data = json.loads(response_text)
-
-            category = data.get('category', 'Other').lower()
-            tags = data.get('tags', [])
-
-            if not isinstance(tags, list):
-                tags = [str(tags)]
-
-            tags = [str(tag).strip() for tag in tags if tag]
-
-            valid_categories = [
-                'electronics', 'clothing', 'accessories', 'books',
-                'jewelry', 'documents', 'keys', 'other'
-            ]
-            if category not in valid_categories:
-                category = 'other'
-
-            return {
-                'category': category,
-                'tags': tags[:5],
-                'confidence': 0.95
-            }
-
-        except json.JSONDecodeError:
-            return {
-                'error': 'Could not parse Gemini response as JSON',
-                'raw_response': response_text[:500]
-            }
+def tag_image_with_stub(image_bytes, mime_type='image/jpeg'):
+    # Offline stand-in for Gemini (tests, local development): tags the image with
+    # its format and nearest named average colour.
+    from PIL import Image
 
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image_format = (image.format or 'image').lower()
+            red, green, blue = image.convert('RGB').resize((1, 1)).getpixel((0, 0))
     except Exception as e:
-        return {
-            'error': f'Gemini API error: {str(e)}'
-        }
+        return {'error': f'Could not read image: {str(e)}'}
+
+    color = min(
+        STUB_COLOR_NAMES,
+        key=lambda name: sum((a - b) ** 2 for a, b in zip(STUB_COLOR_NAMES[name], (red, green, blue)))
+    )
+    return {
+        'category': 'other',
+        'tags': [color, image_format],
+        'confidence': 0.5
+    }
+
+
+def tag_image(image_bytes, mime_type='image/jpeg'):
+    backend = getattr(settings, 'AI_TAGGING_BACKEND', 'gemini')
+    if backend == 'stub':
+        return tag_image_with_stub(image_bytes, mime_type)
+    return tag_image_with_gemini(image_bytes, mime_type)
+
+
+TAG_CACHE_SIZE = 512
+# Cache hits are counted in memory and written to AITagResult in batches
+TAG_HIT_FLUSH_THRESHOLD = 100
+
+_tag_cache = OrderedDict()
+_tag_cache_lock = threading.Lock()
+_pending_hits = Counter()
+tag_cache_stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+
+
+def tagging_model_name():
+    return 'stub' if getattr(settings, 'AI_TAGGING_BACKEND', 'gemini') == 'stub' else GEMINI_MODEL_NAME
+
+
+def _remember(key, result):
+    with _tag_cache_lock:
+        _tag_cache[key] = result
+        _tag_cache.move_to_end(key)
+        while len(_tag_cache) > TAG_CACHE_SIZE:
+            _tag_cache.popitem(last=False)
+
+
+def clear_tag_cache():
+    with _tag_cache_lock:
+        _tag_cache.clear()
+        _pending_hits.clear()
+        for counter in tag_cache_stats:
+            tag_cache_stats[counter] = 0
+
+
+def flush_tag_cache_hits():
+    """Add the hits counted since the last flush to AITagResult; returns how many."""
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import AITagResult
+
+    with _tag_cache_lock:
+        pending = dict(_pending_hits)
+        _pending_hits.clear()
+    now = timezone.now()
+    for (image_hash, model_name), hits in pending.items():
+        AITagResult.objects.filter(image_hash=image_hash, model_name=model_name).update(
+            hit_count=F('hit_count') + hits, last_hit_at=now
+        )
+    return sum(pending.values())
+
+
+def tag_image_cached(image_bytes, mime_type='image/jpeg'):
+    """``tag_image`` behind a cache keyed by the SHA-256 of the image bytes.
+
+    Lookups go to an in-process LRU first, then the AITagResult table; only a miss
+    in both reaches the model. Error results are never cached so they get retried.
+    Hits are written back by ``flush_tag_cache_hits``, so a memory hit costs no query.
+    """
+    from .models import AITagResult
+
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    model_name = tagging_model_name()
+    key = (image_hash, model_name)
+
+    with _tag_cache_lock:
+        cached = _tag_cache.get(key)
+        if cached is not None:
+            _tag_cache.move_to_end(key)
+            tag_cache_stats['memory_hits'] += 1
+    if cached is None:
+        stored = AITagResult.objects.filter(image_hash=image_hash, model_name=model_name).first()
+        if stored is not None:
+            cached = {'category': stored.category, 'tags': stored.tags}
+            tag_cache_stats['db_hits'] += 1
+            _remember(key, cached)
+
+    if cached is not None:
+        with _tag_cache_lock:
+            _pending_hits[key] += 1
+            flush = sum(_pending_hits.values()) >= TAG_HIT_FLUSH_THRESHOLD
+        if flush:
+            flush_tag_cache_hits()
+        return {**cached, 'tags': list(cached['tags']), 'cached': True}
+
+    tag_cache_stats['misses'] += 1
+    result = tag_image(image_bytes, mime_type)
+    if 'error' in result:
+        return result
+
+    AITagResult.objects.get_or_create(
+        image_hash=image_hash,
+        model_name=model_name,
+        defaults={'category': result['category'], 'tags': result['tags']},
+    )
+    _remember(key, {'category': result['category'], 'tags': result['tags']})
+    return result
+
+
+def ai_tagging_enabled():
+    backend = getattr(settings, 'AI_TAGGING_BACKEND', 'gemini')
+    if backend == 'stub':
+        return True
+    return backend == 'gemini' and bool(genai) and bool(settings.GEMINI_API_KEY)
+
+
+def process_image_with_gemini(image_path: str) -> dict:
+    image_path_obj = Path(image_path)
+    if not image_path_obj.exists():
+        return {'error': f'Image file not found: {image_path}'}
+
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+
+    return tag_image_with_gemini(image_bytes, mime_type_for(image_path))
@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# Fragments live briefly in process memory and longer in the shared cache.
+# Invalidation bumps a namespace generation so every key under it is orphaned;
+# other processes pick up the new generation within LOCAL_CACHE_SECONDS.
+LOCAL_CACHE_SECONDS = 5
+SHARED_CACHE_SECONDS = 300
+
+# Without a shared backend (no REDIS_URL) another process never sees an invalidation,
+# so fragments live no longer than the local tier.
+SHARED_BACKEND = 'django.core.cache.backends.redis.RedisCache'
+
+ITEMS_NAMESPACE = 'items'
+LEADERBOARD_NAMESPACE = 'leaderboard'
+
+
+def shared_timeout(timeout):
+    if settings.CACHES['default']['BACKEND'] == SHARED_BACKEND:
+        return timeout
+    return min(timeout, LOCAL_CACHE_SECONDS)
+
+
+def generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def cache_generation(namespace):
+    local, shared = caches['local'], caches['default']
+    key = generation_key(namespace)
+    generation = local.get(key)
+    if generation is None:
+        generation = shared.get(key)
+        if generation is None:
+            # add() so concurrent first readers agree on one generation
+            shared.add(key, time.time_ns(), None)
+            generation = shared.get(key)
+        local.set(key, generation, LOCAL_CACHE_SECONDS)
+    return generation
+
+
+def _bump_generation(namespace):
+    generation = time.time_ns()
+    caches['default'].set(generation_key(namespace), generation, None)
+    caches['local'].set(generation_key(namespace), generation, LOCAL_CACHE_SECONDS)
+
+
+def invalidate(namespace):
+    # After commit, so a fragment rebuilt from pre-commit data is never stored
+    # under the new generation; runs at once outside a transaction.
+    transaction.on_commit(lambda: _bump_generation(namespace))
+
+
+def cached(namespace, name, compute, timeout=SHARED_CACHE_SECONDS):
+    """Return ``compute()`` through the local and shared cache tiers.
+
+    ``compute`` must not return None. Entries are dropped by ``invalidate(namespace)``
+    or after ``timeout`` seconds, whichever comes first.
+    """
+    local, shared = caches['local'], caches['default']
+    key = f'{namespace}:{cache_generation(namespace)}:{name}'
+    value = local.get(key)
+    if value is None:
+        value = shared.get(key)
+        if value is None:
+            value = compute()
+            shared.set(key, value, shared_timeout(timeout))
+        local.set(key, value, min(timeout, LOCAL_CACHE_SECONDS))
+    return value
@@ -1,69 +1,113 @@
-from .models import Item, Claim, Notification, ItemTimeline
-from django.core.mail import send_mail
-from django.conf import settings
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Item, Claim, Notification, ItemTimeline, QRCode, DisputeResolution, ContentModeration, KarmaEvent
+from .jobs import notify_by_email, enqueue_email
+from .notification_utils import create_notification, create_notifications, mark_notifications_read
+from .karma_utils import award_karma_points
+
+
+class ClaimTransitionError(ValueError):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Every claim transition runs in one transaction that first locks the item row,
+# so concurrent transitions on the same item queue up instead of interleaving.
+# Claim rows then change through update() guarded by the expected status.
+
+def _lock_item(item_id):
+    try:
+        return Item.objects.select_for_update().get(id=item_id)
+    except Item.DoesNotExist:
+        raise ClaimTransitionError('Item not found', 404)
+
+
+def _lock_claim(claim_id, owner=None):
+    claim = Claim.objects.select_related('item', 'claimer').filter(id=claim_id).first()
+    if claim is None:
+        raise ClaimTransitionError('Claim not found', 404)
+    item = _lock_item(claim.item_id)
+    if owner is not None and item.user_id != owner.id:
+        raise ClaimTransitionError('Not authorized', 403)
+    claim.item = item
+    return claim, item
+
+
+def _transition_claim(claim, from_statuses, error='Claim already processed', **changes):
+    if not Claim.objects.filter(id=claim.id, status__in=from_statuses).update(**changes):
+        raise ClaimTransitionError(error)
+    for field, value in changes.items():
+        setattr(claim, field, value)
+
+
+def _set_item_status(item, status):
+    # save() rather than update() so the search index, site counters and caches follow
+    item.status = status
+    item.save(update_fields=['status', 'updated_at'])
+
+
+def _replace_claim(claim, claimer_user, message):
+    # Claim.item is one-to-one, so a rejected or completed claim hands its row to
+    # the next claimer instead of being deleted; the previous claimer's
+    # notifications, disputes and karma events survive. Links that would now
+    # show the old parties the new claimer (or let a moderator act on the new
+    # claim, or tie past karma to it) are detached, and the handoff QR code is
+    # re-issued. Disputes keep their link; they record their own claimer.
+    Notification.objects.filter(claim=claim).update(claim=None)
+    ContentModeration.objects.filter(claim=claim).update(claim=None)
+    KarmaEvent.objects.filter(claim=claim).update(claim=None)
+    QRCode.objects.filter(claim=claim).update(code=str(uuid.uuid4()), qr_image_url=None, scanned=False, scanned_at=None)
+    _transition_claim(
+        claim, ['rejected', 'completed'], error='This item has already been claimed by someone else',
+        claimer=claimer_user, message=message, status='pending', claimed_at=timezone.now(),
+        contact_revealed=False, verified_at=None, accepted_at=None, rejected_at=None,
+    )
+    return claim
 
 
 def create_claim(item_id, claimer_user, message=''):
     try:
-        item = Item.objects.get(id=item_id)
-        
-        if item.status == 'claimed':
-            return {'error': 'Item already claimed'}
-        
-        if item.user == claimer_user:
-            return {'error': 'You cannot claim your own item'}
-        
-        # Check if claim already exists for this item
-        if hasattr(item, 'claim') and item.claim:
-            # Only block if claim is pending or accepted
-            if item.claim.status in ['pending', 'accepted']:
-                return {'error': 'This item has already been claimed by someone else'}
-            # If claim is rejected or completed, allow new claim (delete old claim)
-            item.claim.delete()
-        
-        # Use get_or_create to handle race conditions
-        try:
-            claim, created = Claim.objects.get_or_create(
+        with transaction.atomic():
+            item = _lock_item(item_id)
+
+            if item.status == 'claimed':
+                return {'error': 'Item already claimed'}
+            if item.status == 'returned':
+                return {'error': 'Item already returned'}
+
+            if item.user_id == claimer_user.id:
+                return {'error': 'You cannot claim your own item'}
+
+            existing = Claim.objects.filter(item=item).first()
+            if existing is None:
+                claim = Claim.objects.create(item=item, claimer=claimer_user, message=message)
+            else:
+                # Only block if claim is pending or accepted
+                if existing.status in ['pending', 'accepted']:
+                    return {'error': 'This item has already been claimed by someone else'}
+                if _has_open_dispute(existing):
+                    return {'error': 'This item has an open dispute'}
+                claim = _replace_claim(existing, claimer_user, message)
+
+            notification_message = (
+                f"{claimer_user.username} has claimed your item: \"{item.title}\". "
+                f"Click 'Reveal Contact' to see their email and arrange a handoff."
+            )
+            notification = create_notification(recipient=item.user, claim=claim, message=notification_message)
+
+            # Item status stays 'reported' until the owner accepts
+            ItemTimeline.objects.create(
                 item=item,
-                defaults={
-                    'claimer': claimer_user,
-                    'message': message
-                }
+                status='reported',
+                changed_by=claimer_user,
+                notes=f'New claim submitted by {claimer_user.username}'
             )
-            
-            if not created:
-                return {'error': 'This item has already been claimed by someone else'}
-        except Exception as e:
-            # Handle any database constraint errors
-            if 'UNIQUE constraint failed' in str(e) or 'duplicate' in str(e).lower():
-                return {'error': 'This item has already been claimed by someone else'}
-            else:
-                return {'error': f'Failed to create claim: {str(e)}'}
-        
-        notification_message = (
-            f"{claimer_user.username} has claimed your item: \"{item.title}\". "
-            f"Click 'Reveal Contact' to see their email and arrange a handoff."
-        )
-        
-        notification = Notification.objects.create(
-            recipient=item.user,
-            claim=claim,
-            message=notification_message
-        )
-        
-        # Don't change item status yet - wait for owner acceptance
-        # item.status = 'claimed'
-        # item.save()
-        
-        ItemTimeline.objects.create(
-            item=item,
-            status='reported',  # Keep as reported until accepted
-            changed_by=claimer_user,
-            notes=f'New claim submitted by {claimer_user.username}'
-        )
-        
-        # Send email notification
-        try:
+
+            # Queued in the outbox (or the owner's digest) with the claim; the worker sends it
             subject = f'Your item has been claimed - {item.title}'
             body = f"""
 Hello {item.user.username},
@@ -76,30 +120,169 @@ Please log in to your account to reveal the claimer's contact information and ar
 
 Best regards,
 Campus Lost & Found Team
-            """
-            send_mail(
-                subject,
-                body,
-                settings.DEFAULT_FROM_EMAIL,
-                [item.user.email],
-                fail_silently=True
-            )
-        except Exception as e:
-            # Email sending failed, but don't fail the claim
-            pass
-        
+        """
+            notify_by_email(notification, subject, body)
+
         return {
             'success': True,
             'claim_id': claim.id,
             'notification_id': notification.id
         }
-    
-    except Item.DoesNotExist:
-        return {'error': 'Item not found'}
+
+    except ClaimTransitionError as e:
+        return {'error': str(e)}
     except Exception as e:
         return {'error': f'Failed to create claim: {str(e)}'}
 
 
+def accept_pending_claim(claim_id, owner):
+    with transaction.atomic():
+        claim, item = _lock_claim(claim_id, owner)
+        _transition_claim(claim, ['pending'], status='accepted', accepted_at=timezone.now())
+        _set_item_status(item, 'claimed')
+
+        ItemTimeline.objects.create(
+            item=item,
+            status='claimed',
+            changed_by=owner,
+            notes=f'Claim accepted by owner {owner.username}'
+        )
+        create_notification(
+            recipient=claim.claimer,
+            claim=claim,
+            message=(
+                f"Great news! Your claim on \"{item.title}\" has been accepted. "
+                f"The owner has revealed their contact information. Please arrange pickup soon."
+            )
+        )
+
+        subject = f'Your claim has been accepted - {item.title}'
+        body = f"""
+Hello {claim.claimer.username},
+
+Great news! Your claim on "{item.title}" has been accepted by the owner.
+
+Owner Contact Information:
+Email: {owner.email}
+Name: {owner.first_name} {owner.last_name or owner.username}
+
+Please contact the owner to arrange pickup of your item.
+
+Best regards,
+Campus Lost & Found Team
+        """
+        enqueue_email(subject, body, [claim.claimer.email])
+    return claim
+
+
+def reject_pending_claim(claim_id, owner):
+    with transaction.atomic():
+        claim, item = _lock_claim(claim_id, owner)
+        _transition_claim(claim, ['pending'], status='rejected', rejected_at=timezone.now())
+        # Back to reported so others can claim
+        _set_item_status(item, 'reported')
+
+        ItemTimeline.objects.create(
+            item=item,
+            status='reported',
+            changed_by=owner,
+            notes=f'Claim rejected by owner {owner.username}'
+        )
+        create_notification(
+            recipient=claim.claimer,
+            claim=claim,
+            message=(
+                f"We're sorry, but your claim on \"{item.title}\" was not accepted by the owner. "
+                f"You may try claiming other items or contact support if you believe this was an error."
+            )
+        )
+    return claim
+
+
+def _has_open_dispute(claim):
+    return DisputeResolution.objects.filter(claim=claim, status__in=['open', 'in_progress']).exists()
+
+
+def _complete_claim(claim, item, changed_by, notes):
+    # A disputed item stays put until an admin rules on the dispute
+    if _has_open_dispute(claim):
+        raise ClaimTransitionError('This claim has an open dispute')
+    _transition_claim(claim, ['pending', 'accepted'], error='Item already returned',
+                      status='completed', verified_at=timezone.now())
+    _set_item_status(item, 'returned')
+    ItemTimeline.objects.create(item=item, status='returned', changed_by=changed_by, notes=notes)
+    award_karma_points(claim.claimer, claim=claim)
+
+
+def return_item_by_code(code):
+    """Complete the claim behind a scanned QR code; a code only ever works once."""
+    qr_code = QRCode.objects.select_related('claim__claimer').filter(code=code).first()
+    if qr_code is None:
+        raise ClaimTransitionError('Invalid QR code')
+
+    with transaction.atomic():
+        item = _lock_item(qr_code.claim.item_id)
+        if not QRCode.objects.filter(id=qr_code.id, scanned=False).update(scanned=True, scanned_at=timezone.now()):
+            raise ClaimTransitionError('QR code already scanned')
+        _complete_claim(qr_code.claim, item, qr_code.claim.claimer, 'Item returned - QR code scanned')
+    return item
+
+
+def mark_claim_returned(item_id, owner):
+    with transaction.atomic():
+        item = _lock_item(item_id)
+        if item.user_id != owner.id:
+            raise ClaimTransitionError('Not authorized', 403)
+        claim = Claim.objects.select_related('claimer').filter(item=item).first()
+        if claim is None:
+            raise ClaimTransitionError('Item has no claim')
+        _complete_claim(claim, item, owner, 'Item marked as returned by owner')
+    return item
+
+
+def resolve_claim_dispute(dispute_id, resolution, admin_notes, admin):
+    dispute = DisputeResolution.objects.select_related('claim').filter(id=dispute_id).first()
+    if dispute is None:
+        raise ClaimTransitionError('Dispute not found', 404)
+
+    with transaction.atomic():
+        item = _lock_item(dispute.claim.item_id)
+        resolved = DisputeResolution.objects.filter(id=dispute.id).exclude(status='resolved').update(
+            status='resolved', resolution=resolution, admin_notes=admin_notes, resolved_at=timezone.now()
+        )
+        if not resolved:
+            raise ClaimTransitionError('Dispute already resolved')
+
+        claim = dispute.claim
+        # The owner may have rejected the claim while the dispute was open; the
+        # ruling still applies to it (and nobody else can claim in the meantime)
+        if resolution == 'favor_claimer':
+            _transition_claim(claim, ['pending', 'accepted', 'rejected'], status='accepted',
+                              accepted_at=timezone.now(), rejected_at=None)
+            _set_item_status(item, 'claimed')
+            timeline_status, outcome = 'claimed', f'in favor of claimer {dispute.claimer.username}'
+        elif resolution == 'favor_reporter':
+            # Already rejected (completion is blocked while a dispute is open) is fine as it is
+            Claim.objects.filter(id=claim.id, status__in=['pending', 'accepted']).update(
+                status='rejected', rejected_at=timezone.now()
+            )
+            _set_item_status(item, 'reported')
+            timeline_status, outcome = 'reported', 'in favor of reporter'
+        else:
+            return dispute
+
+        ItemTimeline.objects.create(
+            item=item, status=timeline_status, changed_by=admin, notes=f'Dispute resolved {outcome}'
+        )
+        # Both parties hear the outcome
+        create_notifications([
+            Notification(recipient_id=user_id, claim=claim,
+                         message=f"The dispute over \"{item.title}\" has been resolved {outcome}.")
+            for user_id in (dispute.reporter_id, dispute.claimer_id)
+        ])
+    return dispute
+
+
 def reveal_contact(notification_id, viewer_user):
     try:
         notification = Notification.objects.get(id=notification_id)
@@ -108,6 +291,8 @@ def reveal_contact(notification_id, viewer_user):
             return {'error': 'Not authorized to view this contact'}
         
         claim = notification.claim
+        if claim is None:
+            return {'error': 'This notification has no contact to reveal'}
         claim.contact_revealed = True
         claim.save()
         
@@ -131,8 +316,7 @@ def mark_notification_read(notification_id, viewer_user):
         if notification.recipient != viewer_user:
             return {'error': 'Not authorized'}
         
-        notification.is_read = True
-        notification.save()
+        mark_notifications_read(viewer_user.id, [notification.id])
         
         return {'success': True}
     
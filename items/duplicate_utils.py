@@ -0,0 +1,139 @@
+import html
+import threading
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+
+DUPLICATE_MAX_DISTANCE = 6
+# Rows are re-read this far back on each sync: a transaction that commits late can
+# carry an updated_at older than the newest row already seen
+DUPLICATE_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance.
+
+    Each node holds one hash and the ids of items with that hash; a radius search
+    only descends into children whose edge distance is within ``radius`` of the
+    query's distance to the node, so most of the tree is never visited.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item_id):
+        if self.root is None:
+            self.root = [value, {item_id}, {}]
+            self.size = 1
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].add(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, {item_id}, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, value, radius):
+        matches = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                matches.extend((item_id, distance) for item_id in node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return matches
+
+
+class DuplicateIndex:
+    # Per-process BK-tree of item image hashes. Each lookup first pulls in rows
+    # changed since the last sync, so the tree is built once and then kept
+    # current incrementally. Stale entries (edited or deleted items) are dropped
+    # when candidates are re-checked against the database.
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.synced_until = None
+        self.lock = threading.Lock()
+
+    def sync(self):
+        from .models import Item
+
+        with self.lock:
+            rows = Item.objects.filter(image_phash__isnull=False)
+            if self.synced_until is not None:
+                rows = rows.filter(updated_at__gte=self.synced_until - DUPLICATE_SYNC_OVERLAP)
+            latest = rows.aggregate(latest=Max('updated_at'))['latest']
+            for item_id, image_phash in rows.values_list('id', 'image_phash'):
+                self.tree.add(image_phash, item_id)
+            if latest is not None:
+                self.synced_until = latest
+            elif self.synced_until is None:
+                self.synced_until = timezone.now()
+
+    def find(self, image_phash, max_distance=DUPLICATE_MAX_DISTANCE):
+        self.sync()
+        with self.lock:
+            return self.tree.search(image_phash, max_distance)
+
+    def reset(self):
+        with self.lock:
+            self.tree = BKTree()
+            self.synced_until = None
+
+
+duplicate_index = DuplicateIndex()
+
+
+def find_possible_duplicates(item, max_distance=DUPLICATE_MAX_DISTANCE):
+    from .models import Item
+
+    if item.image_phash is None:
+        return []
+
+    distances = {}
+    for item_id, distance in duplicate_index.find(item.image_phash, max_distance):
+        if item_id != item.id:
+            distances[item_id] = min(distance, distances.get(item_id, distance))
+
+    candidates = Item.objects.filter(
+        id__in=distances, item_type=item.item_type, image_phash__isnull=False
+    ).exclude(status='returned')
+    # The tree may hold an item's old hash; keep only candidates whose current hash is close
+    duplicates = [
+        candidate for candidate in candidates
+        if hamming_distance(candidate.image_phash, item.image_phash) <= max_distance
+    ]
+    duplicates.sort(key=lambda candidate: hamming_distance(candidate.image_phash, item.image_phash))
+    return duplicates
+
+
+def flag_possible_duplicates(item):
+    from .models import ContentModeration
+
+    duplicates = find_possible_duplicates(item)
+    if duplicates and not ContentModeration.objects.filter(item=item, reason='duplicate', status='pending').exists():
+        # Titles are stored HTML-escaped and the moderation page escapes again
+        listed = ', '.join(f'#{duplicate.id} "{html.unescape(duplicate.title)}"' for duplicate in duplicates[:5])
+        ContentModeration.objects.create(
+            item=item,
+            reason='duplicate',
+            description=f'Image closely matches previously reported item(s): {listed}',
+        )
+    return duplicates
@@ -0,0 +1,59 @@
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def provider_message_id(message):
+    # Anymail backends record the provider's id(s) on the message; others don't.
+    status = getattr(message, 'anymail_status', None)
+    message_id = getattr(status, 'message_id', None)
+    if isinstance(message_id, (set, list, tuple)):
+        message_id = ','.join(sorted(str(value) for value in message_id))
+    return str(message_id or '')[:255]
+
+
+def deliver_emails(emails):
+    """Send OutgoingEmail rows over a single reused backend connection.
+
+    Each row is marked sent (with the provider message id) or has its error
+    recorded. Returns ``{email_id: error}`` for the ones that failed.
+    """
+    if not emails:
+        return {}
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        error = f'Could not connect to email backend: {str(e)}'
+        OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            attempts=F('attempts') + 1, last_error=error
+        )
+        return {email.id: error for email in emails}
+
+    errors = {}
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients, connection=connection
+            )
+            try:
+                message.send()
+            except Exception as e:
+                errors[email.id] = str(e) or e.__class__.__name__
+                OutgoingEmail.objects.filter(id=email.id).update(
+                    attempts=F('attempts') + 1, last_error=errors[email.id][:2000]
+                )
+                continue
+            OutgoingEmail.objects.filter(id=email.id).update(
+                status='sent',
+                attempts=F('attempts') + 1,
+                last_error='',
+                message_id=provider_message_id(message),
+                sent_at=timezone.now(),
+            )
+    finally:
+        connection.close()
+    return errors
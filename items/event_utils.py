@@ -0,0 +1,214 @@
+import json
+import re
+from datetime import timezone as dt_timezone
+
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Claim, Notification
+from .notification_utils import get_unread_count
+
+
+# Server-sent event stream settings. The stream checks for new notifications
+# with one indexed query per poll; connections are recycled after
+# SSE_MAX_STREAM_SECONDS and resume from the browser's Last-Event-ID.
+# Each open tab costs one query per SSE_POLL_SECONDS, so the interval trades
+# delivery latency (up to this long) against idle database load.
+SSE_POLL_SECONDS = 10
+SSE_HEARTBEAT_SECONDS = 20
+SSE_MAX_STREAM_SECONDS = 300
+SSE_RETRY_MILLISECONDS = 5000
+SSE_BATCH_SIZE = 50
+
+# get_updates returns at most this many changes per call; clients page with the cursor
+UPDATES_LIMIT = 20
+# Order of change kinds sharing a timestamp, part of the (time, kind, id) cursor
+UPDATE_KINDS = ('claim', 'notification')
+
+_SPACED_OFFSET = re.compile(r'(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?) (\d{2}:?\d{2})$')
+
+
+def parse_event_id(value):
+    try:
+        event_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return event_id if event_id >= 0 else None
+
+
+def latest_notification_id(user_id):
+    return Notification.objects.filter(recipient_id=user_id).aggregate(latest=Max('id'))['latest'] or 0
+
+
+def notification_event(notification):
+    data = {
+        'id': notification.id,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+    if notification.claim_id:
+        claim = notification.claim
+        data['claim'] = {
+            'id': claim.id,
+            'status': claim.status,
+            'item_id': claim.item_id,
+            'item_title': claim.item.title,
+            'claimer': claim.claimer.username,
+        }
+        return 'claim', data
+    if notification.match_id:
+        match = notification.match
+        data['match'] = {
+            'id': match.id,
+            'lost_item_id': match.lost_item_id,
+            'found_item_id': match.found_item_id,
+            'score': match.score,
+        }
+        return 'match', data
+    return 'notification', data
+
+
+def notification_events(user_id, after_id, limit=SSE_BATCH_SIZE):
+    # Events for notifications newer than the cursor, oldest first, as (id, type, data).
+    notifications = Notification.objects.filter(
+        recipient_id=user_id, id__gt=after_id
+    ).select_related('claim__item', 'claim__claimer', 'match').order_by('id')[:limit]
+    return [(notification.id, *notification_event(notification)) for notification in notifications]
+
+
+def format_sse(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _parse_cursor_time(value):
+    # An unencoded '+' in a GET query string arrives as a space before the UTC offset
+    value = _SPACED_OFFSET.sub(r'\1+\2', value.strip())
+    try:
+        created_at = parse_datetime(value)
+    except ValueError:
+        return None
+    if created_at is not None and timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at, dt_timezone.utc)
+    return created_at
+
+
+def parse_update_cursor(value):
+    """Position ``(created_at, kind, id)`` from a ``cursor`` returned by ``collect_updates``.
+
+    A bare ISO timestamp (the older ``timestamp`` cursor) gives ``(created_at, None, None)``,
+    meaning everything after that instant. Returns None when ``value`` can't be parsed.
+    """
+    parts = value.split('|') if value else []
+    if len(parts) == 1:
+        created_at = _parse_cursor_time(parts[0])
+        return (created_at, None, None) if created_at else None
+    if len(parts) != 3 or parts[1] not in UPDATE_KINDS:
+        return None
+    created_at, kind, row_id = _parse_cursor_time(parts[0]), parts[1], parse_event_id(parts[2])
+    if created_at is None or row_id is None:
+        return None
+    return created_at, kind, row_id
+
+
+def format_update_cursor(created_at, kind, row_id):
+    return f'{created_at.isoformat()}|{kind}|{row_id}'
+
+
+def _after(rows, time_field, kind, position):
+    # Rows of ``kind`` that sort after ``position`` in (time, kind, id) order
+    created_at, last_kind, last_id = position
+    if last_kind is None or UPDATE_KINDS.index(kind) < UPDATE_KINDS.index(last_kind):
+        return rows.filter(**{f'{time_field}__gt': created_at})
+    if UPDATE_KINDS.index(kind) > UPDATE_KINDS.index(last_kind):
+        return rows.filter(**{f'{time_field}__gte': created_at})
+    return rows.filter(Q(**{f'{time_field}__gt': created_at}) | Q(**{time_field: created_at, 'id__gt': last_id}))
+
+
+def _change_order(change):
+    created_at, kind, row = change
+    return created_at, UPDATE_KINDS.index(kind), row.id
+
+
+def claim_update(claim):
+    return {
+        'id': claim.id,
+        'item_title': claim.item.title,
+        'claimer': claim.claimer.username,
+        'claimed_at': claim.claimed_at.isoformat(),
+        'status': claim.status,
+    }
+
+
+def notification_update(notification):
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'claim_id': notification.claim_id,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def collect_updates(user, since=None, limit=UPDATES_LIMIT):
+    """Pending claims on the user's items and unread notifications.
+
+    ``new_claims`` and ``new_notifications`` are always the totals. The
+    ``claim_updates`` and ``notification_updates`` lists hold the changes:
+    without a position (from ``parse_update_cursor``), the newest ``limit``
+    of each; with one, at most ``limit`` rows after it in (created, kind, id)
+    order, read through the (item, claimed_at) and (recipient, is_read,
+    created_at) indexes. Rows sharing a timestamp are never skipped. The
+    returned ``cursor`` is the position for the next call and ``has_more``
+    says whether it should come right away.
+    """
+    claims = Claim.objects.filter(item__user=user, status='pending').select_related('claimer', 'item')
+    notifications = Notification.objects.filter(recipient=user, is_read=False)
+    totals = {'new_claims': claims.count(), 'new_notifications': get_unread_count(user)}
+
+    if since is None:
+        claims = list(claims.order_by('-claimed_at', '-id')[:limit])
+        notifications = list(notifications.order_by('-created_at', '-id')[:limit])
+        changes = [(claim.claimed_at, 'claim', claim) for claim in claims] + [
+            (notification.created_at, 'notification', notification) for notification in notifications
+        ]
+        has_more = len(claims) == limit or len(notifications) == limit
+    else:
+        claims = list(_after(claims, 'claimed_at', 'claim', since).order_by('claimed_at', 'id')[:limit + 1])
+        notifications = list(
+            _after(notifications, 'created_at', 'notification', since).order_by('created_at', 'id')[:limit + 1]
+        )
+        # Keep the globally oldest ``limit`` changes so nothing before the new cursor is skipped
+        changes = sorted(
+            [(claim.claimed_at, 'claim', claim) for claim in claims]
+            + [(notification.created_at, 'notification', notification) for notification in notifications],
+            key=_change_order,
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        claims = [row for _, kind, row in changes if kind == 'claim']
+        notifications = [row for _, kind, row in changes if kind == 'notification']
+
+    if changes:
+        created_at, kind, row = max(changes, key=_change_order)
+        cursor, timestamp = format_update_cursor(created_at, kind, row.id), created_at.isoformat()
+    elif since is not None:
+        cursor = format_update_cursor(*since) if since[1] else since[0].isoformat()
+        timestamp = since[0].isoformat()
+    else:
+        # No cursor yet when there is nothing to report; the client keeps polling without one
+        cursor = timestamp = None
+    return {
+        **totals,
+        'claim_updates': [claim_update(claim) for claim in claims],
+        'notification_updates': [notification_update(notification) for notification in notifications],
+        'timestamp': timestamp,
+        'cursor': cursor,
+        'has_more': has_more,
+    }
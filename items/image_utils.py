@@ -0,0 +1,214 @@
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from urllib.request import urlopen
+
+import cloudinary
+import cloudinary.uploader
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+IMAGE_FETCH_TIMEOUT = 15
+THUMBNAIL_WIDTHS = (320, 640, 960)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+VARIANT_QUALITY = 80
+
+
+def local_media_path(image_url):
+    # Filesystem path for a MEDIA_URL-relative image URL, or None for remote URLs.
+    media_url = settings.MEDIA_URL
+    if not image_url or not image_url.startswith(media_url):
+        return None
+    return Path(settings.MEDIA_ROOT) / image_url[len(media_url):]
+
+
+class MissingMediaFile(FileNotFoundError):
+    pass
+
+
+def load_image_bytes(image_url):
+    local_path = local_media_path(image_url)
+    if local_path is not None:
+        try:
+            return local_path.read_bytes()
+        except FileNotFoundError:
+            # Uploads land in the web process's MEDIA_ROOT; a worker on another
+            # machine can't see them, and retrying won't change that.
+            raise MissingMediaFile(
+                f'{image_url} is not in MEDIA_ROOT ({settings.MEDIA_ROOT}); '
+                'the worker must share MEDIA_ROOT with the web process'
+            ) from None
+
+    if not image_url.startswith(('http://', 'https://')):
+        raise ValueError(f'Unsupported image URL: {image_url}')
+    with urlopen(image_url, timeout=IMAGE_FETCH_TIMEOUT) as response:
+        return response.read()
+
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
+# Extension is chosen from the file's magic bytes, never from the client's filename
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+]
+
+
+class InvalidImageUpload(ValueError):
+    pass
+
+
+def sniff_image_extension(header):
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def store_upload(uploaded_file, subdir='items', max_size=MAX_UPLOAD_SIZE):
+    """Stream an upload into content-addressed media storage.
+
+    The file is hashed, size-checked and sniffed while it is written once to a
+    temp file in the destination directory, then renamed to ``<sha256><ext>``.
+    Identical uploads resolve to the same file, so nothing is stored twice and
+    concurrent uploads never collide on a client-supplied name.
+    Returns ``(url, sha256)``.
+    """
+    media_dir = Path(settings.MEDIA_ROOT) / subdir
+    media_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    header = b''
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=media_dir, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in uploaded_file.chunks():
+                size += len(chunk)
+                if size > max_size:
+                    raise InvalidImageUpload('Image size must be less than 5MB.')
+                if len(header) < 16:
+                    header += chunk[:16 - len(header)]
+                digest.update(chunk)
+                f.write(chunk)
+
+        extension = sniff_image_extension(header)
+        if extension is None:
+            raise InvalidImageUpload('Please upload a valid image file (JPG, PNG, GIF, or WebP).')
+
+        filename = f"{digest.hexdigest()}{extension}"
+        final_path = media_dir / filename
+        if final_path.exists():
+            os.remove(temp_path)
+        else:
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, final_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return f"{settings.MEDIA_URL}{subdir}/{filename}", digest.hexdigest()
+
+
+def delete_local_media(urls):
+    for url in urls:
+        path = local_media_path(url)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+
+def publish_upload(image_url):
+    """Return a URL for a just-stored upload that visitors and the worker can read.
+
+    With LOCAL_MEDIA_SHARED (or no Cloudinary to move it to) that is the local
+    URL, and the worker moves the file to Cloudinary later. Otherwise the
+    original is uploaded now and the local copy dropped.
+    """
+    from .models import Item
+
+    if settings.LOCAL_MEDIA_SHARED or not remote_storage_configured():
+        return image_url
+    remote_url = upload_to_remote(local_media_path(image_url))
+    if not Item.objects.filter(image_url=image_url).exists():
+        delete_local_media([image_url])
+    return remote_url
+
+
+def remote_storage_configured():
+    cloud_name = cloudinary.config().cloud_name
+    return bool(cloud_name) and cloud_name != 'your_cloud_name'
+
+
+def upload_to_remote(local_path):
+    # Content-addressed files upload under their hash, so Cloudinary dedupes them too
+    result = cloudinary.uploader.upload(
+        str(local_path), public_id=Path(local_path).stem, unique_filename=False, overwrite=False
+    )
+    secure_url = result.get('secure_url')
+    if not secure_url:
+        raise ValueError('Cloudinary upload returned no URL')
+    return secure_url
+
+
+def generate_image_variants(image_bytes, subdir='items/variants'):
+    """Write resized WebP and JPEG copies of an image at THUMBNAIL_WIDTHS.
+
+    Returns ``{'webp': {'320': url, ...}, 'jpeg': {...}}``. Widths at or above the
+    original are skipped (the smallest is always produced), and files are named
+    after the source hash so regenerating is idempotent.
+    """
+    media_dir = Path(settings.MEDIA_ROOT) / subdir
+    media_dir.mkdir(parents=True, exist_ok=True)
+    source_hash = hashlib.sha256(image_bytes).hexdigest()
+
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+
+    widths = [width for width in THUMBNAIL_WIDTHS if width < image.width] or [min(image.width, THUMBNAIL_WIDTHS[0])]
+    variants = {name: {} for name in VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for name, (image_format, extension) in VARIANT_FORMATS.items():
+            filename = f"{source_hash}-{width}{extension}"
+            path = media_dir / filename
+            if not path.exists():
+                resized.save(path, format=image_format, quality=VARIANT_QUALITY, optimize=True)
+            variants[name][str(width)] = f"{settings.MEDIA_URL}{subdir}/{filename}"
+    return variants
+
+
+def image_dhash(image_bytes):
+    """64-bit difference hash: one bit per horizontally adjacent pixel pair of a
+    9x8 grayscale thumbnail. Near-identical photos differ in only a few bits.
+    Returned signed so it fits a BigIntegerField.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft('L', (64, 64))
+        gray = ImageOps.exif_transpose(image).convert('L').resize((9, 8), Image.LANCZOS)
+
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def compute_image_phash(image_url):
+    # Hash for a just-stored upload; None if it can't be decoded (the worker retries).
+    try:
+        return image_dhash(load_image_bytes(image_url))
+    except Exception:
+        return None
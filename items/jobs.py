@@ -0,0 +1,247 @@
+import html
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Item, OutgoingEmail, Notification, BackgroundJob
+from .task_queue import register_job, enqueue_job, PermanentJobError
+from .ai_utils import tag_image_cached, flush_tag_cache_hits, mime_type_for, ai_tagging_enabled
+from .image_utils import (
+    load_image_bytes, local_media_path, remote_storage_configured, upload_to_remote, generate_image_variants, image_dhash,
+    delete_local_media, MissingMediaFile,
+)
+from .security_utils import sanitize_ai_tags
+from .matching_utils import update_item_matches
+from .email_utils import deliver_emails
+from .cache_utils import invalidate, ITEMS_NAMESPACE
+from .karma_utils import compact_karma_ledger
+
+
+AI_TAGGING_JOB = 'ai_tagging'
+IMAGE_PROCESSING_JOB = 'image_processing'
+ITEM_MATCHING_JOB = 'item_matching'
+EMAIL_DELIVERY_JOB = 'email_delivery'
+EMAIL_DIGEST_JOB = 'email_digest'
+KARMA_COMPACTION_JOB = 'karma_compaction'
+
+KARMA_COMPACTION_INTERVAL = timedelta(days=1)
+
+
+def enqueue_ai_tagging(item, set_category=False):
+    if not ai_tagging_enabled():
+        return None
+    # The category is recorded so the worker doesn't overwrite one the user picks meanwhile
+    return enqueue_job(AI_TAGGING_JOB, {'item_id': item.id, 'set_category': set_category, 'category': item.category})
+
+
+@register_job(AI_TAGGING_JOB, batch=True)
+def run_ai_tagging(jobs):
+    items = Item.objects.in_bulk([job.payload.get('item_id') for job in jobs])
+    failures = {}
+
+    for job in jobs:
+        item = items.get(job.payload.get('item_id'))
+        if item is None:
+            # Item deleted before the worker got to it; nothing left to tag
+            continue
+
+        try:
+            image_bytes = load_image_bytes(item.image_url)
+        except MissingMediaFile as e:
+            failures[job.id] = PermanentJobError(f'Could not load image: {str(e)}')
+            continue
+        except Exception as e:
+            failures[job.id] = f'Could not load image: {str(e)}'
+            continue
+
+        result = tag_image_cached(image_bytes, mime_type_for(item.image_url))
+        if 'error' in result:
+            failures[job.id] = result['error']
+            continue
+
+        # The model call is slow; merge into the row as it is now, not as it was loaded
+        with transaction.atomic():
+            current = Item.objects.select_for_update().filter(id=item.id, image_url=item.image_url).first()
+            if current is None:
+                # Deleted or given a new image meanwhile; a new image queues its own job
+                continue
+            existing_tags = current.ai_tags if isinstance(current.ai_tags, list) else []
+            new_tags = [tag for tag in result.get('tags', []) if tag.lower() not in {t.lower() for t in existing_tags}]
+            update_fields = ['ai_tags', 'search_document', 'updated_at']
+            current.ai_tags = sanitize_ai_tags(existing_tags + new_tags)
+            if job.payload.get('set_category') and current.category == job.payload.get('category', current.category):
+                current.category = result.get('category', current.category)
+                update_fields.append('category')
+            current.save(update_fields=update_fields)
+        # New tags can change which items match
+        enqueue_item_matching(current)
+
+    flush_tag_cache_hits()
+    return failures
+
+
+def enqueue_image_processing(item):
+    if not item.image_url:
+        return None
+    return enqueue_job(IMAGE_PROCESSING_JOB, {'item_id': item.id, 'image_url': item.image_url})
+
+
+@register_job(IMAGE_PROCESSING_JOB)
+def run_image_processing(payload):
+    # Builds thumbnails (and the duplicate-detection hash if missing), then, if
+    # Cloudinary is configured, moves the thumbnails (and a local original, see
+    # publish_upload) to it, swapping the item's URLs in one conditional UPDATE
+    # and deleting the local copies.
+    image_url = payload['image_url']
+    item = Item.objects.filter(id=payload['item_id'], image_url=image_url).only('id', 'image_phash').first()
+    if item is None:
+        # Item deleted or given a new image since the job was queued
+        return
+
+    try:
+        image_bytes = load_image_bytes(image_url)
+    except MissingMediaFile as e:
+        raise PermanentJobError(str(e)) from e
+    variants = generate_image_variants(image_bytes)
+    # update() skips auto_now; bump updated_at so DuplicateIndex.sync picks up the hash
+    updates = {'image_variants': variants, 'updated_at': timezone.now()}
+    if item.image_phash is None:
+        updates['image_phash'] = image_dhash(image_bytes)
+
+    if remote_storage_configured():
+        updates['image_variants'] = {
+            name: {width: upload_to_remote(local_media_path(url)) for width, url in urls.items()}
+            for name, urls in variants.items()
+        }
+        local_path = local_media_path(image_url)
+        if local_path is not None:
+            updates['image_url'] = upload_to_remote(local_path)
+
+    # Only swap if the image is still the one we processed
+    if not Item.objects.filter(id=payload['item_id'], image_url=image_url).update(**updates):
+        return
+    invalidate(ITEMS_NAMESPACE)
+
+    # Files are content-addressed, so another item with the same upload shares
+    # them; leave them until that item's own job has moved it off local disk.
+    if remote_storage_configured() and not Item.objects.filter(image_url=image_url).exclude(id=payload['item_id']).exists():
+        delete_local_media([image_url, *(url for urls in variants.values() for url in urls.values())])
+
+
+def enqueue_item_matching(item):
+    return enqueue_job(ITEM_MATCHING_JOB, {'item_id': item.id})
+
+
+@register_job(ITEM_MATCHING_JOB)
+def run_item_matching(payload):
+    item = Item.objects.filter(id=payload['item_id']).first()
+    if item is None:
+        return
+    update_item_matches(item)
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    # Stores the message in the outbox; the worker sends it. Blank addresses are dropped.
+    recipients = [recipient for recipient in recipients if recipient]
+    if not recipients:
+        return None
+    email = OutgoingEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+    enqueue_job(EMAIL_DELIVERY_JOB, {'email_id': email.id})
+    return email
+
+
+@register_job(EMAIL_DELIVERY_JOB, batch=True)
+def run_email_delivery(jobs):
+    emails = OutgoingEmail.objects.in_bulk([job.payload.get('email_id') for job in jobs])
+    pending = []
+    for job in jobs:
+        email = emails.get(job.payload.get('email_id'))
+        # Skip rows already sent (e.g. a job reclaimed after its worker died mid-batch)
+        if email is not None and email.status == 'pending':
+            pending.append((job, email))
+    errors = deliver_emails([email for _, email in pending])
+
+    failures = {}
+    for job, email in pending:
+        if email.id not in errors:
+            continue
+        failures[job.id] = errors[email.id]
+        if job.attempts >= job.max_attempts:
+            OutgoingEmail.objects.filter(id=email.id).update(status='failed')
+    return failures
+
+
+def notify_by_email(notification, subject, body):
+    """Email the recipient about ``notification``.
+
+    With EMAIL_DIGEST_WINDOW unset the message is queued right away. Otherwise
+    the notification is marked for the recipient's digest, and one digest job
+    per recipient is scheduled for the end of the window to send everything
+    that piled up in a single email.
+    """
+    window = settings.EMAIL_DIGEST_WINDOW
+    if not window:
+        return enqueue_email(subject, body, [notification.recipient.email])
+
+    Notification.objects.filter(id=notification.id).update(email_pending=True)
+    digest_scheduled = BackgroundJob.objects.filter(
+        kind=EMAIL_DIGEST_JOB, status='pending', payload__recipient_id=notification.recipient_id
+    ).exists()
+    if not digest_scheduled:
+        enqueue_job(EMAIL_DIGEST_JOB, {'recipient_id': notification.recipient_id}, delay=timedelta(seconds=window))
+    return None
+
+
+@register_job(EMAIL_DIGEST_JOB)
+def run_email_digest(payload):
+    with transaction.atomic():
+        pending = list(
+            Notification.objects.select_for_update()
+            .filter(recipient_id=payload['recipient_id'], email_pending=True)
+            .select_related('recipient')
+            .order_by('created_at')
+        )
+        if not pending:
+            return
+        Notification.objects.filter(id__in=[notification.id for notification in pending]).update(email_pending=False)
+
+        recipient = pending[0].recipient
+        count = len(pending)
+        lines = '\n'.join(
+            f"- {html.unescape(notification.message)} ({notification.created_at:%b %d, %H:%M})"
+            for notification in pending
+        )
+        subject = f"You have {count} new notification{'s' if count != 1 else ''} - Campus Lost & Found"
+        body = f"""
+Hello {recipient.username},
+
+Here is what happened with your items recently:
+
+{lines}
+
+Log in and open your Notifications page to respond.
+
+Best regards,
+Campus Lost & Found Team
+        """
+        enqueue_email(subject, body, [recipient.email])
+
+
+def schedule_karma_compaction(delay=None):
+    # Keeps exactly one compaction pending; each run schedules the next
+    if BackgroundJob.objects.filter(kind=KARMA_COMPACTION_JOB, status__in=['pending', 'running']).exists():
+        return None
+    return enqueue_job(KARMA_COMPACTION_JOB, delay=delay)
+
+
+@register_job(KARMA_COMPACTION_JOB)
+def run_karma_compaction(payload):
+    compact_karma_ledger()
+    enqueue_job(KARMA_COMPACTION_JOB, delay=KARMA_COMPACTION_INTERVAL)
@@ -1,21 +1,127 @@
+from bisect import bisect_left
+from datetime import timedelta
+
 from accounts.models import UserProfile
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import KarmaEvent
+from .cache_utils import cached, invalidate, LEADERBOARD_NAMESPACE
 
 
 KARMA_POINTS_PER_RETURN = 50
+# Ledger events older than this are folded into one 'compacted' event per user
+KARMA_LEDGER_RETENTION = timedelta(days=90)
+
+
+def _apply_karma(user_id, points, items_returned):
+    # One atomic UPDATE; concurrent awards add up instead of overwriting each other
+    changes = {
+        'karma_points': F('karma_points') + points,
+        'total_items_returned': F('total_items_returned') + items_returned,
+    }
+    if not UserProfile.objects.filter(user_id=user_id).update(**changes):
+        UserProfile.objects.get_or_create(user_id=user_id)
+        UserProfile.objects.filter(user_id=user_id).update(**changes)
+
+
+def award_karma_points(user, points=KARMA_POINTS_PER_RETURN, claim=None, items_returned=1, reason='item_returned'):
+    """Record a karma event in the ledger and add it to the user's profile counters."""
+    with transaction.atomic():
+        event = KarmaEvent.objects.create(
+            user=user, points=points, items_returned=items_returned, reason=reason, claim=claim
+        )
+        _apply_karma(user.id, points, items_returned)
+    invalidate(LEADERBOARD_NAMESPACE)
+    return event
 
 
-def award_karma_points(user, points=KARMA_POINTS_PER_RETURN):
-    profile, created = UserProfile.objects.get_or_create(user=user)
-    profile.karma_points += points
-    profile.total_items_returned += 1
-    profile.save()
-    return profile
+def rebuild_karma_from_ledger(user_ids=None):
+    # Replay the ledger into the profile counters in one UPDATE; returns profiles updated.
+    def ledger_sum(field):
+        return Coalesce(Subquery(
+            KarmaEvent.objects.filter(user_id=OuterRef('user_id')).order_by().values('user_id')
+            .annotate(total=Sum(field)).values('total'),
+            output_field=IntegerField(),
+        ), Value(0))
+
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    updated = profiles.update(karma_points=ledger_sum('points'), total_items_returned=ledger_sum('items_returned'))
+    invalidate(LEADERBOARD_NAMESPACE)
+    return updated
+
+
+def compact_karma_ledger(before=None):
+    """Fold each user's events older than ``before`` into a single 'compacted' event.
+
+    Sums are preserved, so the profile counters and a replay are unaffected.
+    New awards are always newer than ``before`` and never touched. Returns how
+    many rows the ledger shrank by.
+    """
+    before = before or timezone.now() - KARMA_LEDGER_RETENTION
+    with transaction.atomic():
+        old = KarmaEvent.objects.filter(created_at__lt=before)
+        totals = [
+            row for row in old.order_by().values('user_id').annotate(
+                points=Sum('points'), items_returned=Sum('items_returned'), events=Count('id')
+            )
+            if row['events'] > 1
+        ]
+        if not totals:
+            return 0
+        deleted, _ = old.filter(user_id__in=[row['user_id'] for row in totals]).delete()
+        KarmaEvent.objects.bulk_create([
+            KarmaEvent(user_id=row['user_id'], points=row['points'], items_returned=row['items_returned'],
+                       reason='compacted', created_at=before)
+            for row in totals
+        ])
+    return deleted - len(totals)
 
 
 def get_leaderboard(limit=20):
     # Only users with at least 50 karma points, top 20
-    return UserProfile.objects.filter(karma_points__gte=50).order_by('-karma_points')[:limit]
+    return UserProfile.objects.filter(karma_points__gte=50).select_related('user').order_by('-karma_points')[:limit]
+
+
+def build_rank_index():
+    """Karma distribution as a sorted index: one GROUP BY over the karma_points index.
+
+    ``points`` holds each distinct karma value negated (so it sorts ascending) and
+    ``above[i]`` counts the profiles with more karma than ``-points[i]``, which
+    turns a rank lookup into a bisect. Totals for the leaderboard header come
+    from the same rows.
+    """
+    rows = UserProfile.objects.order_by('-karma_points').values('karma_points').annotate(
+        profiles=Count('id'), returned=Sum('total_items_returned')
+    )
+    points, above = [], [0]
+    totals = {'total_participants': 0, 'total_items_returned': 0, 'total_karma_points': 0}
+    for row in rows:
+        points.append(-row['karma_points'])
+        above.append(above[-1] + row['profiles'])
+        if row['karma_points'] > 0:
+            totals['total_participants'] += row['profiles']
+        totals['total_items_returned'] += row['returned'] or 0
+        totals['total_karma_points'] += row['karma_points'] * row['profiles']
+    return {'points': points, 'above': above, 'totals': totals}
+
+
+def get_rank_index():
+    # Rebuilt once after each award; invalidated by award_karma_points and replays
+    return cached(LEADERBOARD_NAMESPACE, 'rank_index', build_rank_index)
+
+
+def rank_for_karma(karma_points):
+    index = get_rank_index()
+    return index['above'][bisect_left(index['points'], -karma_points)] + 1
+
+
+def leaderboard_totals():
+    return get_rank_index()['totals']
 
 
 def get_user_karma(user):
@@ -27,12 +133,8 @@ def get_user_karma(user):
 
 
 def get_user_rank(user):
-    try:
-        user_profile = UserProfile.objects.get(user=user)
-        rank = UserProfile.objects.filter(karma_points__gt=user_profile.karma_points).count() + 1
-        return rank
-    except UserProfile.DoesNotExist:
+    karma_points = UserProfile.objects.filter(user=user).values_list('karma_points', flat=True).first()
+    if karma_points is None:
         # User has no profile yet, create one and return their rank
-        profile = UserProfile.objects.create(user=user)
-        rank = UserProfile.objects.filter(karma_points__gt=profile.karma_points).count() + 1
-        return rank
+        karma_points = UserProfile.objects.create(user=user).karma_points
+    return rank_for_karma(karma_points)
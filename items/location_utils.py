@@ -1,7 +1,17 @@
-from math import radians, sin, cos, sqrt, atan2
-from django.db.models import F, FloatField
+from math import radians, sin, cos, sqrt, atan2, asin, degrees
+from django.db.models import F, FloatField, Q
 from django.db.models.functions import ACos, Cos, Radians, Sin
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EARTH_RADIUS_KM = 6371
+MAX_NEARBY_RESULTS = 200
+NEARBY_PAGE_SIZE = 20
+
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371
@@ -18,22 +28,92 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return distance
 
 
-def get_nearby_items(latitude, longitude, radius_km=5):
+def haversine_distances(latitude, longitude, latitudes, longitudes):
+    # Batched haversine: distances in km from one point to arrays of points in a
+    # single NumPy pass. Falls back to the scalar loop when NumPy is unavailable.
+    if np is None:
+        return [haversine_distance(latitude, longitude, lat, lon) for lat, lon in zip(latitudes, longitudes)]
+
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    delta_lat = lat2 - lat1
+    delta_lon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def rank_within_radius(latitude, longitude, latitudes, longitudes, radius_km, limit=None):
+    # Indices of the points within radius_km, nearest first, and their distances.
+    distances = haversine_distances(latitude, longitude, latitudes, longitudes)
+
+    if np is None:
+        order = sorted(
+            (index for index, distance in enumerate(distances) if distance <= radius_km),
+            key=lambda index: distances[index],
+        )[:limit]
+        return order, [distances[index] for index in order]
+
+    inside = np.flatnonzero(distances <= radius_km)
+    if limit is not None and limit < inside.size:
+        inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+    order = inside[np.argsort(distances[inside], kind='stable')]
+    return order.tolist(), distances[order].tolist()
+
+
+def bounding_box(latitude, longitude, radius_km):
+    # Smallest lat/lon rectangle containing the search circle. Longitude bounds may
+    # run past +/-180; bounding_box_filter splits the range in that case.
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    delta_lat = degrees(angular_radius)
+    min_lat = latitude - delta_lat
+    max_lat = latitude + delta_lat
+
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    lon_ratio = sin(angular_radius) / cos(radians(latitude))
+    if lon_ratio >= 1.0:
+        return min_lat, max_lat, -180.0, 180.0
+    delta_lon = degrees(asin(lon_ratio))
+    return min_lat, max_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def bounding_box_filter(latitude, longitude, radius_km):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    box = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+
+    if min_lon < -180.0:
+        return box & (Q(longitude__gte=min_lon + 360.0) | Q(longitude__lte=max_lon))
+    if max_lon > 180.0:
+        return box & (Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon - 360.0))
+    return box & Q(longitude__gte=min_lon, longitude__lte=max_lon)
+
+
+def get_nearby_item_distances(latitude, longitude, radius_km=5, limit=MAX_NEARBY_RESULTS):
     from .models import Item
-    
-    items_with_distance = []
-    all_items = Item.objects.filter(
-        latitude__isnull=False,
-        longitude__isnull=False
-    ).exclude(status='returned')
-    
-    for item in all_items:
-        distance = haversine_distance(latitude, longitude, item.latitude, item.longitude)
-        if distance <= radius_km:
-            items_with_distance.append({
-                'item': item,
-                'distance': round(distance, 2)
-            })
-    
-    items_with_distance.sort(key=lambda x: x['distance'])
-    return items_with_distance
+
+    candidates = list(Item.objects.filter(
+        bounding_box_filter(latitude, longitude, radius_km)
+    ).exclude(status='returned').values_list('id', 'latitude', 'longitude'))
+    if not candidates:
+        return []
+
+    item_ids, latitudes, longitudes = zip(*candidates)
+    order, distances = rank_within_radius(latitude, longitude, latitudes, longitudes, radius_km, limit)
+    return [(item_ids[index], round(distance, 2)) for index, distance in zip(order, distances)]
+
+
+def load_nearby_items(matches):
+    from .models import Item
+
+    items = Item.objects.in_bulk([item_id for item_id, _ in matches])
+    return [
+        {'item': items[item_id], 'distance': distance}
+        for item_id, distance in matches
+        if item_id in items
+    ]
+
+
+def get_nearby_items(latitude, longitude, radius_km=5, limit=MAX_NEARBY_RESULTS):
+    return load_nearby_items(get_nearby_item_distances(latitude, longitude, radius_km, limit))
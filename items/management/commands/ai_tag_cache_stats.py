@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from items.models import AITagResult
+
+
+class Command(BaseCommand):
+    help = 'Show how many AI tagging calls the image-hash result cache has saved.'
+
+    def handle(self, *args, **kwargs):
+        rows = AITagResult.objects.values('model_name').annotate(
+            entries=Count('id'), hits=Sum('hit_count')
+        ).order_by('model_name')
+
+        if not rows:
+            self.stdout.write('AI tag cache is empty.')
+            return
+
+        for row in rows:
+            hits = row['hits'] or 0
+            lookups = hits + row['entries']
+            self.stdout.write(
+                f"{row['model_name']}: {row['entries']} cached images, {hits} hits "
+                f"({hits / lookups:.0%} of {lookups} lookups served without a model call)"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from items.models import Item
+from items.jobs import enqueue_image_processing
+
+
+class Command(BaseCommand):
+    help = 'Queue image processing for items missing thumbnails or a duplicate-detection hash.'
+
+    def handle(self, *args, **kwargs):
+        queued = 0
+        for item in Item.objects.filter(Q(image_variants={}) | Q(image_phash__isnull=True)).exclude(image_url='').only('id', 'image_url'):
+            if enqueue_image_processing(item):
+                queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued image processing for {queued} items."))
@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from items.location_utils import haversine_distance, rank_within_radius, np
+
+
+class Command(BaseCommand):
+    help = 'Compare the scalar haversine loop against the batched NumPy ranking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help='Comma-separated point counts to benchmark.')
+        parser.add_argument('--radius', type=float, default=5.0)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('NumPy is not installed. Install with: pip install numpy')
+
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        radius = options['radius']
+        origin = (12.9716, 77.5946)
+        rng = random.Random(42)
+
+        self.stdout.write(f"{'points':>10} {'scalar (ms)':>12} {'numpy (ms)':>12} {'speedup':>9}")
+        for size in sizes:
+            latitudes = [origin[0] + rng.uniform(-0.5, 0.5) for _ in range(size)]
+            longitudes = [origin[1] + rng.uniform(-0.5, 0.5) for _ in range(size)]
+            lat_array = np.array(latitudes)
+            lon_array = np.array(longitudes)
+
+            scalar = self._best_of(options['repeat'], lambda: self._scalar_rank(
+                origin, latitudes, longitudes, radius))
+            vectorized = self._best_of(options['repeat'], lambda: rank_within_radius(
+                origin[0], origin[1], lat_array, lon_array, radius))
+
+            self.stdout.write(
+                f"{size:>10} {scalar * 1000:>12.1f} {vectorized * 1000:>12.1f} {scalar / vectorized:>8.1f}x"
+            )
+
+    def _scalar_rank(self, origin, latitudes, longitudes, radius):
+        matches = []
+        for index, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+            distance = haversine_distance(origin[0], origin[1], lat, lon)
+            if distance <= radius:
+                matches.append((distance, index))
+        matches.sort()
+        return matches
+
+    def _best_of(self, repeat, func):
+        best = float('inf')
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
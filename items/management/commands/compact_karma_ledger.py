@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from items.jobs import schedule_karma_compaction
+from items.karma_utils import compact_karma_ledger, KARMA_LEDGER_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Fold old karma ledger events into one compacted event per user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=KARMA_LEDGER_RETENTION.days,
+                            help='Keep individual events from the last N days.')
+        parser.add_argument('--schedule', action='store_true',
+                            help='Only make sure the recurring compaction job is queued.')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            job = schedule_karma_compaction()
+            self.stdout.write(self.style.SUCCESS(
+                'Karma compaction job queued.' if job else 'Karma compaction job already queued.'
+            ))
+            return
+        removed = compact_karma_ledger(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Karma ledger compacted: {removed} rows removed."))
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from items.models import Item
+from items.query_utils import filter_created_between, gallery_items
+
+
+def query_shapes():
+    # The querysets the gallery and dashboard views run, built with the same helpers
+    month_ago = (timezone.now() - timedelta(days=30)).date().isoformat()
+    return {
+        'found_gallery_page': gallery_items('found')[:12],
+        'lost_gallery_page': gallery_items('lost')[:12],
+        'dashboard_recent': Item.objects.order_by('-created_at')[:9],
+        'dashboard_category_range': filter_created_between(
+            Item.objects.filter(category='electronics'), month_ago
+        ).order_by('-created_at')[:9],
+        'dashboard_status': Item.objects.filter(status='reported').order_by('-created_at')[:9],
+        'item_status_counts': Item.objects.order_by().values('item_type', 'status').annotate(total=Count('id')),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN and time the gallery and dashboard item queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Use EXPLAIN ANALYZE (PostgreSQL only); the queries are executed.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--only', default='', help='Comma-separated query names to run.')
+
+    def handle(self, *args, **options):
+        shapes = query_shapes()
+        only = [name.strip() for name in options['only'].split(',') if name.strip()]
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+
+        self.stdout.write(f"{Item.objects.count()} items on {connection.vendor}")
+        for name, queryset in shapes.items():
+            if only and name not in only:
+                continue
+            elapsed = self._best_of(options['repeat'], lambda: list(queryset.all()))
+            self.stdout.write(self.style.SUCCESS(f"\n{name}: {elapsed * 1000:.2f} ms"))
+            for line in queryset.explain(**explain_options).splitlines():
+                self.stdout.write(f"    {line}")
+
+    def _best_of(self, repeat, func):
+        best = float('inf')
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
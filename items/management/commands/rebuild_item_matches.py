@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from items.models import Item
+from items.jobs import enqueue_item_matching
+
+
+class Command(BaseCommand):
+    help = 'Queue lost/found matching for every open item (new items are matched as they are saved).'
+
+    def handle(self, *args, **kwargs):
+        queued = 0
+        for item in Item.objects.exclude(status='returned').only('id'):
+            enqueue_item_matching(item)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued matching for {queued} items."))
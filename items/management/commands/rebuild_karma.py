@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from items.karma_utils import rebuild_karma_from_ledger
+
+
+class Command(BaseCommand):
+    help = 'Replay the karma ledger into every user profile\'s karma and items-returned counters.'
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_karma_from_ledger()
+        self.stdout.write(self.style.SUCCESS(f"Karma rebuilt from the ledger for {updated} profiles."))
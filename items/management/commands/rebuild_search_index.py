@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from items.search_utils import get_search_backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recompute item search documents and rebuild the full-text search index.'
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_search_index()
+        backend = get_search_backend() or 'icontains fallback'
+        self.stdout.write(self.style.SUCCESS(
+            f"Search index rebuilt ({backend}); {updated} search documents refreshed."
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from items.stats_utils import recompute_site_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the site statistics counters from the Item and User tables.'
+
+    def handle(self, *args, **kwargs):
+        counters = recompute_site_counters()
+        self.stdout.write(self.style.SUCCESS(f"Site statistics rebuilt: {len(counters)} counters."))
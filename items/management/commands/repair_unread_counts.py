@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from items.notification_utils import recompute_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute every user profile\'s unread notification counter from the Notification table.'
+
+    def handle(self, *args, **kwargs):
+        updated = recompute_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f"Unread notification counters rebuilt for {updated} profiles."))
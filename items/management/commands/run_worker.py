@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from items.task_queue import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (AI tagging, etc.) from the database queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--kinds', default='',
+                            help='Comma-separated job kinds to process (default: all).')
+
+    def handle(self, *args, **options):
+        kinds = [kind.strip() for kind in options['kinds'].split(',') if kind.strip()] or None
+
+        while True:
+            succeeded, failed = run_pending_jobs(limit=options['batch_size'], kinds=kinds)
+            if succeeded or failed:
+                self.stdout.write(f"Processed {succeeded + failed} jobs ({failed} failed)")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,173 @@
+import html
+import re
+from datetime import timedelta
+from math import floor
+
+from django.db.models import Q
+
+from .location_utils import bounding_box, bounding_box_filter, haversine_distance
+
+
+# Lost items are only compared with found items of the same category, reported
+# within MATCH_WINDOW_DAYS of each other and (when both have coordinates) in a
+# nearby geo-cell, so each run touches a small block instead of every item.
+MATCH_RADIUS_KM = 5
+MATCH_WINDOW_DAYS = 30
+MATCH_TOP_K = 5
+MATCH_CANDIDATE_LIMIT = 500
+MIN_MATCH_SCORE = 0.3
+MATCH_WEIGHTS = {
+    'tags': 0.35,
+    'text': 0.3,
+    'location': 0.2,
+    'time': 0.15,
+}
+
+GEO_CELL_DEGREES = 0.05
+MAX_GEO_CELLS = 64
+_LON_CELLS = round(360 / GEO_CELL_DEGREES)
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = {
+    'the', 'and', 'with', 'for', 'was', 'near', 'from', 'has', 'have', 'lost', 'found',
+    'my', 'its', 'this', 'that', 'item', 'left', 'some', 'one',
+}
+
+
+def geo_cell_for(latitude, longitude):
+    # Grid cell key ("lat:lon" indices) used to block matching candidates; '' when unknown.
+    if latitude is None or longitude is None:
+        return ''
+    return f"{floor(latitude / GEO_CELL_DEGREES)}:{floor(longitude / GEO_CELL_DEGREES) % _LON_CELLS}"
+
+
+def nearby_geo_cells(latitude, longitude, radius_km=MATCH_RADIUS_KM):
+    # Cells overlapping the radius' bounding box, or None if that is too many to list
+    # (near the poles) and the caller should fall back to a plain box filter.
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    lat_range = range(floor(min_lat / GEO_CELL_DEGREES), floor(max_lat / GEO_CELL_DEGREES) + 1)
+    lon_range = range(floor(min_lon / GEO_CELL_DEGREES), floor(max_lon / GEO_CELL_DEGREES) + 1)
+    if len(lat_range) * len(lon_range) > MAX_GEO_CELLS:
+        return None
+    return [f"{lat}:{lon % _LON_CELLS}" for lat in lat_range for lon in lon_range]
+
+
+def text_tokens(*parts):
+    text = html.unescape(' '.join(part for part in parts if part)).lower()
+    return {word for word in _WORD_RE.findall(text) if len(word) > 2 and word not in STOP_WORDS}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def tag_set(item):
+    tags = item.ai_tags if isinstance(item.ai_tags, list) else []
+    return {str(tag).strip().lower() for tag in tags if str(tag).strip()}
+
+
+def location_score(a, b, radius_km=MATCH_RADIUS_KM):
+    if None not in (a.latitude, a.longitude, b.latitude, b.longitude):
+        distance = haversine_distance(a.latitude, a.longitude, b.latitude, b.longitude)
+        return max(0.0, 1 - distance / radius_km)
+    # No coordinates on one side: compare the free-text location instead
+    return jaccard(text_tokens(a.location), text_tokens(b.location))
+
+
+def time_score(a, b, window_days=MATCH_WINDOW_DAYS):
+    days_apart = abs((a.created_at - b.created_at).total_seconds()) / 86400
+    return max(0.0, 1 - days_apart / window_days)
+
+
+def score_pair(a, b):
+    """Similarity of a lost/found pair in [0, 1].
+
+    Weighted blend of tag overlap (Jaccard), title/description word overlap,
+    distance (or location text overlap without coordinates) and how close
+    together the two reports were made. Items in different categories score 0.
+    """
+    if a.category != b.category:
+        return 0.0
+    scores = {
+        'tags': jaccard(tag_set(a), tag_set(b)),
+        'text': jaccard(text_tokens(a.title, a.description), text_tokens(b.title, b.description)),
+        'location': location_score(a, b),
+        'time': time_score(a, b),
+    }
+    return round(sum(MATCH_WEIGHTS[name] * value for name, value in scores.items()), 4)
+
+
+def match_candidates(item, limit=MATCH_CANDIDATE_LIMIT):
+    from .models import Item
+
+    window = timedelta(days=MATCH_WINDOW_DAYS)
+    candidates = Item.objects.filter(
+        item_type='found' if item.item_type == 'lost' else 'lost',
+        category=item.category,
+        created_at__gte=item.created_at - window,
+        created_at__lte=item.created_at + window,
+    ).exclude(status='returned').exclude(user_id=item.user_id)
+
+    if item.geo_cell:
+        cells = nearby_geo_cells(item.latitude, item.longitude)
+        if cells is None:
+            nearby = bounding_box_filter(item.latitude, item.longitude, MATCH_RADIUS_KM)
+        else:
+            nearby = Q(geo_cell__in=cells)
+        # Reports without coordinates can't be placed in a cell, so stay eligible
+        candidates = candidates.filter(nearby | Q(geo_cell=''))
+
+    return list(candidates.order_by('-created_at')[:limit])
+
+
+def update_item_matches(item, top_k=MATCH_TOP_K):
+    """Score ``item`` against its candidate block and store its best matches.
+
+    The top ``top_k`` pairs scoring at least MIN_MATCH_SCORE are upserted into
+    ItemMatch; earlier matches of this item that no longer qualify are removed.
+    The lost item's owner is notified once for each newly found pair.
+    Returns the stored matches, best first.
+    """
+    from .models import ItemMatch
+    from .notification_utils import create_notification
+
+    if item.status == 'returned':
+        return []
+
+    scored = {candidate.id: (score_pair(item, candidate), candidate) for candidate in match_candidates(item)}
+    best = sorted(
+        (entry for entry in scored.values() if entry[0] >= MIN_MATCH_SCORE),
+        key=lambda entry: entry[0],
+        reverse=True,
+    )[:top_k]
+
+    side, other_side = ('lost_item', 'found_item') if item.item_type == 'lost' else ('found_item', 'lost_item')
+    stale = []
+    for match in ItemMatch.objects.filter(**{side: item}):
+        score = scored.get(getattr(match, f'{other_side}_id'), (0.0, None))[0]
+        if score < MIN_MATCH_SCORE:
+            stale.append(match.pk)
+        elif score != match.score:
+            ItemMatch.objects.filter(pk=match.pk).update(score=score)
+    if stale:
+        ItemMatch.objects.filter(pk__in=stale).delete()
+
+    matches = []
+    for score, candidate in best:
+        pair = {side: item, other_side: candidate}
+        match, created = ItemMatch.objects.update_or_create(**pair, defaults={'score': score})
+        if created:
+            lost_item, found_item = match.lost_item, match.found_item
+            # Item fields are stored HTML-escaped; templates (and the SSE toast) render the raw message
+            create_notification(
+                recipient=lost_item.user,
+                match=match,
+                message=(
+                    f"A found item \"{html.unescape(found_item.title)}\" reported at "
+                    f"{html.unescape(found_item.location)} may be your lost \"{html.unescape(lost_item.title)}\"."
+                ),
+            )
+        matches.append(match)
+    return matches
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.8 on 2026-10-17 14:56
+
+from django.db import migrations, models
+
+from items.search_utils import FTS_TABLE, build_search_document
+
+
+def create_search_index(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    for item in Item.objects.all().iterator():
+        Item.objects.filter(pk=item.pk).update(search_document=build_search_document(item))
+
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS items_item_search_gin ON items_item "
+            "USING GIN (to_tsvector('english', search_document))"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "search_document, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, search_document) "
+            "SELECT id, search_document FROM items_item"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS items_item_search_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0006_disputeresolution_contentmoderation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
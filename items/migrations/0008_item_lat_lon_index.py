@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0007_item_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['latitude', 'longitude'], name='items_item_latitud_80035f_idx'),
+        ),
+    ]
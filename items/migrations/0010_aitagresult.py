@@ -0,0 +1,30 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0009_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AITagResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_hash', models.CharField(max_length=64)),
+                ('model_name', models.CharField(max_length=50)),
+                ('category', models.CharField(choices=[('electronics', 'Electronics'), ('clothing', 'Clothing'), ('accessories', 'Accessories'), ('books', 'Books'), ('jewelry', 'Jewelry'), ('documents', 'Documents'), ('keys', 'Keys'), ('other', 'Other')], max_length=50)),
+                ('tags', models.JSONField(default=list)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='aitagresult',
+            constraint=models.UniqueConstraint(fields=('image_hash', 'model_name'), name='unique_ai_tag_result'),
+        ),
+    ]
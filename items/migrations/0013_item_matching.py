@@ -0,0 +1,77 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from items.matching_utils import geo_cell_for
+
+
+def fill_geo_cells(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    located = Item.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for item in located.only('id', 'latitude', 'longitude').iterator():
+        Item.objects.filter(pk=item.pk).update(geo_cell=geo_cell_for(item.latitude, item.longitude))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0012_item_image_phash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='geo_cell',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='claim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='items.claim'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['item_type', 'category', 'geo_cell', 'created_at'], name='items_item_item_ty_436604_idx'),
+        ),
+        migrations.AddField(
+            model_name='itemmatch',
+            name='found_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lost_matches', to='items.item'),
+        ),
+        migrations.AddField(
+            model_name='itemmatch',
+            name='lost_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='found_matches', to='items.item'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='items.itemmatch'),
+        ),
+        migrations.AddIndex(
+            model_name='itemmatch',
+            index=models.Index(fields=['lost_item', 'score'], name='items_itemm_lost_it_f6759e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemmatch',
+            index=models.Index(fields=['found_item', 'score'], name='items_itemm_found_i_9fb596_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemmatch',
+            constraint=models.UniqueConstraint(fields=('lost_item', 'found_item'), name='unique_item_match'),
+        ),
+        migrations.RunPython(fill_geo_cells, migrations.RunPython.noop),
+    ]
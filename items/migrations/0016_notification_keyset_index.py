@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0015_notification_email_pending'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='items_notif_recipie_f0fe2e_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_site_counters(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    User = apps.get_model('auth', 'User')
+    SiteCounter = apps.get_model('items', 'SiteCounter')
+    counters = [
+        SiteCounter(key=f"items:{row['item_type']}:{row['status']}", value=row['total'])
+        for row in Item.objects.order_by().values('item_type', 'status').annotate(total=Count('id'))
+    ]
+    counters.append(SiteCounter(key='users:active', value=User.objects.filter(is_active=True).count()))
+    SiteCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0016_notification_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_site_counters, migrations.RunPython.noop),
+    ]
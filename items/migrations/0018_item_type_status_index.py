@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0017_site_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['item_type', 'status', 'created_at'], name='items_item_item_ty_a12e49_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def open_karma_ledger(apps, schema_editor):
+    # One opening-balance event per profile so a replay reproduces today's counters
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    KarmaEvent = apps.get_model('items', 'KarmaEvent')
+    profiles = UserProfile.objects.exclude(karma_points=0, total_items_returned=0)
+    KarmaEvent.objects.bulk_create([
+        KarmaEvent(user_id=profile.user_id, points=profile.karma_points,
+                   items_returned=profile.total_items_returned, reason='opening_balance')
+        for profile in profiles.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0008_userprofile_karma_index'),
+        ('items', '0019_item_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KarmaEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('items_returned', models.IntegerField(default=0)),
+                ('reason', models.CharField(choices=[('item_returned', 'Item returned'), ('adjustment', 'Adjustment'), ('opening_balance', 'Opening balance'), ('compacted', 'Compacted history')], default='item_returned', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='karma_events', to='items.claim')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='karma_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='items_karma_user_id_b87d89_idx'), models.Index(fields=['created_at'], name='items_karma_created_407dc2_idx')],
+            },
+        ),
+        migrations.RunPython(open_karma_ledger, migrations.RunPython.noop),
+    ]
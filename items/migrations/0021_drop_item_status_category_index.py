@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 16:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0020_karma_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='items_item_status_c006b3_idx',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.8 on 2026-10-17 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0021_drop_item_status_category_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='disputeresolution',
+            name='claim',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='disputes', to='items.claim'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 import uuid
 
@@ -47,6 +48,10 @@ class Item(models.Model):
         choices=ITEM_TYPE_CHOICES,
         default='found'
     )
+    image_variants = models.JSONField(default=dict, blank=True)
+    image_phash = models.BigIntegerField(null=True, blank=True, db_index=True)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    geo_cell = models.CharField(max_length=32, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -54,12 +59,42 @@ class Item(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'created_at']),
-            models.Index(fields=['status', 'category']),
+            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['item_type', 'category', 'geo_cell', 'created_at']),
+            models.Index(fields=['item_type', 'status', 'created_at']),
+            # Query shapes from `manage.py explain_queries`: dashboard sorts and filters, and
+            # gallery pages, which only ever list unreturned items
+            models.Index(fields=['-created_at'], name='item_recent_idx'),
+            models.Index(fields=['category', 'created_at'], name='item_category_recent_idx'),
+            models.Index(fields=['status', 'created_at'], name='item_status_recent_idx'),
+            models.Index(
+                fields=['item_type', '-created_at'], condition=~models.Q(status='returned'), name='item_open_gallery_idx'
+            ),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    def _srcset(self, image_format):
+        variants = (self.image_variants or {}).get(image_format, {})
+        return ', '.join(f"{url} {width}w" for width, url in sorted(variants.items(), key=lambda v: int(v[0])))
+
+    @property
+    def webp_srcset(self):
+        return self._srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        return self._srcset('jpeg')
+
+    @property
+    def thumbnail_url(self):
+        jpeg = (self.image_variants or {}).get('jpeg', {})
+        if not jpeg:
+            return self.image_url
+        return jpeg[min(jpeg, key=int)]
+
 
 CLAIM_STATUS_CHOICES = [
     ('pending', 'Pending'),
@@ -96,18 +131,24 @@ class Claim(models.Model):
 
 class Notification(models.Model):
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
-    claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='notifications')
+    claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
+    match = models.ForeignKey('ItemMatch', on_delete=models.SET_NULL, related_name='notifications', null=True, blank=True)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    # Waiting to go out in the recipient's next email digest
+    email_pending = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', 'is_read', 'created_at']),
+            models.Index(fields=['recipient', '-created_at', '-id']),
         ]
 
     def __str__(self):
+        if self.claim_id is None:
+            return f"Notification for {self.recipient.username}"
         return f"Notification for {self.recipient.username} - Claim on {self.claim.item.title}"
 
 
@@ -197,7 +238,10 @@ class ContentModeration(models.Model):
         return f"Flag on {self.get_content_type()} - {self.get_reason_display()}"
 
     def get_content_type(self):
-        return f"Item: {self.item.title}" if self.item else f"Claim: {self.claim.id}"
+        if self.item:
+            return f"Item: {self.item.title}"
+        # Flags on a claim that was later replaced are detached from it
+        return f"Claim: {self.claim_id}" if self.claim_id else "Claim: replaced"
 
 
 DISPUTE_STATUS_CHOICES = [
@@ -216,7 +260,9 @@ DISPUTE_RESOLUTION_CHOICES = [
 
 
 class DisputeResolution(models.Model):
-    claim = models.OneToOneField(Claim, on_delete=models.CASCADE, related_name='dispute')
+    # A claim row is reused when a rejected claim is replaced, so it can collect
+    # disputes from several claimers over time
+    claim = models.ForeignKey(Claim, on_delete=models.CASCADE, related_name='disputes')
     reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='disputes_reported')
     claimer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='disputes_claimed')
     reason = models.TextField()
@@ -236,3 +282,139 @@ class DisputeResolution(models.Model):
 
     def __str__(self):
         return f"Dispute on Claim {self.claim.id} - {self.get_status_display()}"
+
+
+JOB_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
+
+
+class BackgroundJob(models.Model):
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['kind', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job #{self.id} - {self.get_status_display()}"
+
+
+class AITagResult(models.Model):
+    image_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=50)
+    category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
+    tags = models.JSONField(default=list)
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['image_hash', 'model_name'], name='unique_ai_tag_result'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} tags for {self.image_hash[:12]}"
+
+
+class ItemMatch(models.Model):
+    lost_item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='found_matches')
+    found_item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='lost_matches')
+    score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['lost_item', 'found_item'], name='unique_item_match'),
+        ]
+        indexes = [
+            models.Index(fields=['lost_item', 'score']),
+            models.Index(fields=['found_item', 'score']),
+        ]
+
+    def __str__(self):
+        return f"{self.lost_item.title} <-> {self.found_item.title} ({self.score:.2f})"
+
+
+EMAIL_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+]
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=EMAIL_STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    message_id = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} - {self.get_status_display()}"
+
+
+class SiteCounter(models.Model):
+    # Denormalized site-wide counts, e.g. 'items:found:reported' or 'users:active'
+    key = models.CharField(max_length=100, unique=True)
+    value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+KARMA_REASON_CHOICES = [
+    ('item_returned', 'Item returned'),
+    ('adjustment', 'Adjustment'),
+    ('opening_balance', 'Opening balance'),
+    ('compacted', 'Compacted history'),
+]
+
+
+class KarmaEvent(models.Model):
+    # Append-only karma ledger; UserProfile.karma_points is the running sum
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='karma_events')
+    points = models.IntegerField()
+    items_returned = models.IntegerField(default=0)
+    reason = models.CharField(max_length=20, choices=KARMA_REASON_CHOICES, default='item_returned')
+    claim = models.ForeignKey(Claim, on_delete=models.SET_NULL, null=True, blank=True, related_name='karma_events')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.points:+d} karma ({self.get_reason_display()})"
@@ -0,0 +1,135 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import UserProfile
+from .cache_utils import shared_timeout
+from .models import Notification
+
+
+UNREAD_COUNT_CACHE_SECONDS = 30
+NOTIFICATIONS_PAGE_SIZE = 20
+
+
+def unread_count_cache_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def adjust_unread_count(user_id, delta):
+    # Atomic in-database adjustment of the denormalized counter; never drops below zero.
+    UserProfile.objects.filter(user_id=user_id).update(
+        unread_notifications=Greatest(F('unread_notifications') + delta, Value(0))
+    )
+    # After commit, or a reader in between would cache the old count again
+    transaction.on_commit(lambda: cache.delete(unread_count_cache_key(user_id)))
+
+
+def create_notification(recipient, message, claim=None, match=None):
+    with transaction.atomic():
+        notification = Notification.objects.create(recipient=recipient, message=message, claim=claim, match=match)
+        adjust_unread_count(recipient.id, 1)
+    return notification
+
+
+def create_notifications(notifications):
+    """Insert unsaved ``Notification`` rows in one query and bump each recipient's counter."""
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(notifications)
+        for recipient_id, count in Counter(n.recipient_id for n in notifications).items():
+            adjust_unread_count(recipient_id, count)
+    return notifications
+
+
+def mark_notifications_read(user_id, notification_ids=None):
+    """Mark the user's unread notifications (or just ``notification_ids``) read.
+
+    One UPDATE for the rows, one for the counter; returns how many changed.
+    """
+    with transaction.atomic():
+        unread = Notification.objects.filter(recipient_id=user_id, is_read=False)
+        if notification_ids is not None:
+            unread = unread.filter(id__in=notification_ids)
+        updated = unread.update(is_read=True)
+        if updated:
+            adjust_unread_count(user_id, -updated)
+    return updated
+
+
+def get_unread_count(user):
+    """Unread notification count from the cache or the profile counter.
+
+    Falls back to counting rows for users without a profile.
+    """
+    key = unread_count_cache_key(user.id)
+    count = cache.get(key)
+    if count is None:
+        count = UserProfile.objects.filter(user_id=user.id).values_list('unread_notifications', flat=True).first()
+        if count is None:
+            count = Notification.objects.filter(recipient_id=user.id, is_read=False).count()
+        cache.set(key, count, shared_timeout(UNREAD_COUNT_CACHE_SECONDS))
+    return count
+
+
+def recompute_unread_counts(user_ids=None):
+    # Rebuild counters from the Notification table in one UPDATE; returns profiles updated.
+    unread = (
+        Notification.objects.filter(recipient_id=OuterRef('user_id'), is_read=False)
+        .order_by()
+        .values('recipient_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    updated = profiles.update(
+        unread_notifications=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0))
+    )
+    keys = [unread_count_cache_key(user_id) for user_id in profiles.values_list('user_id', flat=True)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    return updated
+
+
+def format_notification_cursor(notification):
+    return f'{notification.created_at.isoformat()}|{notification.id}'
+
+
+def parse_notification_cursor(value):
+    try:
+        created_at, notification_id = value.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        notification_id = int(notification_id)
+    except (AttributeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, notification_id
+
+
+def notification_page(user, cursor=None, page_size=NOTIFICATIONS_PAGE_SIZE):
+    """One inbox page, newest first, keyset-paginated on (created_at, id).
+
+    ``cursor`` is the value returned as ``next_cursor`` by the previous page, so
+    each page is an index range scan no matter how deep the user scrolls.
+    Returns ``(notifications, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    notifications = Notification.objects.filter(recipient=user).select_related(
+        'claim__item', 'claim__claimer', 'match__lost_item'
+    ).order_by('-created_at', '-id')
+
+    position = parse_notification_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, notification_id = position
+        notifications = notifications.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+        )
+
+    page = list(notifications[:page_size + 1])
+    if len(page) <= page_size:
+        return page, None
+    page = page[:page_size]
+    return page, format_notification_cursor(page[-1])
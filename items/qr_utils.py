@@ -35,11 +35,3 @@ def get_qr_code_url(claim):
     except QRCode.DoesNotExist:
         pass
     return None
-
-
-def validate_qr_code(code):
-    try:
-        qr = QRCode.objects.get(code=code)
-        return qr
-    except QRCode.DoesNotExist:
-        return None
@@ -0,0 +1,39 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Item
+
+
+def _start_of_day(day):
+    start = datetime.combine(day, time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def filter_created_between(items, date_from='', date_to=''):
+    """Restrict ``items`` to those created on or between two ``YYYY-MM-DD`` dates.
+
+    Compares ``created_at`` against day boundaries instead of ``created_at__date``
+    so indexes ending in ``created_at`` can serve the range. Unparseable dates
+    are ignored.
+    """
+    start, end = _parse_day(date_from), _parse_day(date_to)
+    if start:
+        items = items.filter(created_at__gte=_start_of_day(start))
+    if end:
+        items = items.filter(created_at__lt=_start_of_day(end + timedelta(days=1)))
+    return items
+
+
+def gallery_items(item_type):
+    # Matches the partial (item_type, -created_at) index on unreturned items
+    return Item.objects.filter(item_type=item_type).exclude(status='returned').order_by('-created_at')
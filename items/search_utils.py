@@ -0,0 +1,123 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'items_item_fts'
+MAX_SEARCH_TERMS = 8
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_document(item):
+    # Title, description, location and tags flattened into one lowercase string.
+    # Text fields are stored HTML-escaped by security_utils, so unescape first.
+    parts = [item.title, item.description, item.location]
+    if isinstance(item.ai_tags, list):
+        parts.extend(str(tag) for tag in item.ai_tags)
+    text = ' '.join(html.unescape(part) for part in parts if part)
+    return ' '.join(text.lower().split())
+
+
+def tokenize_query(query):
+    return _TOKEN_RE.findall((query or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        return 'sqlite'
+    return None
+
+
+_fts_table_exists = False
+
+
+def _sqlite_fts_available():
+    # Only a positive answer is cached: the table appears once migrations have run.
+    global _fts_table_exists
+    if not _fts_table_exists:
+        _fts_table_exists = FTS_TABLE in connection.introspection.table_names()
+    return _fts_table_exists
+
+
+def search_items(queryset, query):
+    """Filter ``queryset`` to items matching ``query`` and annotate ``search_rank``.
+
+    Uses the GIN tsvector index on Postgres and the FTS5 table on SQLite; any other
+    backend falls back to the old icontains scan with a constant rank.
+    """
+    terms = tokenize_query(query)
+    if not terms:
+        return queryset.none()
+
+    table = queryset.model._meta.db_table
+    backend = get_search_backend()
+
+    if backend == 'postgresql':
+        ts_query = ' & '.join(f'{term}:*' for term in terms)
+        vector = f"to_tsvector('english', {table}.search_document)"
+        match_sql = f"SELECT id FROM {table} WHERE {vector} @@ to_tsquery('english', %s)"
+        rank_sql = f"ts_rank({vector}, to_tsquery('english', %s))"
+        return queryset.filter(id__in=RawSQL(match_sql, (ts_query,))).annotate(
+            search_rank=RawSQL(rank_sql, (ts_query,))
+        )
+
+    if backend == 'sqlite':
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        match_sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        rank_sql = (
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id"
+        )
+        return queryset.filter(id__in=RawSQL(match_sql, (fts_query,))).annotate(
+            search_rank=RawSQL(rank_sql, (fts_query,))
+        )
+
+    text_filter = Q()
+    for term in terms:
+        text_filter &= Q(search_document__icontains=term)
+    return queryset.filter(text_filter).annotate(search_rank=RawSQL('0', ()))
+
+
+def index_item(item):
+    if get_search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [item.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, search_document) VALUES (%s, %s)",
+            [item.pk, item.search_document],
+        )
+
+
+def unindex_item(item_id):
+    if get_search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [item_id])
+
+
+def rebuild_search_index():
+    from .models import Item
+
+    updated = 0
+    for item in Item.objects.all().iterator():
+        document = build_search_document(item)
+        if document != item.search_document:
+            Item.objects.filter(pk=item.pk).update(search_document=document)
+            item.search_document = document
+            updated += 1
+
+    if get_search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, search_document) "
+                f"SELECT id, search_document FROM {Item._meta.db_table}"
+            )
+    return updated
@@ -1,4 +1,5 @@
 import bleach
+from django.conf import settings
 from django.utils.html import escape
 import re
 
@@ -70,3 +71,14 @@ def sanitize_location(location, max_length=300):
         location = location[:max_length]
     
     return location
+
+
+def client_ip(request):
+    # Rate-limit key for key='ip'. Behind TRUSTED_PROXY_COUNT proxies REMOTE_ADDR
+    # is the last proxy, so take the address the outermost one appended to
+    # X-Forwarded-For; entries further left are client-supplied and spoofable.
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META['REMOTE_ADDR']
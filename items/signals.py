@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Item, Claim, Notification
+from .search_utils import build_search_document, index_item, unindex_item
+from .matching_utils import geo_cell_for
+from .notification_utils import adjust_unread_count
+from .cache_utils import invalidate, ITEMS_NAMESPACE
+from .stats_utils import adjust_counter, item_counter_key, ACTIVE_USERS_KEY
+
+
+@receiver(pre_save, sender=Item)
+def update_search_document(sender, instance, **kwargs):
+    instance.search_document = build_search_document(instance)
+    instance.geo_cell = geo_cell_for(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=Item)
+def sync_search_index(sender, instance, **kwargs):
+    index_item(instance)
+
+
+@receiver(post_delete, sender=Item)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_item(instance.pk)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Claim)
+@receiver(post_delete, sender=Claim)
+def invalidate_item_fragments(sender, instance, **kwargs):
+    # Gallery pages are cached under this namespace
+    invalidate(ITEMS_NAMESPACE)
+
+
+@receiver(post_delete, sender=Notification)
+def release_unread_count(sender, instance, **kwargs):
+    # Covers cascades, e.g. a moderator removing an item (and its claim's notifications)
+    if not instance.is_read:
+        adjust_unread_count(instance.recipient_id, -1)
+
+
+def _item_counter_key(instance):
+    # Read from __dict__ so deferred fields are never fetched just for the counters
+    item_type, status = instance.__dict__.get('item_type'), instance.__dict__.get('status')
+    if item_type is None or status is None:
+        return None
+    return item_counter_key(item_type, status)
+
+
+@receiver(post_init, sender=Item)
+def remember_item_counter(sender, instance, **kwargs):
+    instance._counter_key = _item_counter_key(instance)
+
+
+@receiver(post_save, sender=Item)
+def count_item(sender, instance, created, **kwargs):
+    key = _item_counter_key(instance)
+    if created:
+        adjust_counter(key, 1)
+    elif instance._counter_key and key != instance._counter_key:
+        adjust_counter(instance._counter_key, -1)
+        adjust_counter(key, 1)
+    instance._counter_key = key
+
+
+@receiver(post_delete, sender=Item)
+def uncount_item(sender, instance, **kwargs):
+    if instance._counter_key:
+        adjust_counter(instance._counter_key, -1)
+
+
+@receiver(post_init, sender=User)
+def remember_user_active(sender, instance, **kwargs):
+    instance._counted_active = instance.__dict__.get('is_active')
+
+
+@receiver(post_save, sender=User)
+def count_active_user(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(ACTIVE_USERS_KEY, 1 if instance.is_active else 0)
+    elif instance._counted_active is not None and instance.is_active != instance._counted_active:
+        adjust_counter(ACTIVE_USERS_KEY, 1 if instance.is_active else -1)
+    instance._counted_active = instance.is_active
+
+
+@receiver(post_delete, sender=User)
+def uncount_active_user(sender, instance, **kwargs):
+    if instance._counted_active:
+        adjust_counter(ACTIVE_USERS_KEY, -1)
@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Item, SiteCounter, STATUS_CHOICES, ITEM_TYPE_CHOICES
+from .cache_utils import cached, invalidate
+
+
+STATS_NAMESPACE = 'stats'
+ACTIVE_USERS_KEY = 'users:active'
+
+
+def item_counter_key(item_type, status):
+    return f'items:{item_type}:{status}'
+
+
+def adjust_counter(key, delta):
+    # Atomic in-database adjustment; the row is created the first time a key is seen.
+    if not delta:
+        return
+    if not SiteCounter.objects.filter(key=key).update(value=F('value') + delta):
+        SiteCounter.objects.get_or_create(key=key)
+        SiteCounter.objects.filter(key=key).update(value=F('value') + delta)
+    invalidate(STATS_NAMESPACE)
+
+
+def site_counters():
+    return cached(STATS_NAMESPACE, 'counters', lambda: dict(SiteCounter.objects.values_list('key', 'value')))
+
+
+def grouped_item_counts():
+    # One GROUP BY item_type, status, answered from the (item_type, status, created_at) index
+    return {
+        (row['item_type'], row['status']): row['total']
+        for row in Item.objects.order_by().values('item_type', 'status').annotate(total=Count('id'))
+    }
+
+
+def item_status_counts():
+    """Item counts keyed by ``(item_type, status)``.
+
+    Read from the counters table; if it has not been filled yet, from one
+    grouped aggregate instead. Either way the result is cached until the
+    counters next change.
+    """
+    counters = site_counters()
+    counts = {
+        tuple(key.split(':')[1:]): value for key, value in counters.items() if key.startswith('items:')
+    }
+    if not counters:
+        counts = cached(STATS_NAMESPACE, 'grouped_item_counts', grouped_item_counts)
+    return counts
+
+
+def hero_stats():
+    counts = item_status_counts()
+    return {
+        'total_items': sum(counts.values()),
+        'returned_items': sum(value for (_, status), value in counts.items() if status == 'returned'),
+        'active_users': site_counters().get(ACTIVE_USERS_KEY, 0),
+    }
+
+
+def gallery_counts(item_type):
+    counts = item_status_counts()
+    return {
+        'total_items': sum(value for (kind, _), value in counts.items() if kind == item_type),
+        'available_items': counts.get((item_type, 'reported'), 0),
+        'claimed_items': counts.get((item_type, 'claimed'), 0),
+    }
+
+
+def item_type_summary():
+    # Per-type totals and status breakdown, e.g. for the admin changelist
+    counts = item_status_counts()
+    return [
+        {
+            'item_type': item_type,
+            'label': label,
+            'total': sum(counts.get((item_type, status), 0) for status, _ in STATUS_CHOICES),
+            'statuses': [(status_label, counts.get((item_type, status), 0)) for status, status_label in STATUS_CHOICES],
+        }
+        for item_type, label in ITEM_TYPE_CHOICES
+    ]
+
+
+def recompute_site_counters():
+    """Rebuild every counter from the Item and User tables; returns the counters written."""
+    counts = {item_counter_key(item_type, status): total for (item_type, status), total in grouped_item_counts().items()}
+    counts[ACTIVE_USERS_KEY] = User.objects.filter(is_active=True).count()
+    with transaction.atomic():
+        SiteCounter.objects.exclude(key__in=counts).delete()
+        for key, value in counts.items():
+            SiteCounter.objects.update_or_create(key=key, defaults={'value': value})
+    invalidate(STATS_NAMESPACE)
+    return counts
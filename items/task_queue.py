@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 6 * 60 * 60
+# Running jobs not updated for this long are assumed orphaned by a dead worker
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+JOB_HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    """Raised (or returned by batch handlers) for failures a retry can't fix;
+    the job is marked failed straight away."""
+
+
+def register_job(kind, batch=False):
+    """Register a worker handler for ``kind``.
+
+    Plain handlers take one job payload. Batch handlers take a list of jobs and
+    return a ``{job_id: error}`` dict for the jobs that failed (or nothing).
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = (func, batch)
+        return func
+    return decorator
+
+
+def enqueue_job(kind, payload=None, delay=None, max_attempts=5):
+    run_after = timezone.now() + delay if delay else timezone.now()
+    return BackgroundJob.objects.create(
+        kind=kind,
+        payload=payload or {},
+        run_after=run_after,
+        max_attempts=max_attempts,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_jobs(limit=20, kinds=None):
+    now = timezone.now()
+    stale = Q(status='running', updated_at__lt=now - STALE_JOB_TIMEOUT)
+    # A job that kills its worker (OOM, segfault) never reaches _finish; once it
+    # has used up its attempts, stop reclaiming it.
+    exhausted = BackgroundJob.objects.filter(stale, attempts__gte=F('max_attempts'))
+    if kinds:
+        exhausted = exhausted.filter(kind__in=kinds)
+    exhausted.update(status='failed', last_error='worker lost', updated_at=now)
+
+    ready = Q(status='pending', run_after__lte=now) | (stale & Q(attempts__lt=F('max_attempts')))
+    queryset = BackgroundJob.objects.filter(ready).order_by('run_after')
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(queryset.select_for_update(skip_locked=True)[:limit])
+            BackgroundJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status='running', attempts=F('attempts') + 1, updated_at=now
+            )
+    else:
+        # No SKIP LOCKED (SQLite): claim row by row, conditional on nobody else
+        # having touched the job since we read it.
+        jobs = [
+            job for job in queryset[:limit]
+            if BackgroundJob.objects.filter(id=job.id, status=job.status, updated_at=job.updated_at).update(
+                status='running', attempts=F('attempts') + 1, updated_at=now
+            )
+        ]
+
+    for job in jobs:
+        job.status = 'running'
+        job.attempts += 1
+    return jobs
+
+
+def _finish(jobs, failures):
+    now = timezone.now()
+    done_ids = [job.id for job in jobs if job.id not in failures]
+    if done_ids:
+        BackgroundJob.objects.filter(id__in=done_ids).update(status='done', last_error='', updated_at=now)
+
+    for job in jobs:
+        if job.id not in failures:
+            continue
+        job.last_error = str(failures[job.id])[:2000]
+        if job.attempts >= job.max_attempts or isinstance(failures[job.id], PermanentJobError):
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = now + retry_delay(job.attempts)
+        job.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+
+
+def run_jobs(jobs):
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+
+    failures = {}
+    for kind, kind_jobs in by_kind.items():
+        if kind not in JOB_HANDLERS:
+            failures.update({job.id: f'No handler registered for {kind}' for job in kind_jobs})
+            continue
+
+        handler, batch = JOB_HANDLERS[kind]
+        if batch:
+            try:
+                failures.update(handler(kind_jobs) or {})
+            except Exception as e:
+                failures.update({job.id: e for job in kind_jobs})
+        else:
+            for job in kind_jobs:
+                try:
+                    handler(job.payload)
+                except Exception as e:
+                    failures[job.id] = e
+
+    _finish(jobs, failures)
+    return len(jobs) - len(failures), len(failures)
+
+
+def run_pending_jobs(limit=20, kinds=None):
+    jobs = claim_jobs(limit=limit, kinds=kinds)
+    if not jobs:
+        return 0, 0
+    return run_jobs(jobs)
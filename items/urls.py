@@ -12,6 +12,7 @@ urlpatterns = [
     path('notifications/', views.notifications, name='notifications'),
     path('api/notifications/<int:notification_id>/reveal-contact/', views.reveal_contact_view, name='reveal_contact'),
     path('api/notifications/<int:notification_id>/mark-read/', views.mark_notification_read_view, name='mark_notification_read'),
+    path('api/notifications/mark-all-read/', views.mark_all_notifications_read_view, name='mark_all_notifications_read'),
     path('api/claims/<int:claim_id>/accept/', views.accept_claim, name='accept_claim'),
     path('api/claims/<int:claim_id>/reject/', views.reject_claim, name='reject_claim'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
@@ -26,6 +27,7 @@ urlpatterns = [
     path('gallery/', views.found_items_gallery, name='found_items_gallery'),
     path('lost/', views.lost_items_gallery, name='lost_items_gallery'),
     path('api/updates/', views.get_updates, name='get_updates'),
+    path('api/updates/stream/', views.notification_stream, name='notification_stream'),
     path('admin/moderation/', views.admin_moderation, name='admin_moderation'),
     path('api/flag-content/', views.flag_content, name='flag_content'),
     path('api/handle-moderation/', views.handle_moderation, name='handle_moderation'),
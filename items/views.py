@@ -1,13 +1,17 @@
+import asyncio
+import hashlib
+import html
 import json
-import os
-import tempfile
 from pathlib import Path
 from datetime import datetime
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseNotModified
+from django.utils.http import quote_etag, parse_etags
+from asgiref.sync import sync_to_async
 
 @login_required(login_url='accounts:login')
 @require_http_methods(["POST"])
@@ -23,11 +27,9 @@ def notify_owner(request):
         if item.user == request.user:
             return JsonResponse({'error': 'You cannot notify yourself.'}, status=400)
         # Only send email, do not create Notification (claim is required)
-        from django.core.mail import send_mail
-        from django.conf import settings
         subject = f"Someone found your lost item: {item.title}"
         body = f"Hello {item.user.username},\n\n{request.user.username} has notified you about your lost item '{item.title}'.\n\nMessage: {message}\n\nYou can reply to {request.user.email} to arrange pickup.\n\nCampus Lost & Found Team"
-        send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [item.user.email], fail_silently=True)
+        enqueue_email(subject, body, [item.user.email])
         return JsonResponse({'success': True})
     except Item.DoesNotExist:
         return JsonResponse({'error': 'Item not found.'}, status=404)
@@ -38,8 +40,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_protect
-from django.db.models import Count, Q, Sum
-from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from django.conf import settings
 
 if not settings.DEBUG:
@@ -50,16 +51,28 @@ else:
             return func
         return decorator
 
-import cloudinary
-import cloudinary.uploader
-
-from .models import Item, Notification, Claim, ItemTimeline, LocationHistory, QRCode, ContentModeration, DisputeResolution
+from .models import Item, Claim, ItemTimeline, LocationHistory, QRCode, ContentModeration, DisputeResolution
 from .forms import ItemForm
-from .claim_utils import create_claim, reveal_contact, mark_notification_read
-from .karma_utils import award_karma_points, get_leaderboard, get_user_karma, get_user_rank
-from .qr_utils import generate_qr_code, validate_qr_code
+from .claim_utils import (
+    create_claim, reveal_contact, mark_notification_read, accept_pending_claim, reject_pending_claim,
+    return_item_by_code, mark_claim_returned, resolve_claim_dispute, ClaimTransitionError,
+)
+from .karma_utils import get_leaderboard, leaderboard_totals, rank_for_karma
+from .qr_utils import generate_qr_code
 from .security_utils import sanitize_title, sanitize_description, sanitize_location, sanitize_ai_tags
-from .location_utils import get_nearby_items
+from .location_utils import get_nearby_item_distances, load_nearby_items, NEARBY_PAGE_SIZE
+from .search_utils import search_items
+from .jobs import enqueue_ai_tagging, enqueue_image_processing, enqueue_item_matching, enqueue_email
+from .image_utils import store_upload, publish_upload, compute_image_phash, InvalidImageUpload
+from .duplicate_utils import flag_possible_duplicates
+from .notification_utils import get_unread_count, mark_notifications_read, notification_page
+from .event_utils import (
+    notification_events, latest_notification_id, parse_event_id, format_sse, collect_updates, parse_update_cursor,
+    SSE_POLL_SECONDS, SSE_HEARTBEAT_SECONDS, SSE_MAX_STREAM_SECONDS, SSE_RETRY_MILLISECONDS,
+)
+from .cache_utils import cached, ITEMS_NAMESPACE, LEADERBOARD_NAMESPACE
+from .stats_utils import hero_stats, gallery_counts
+from .query_utils import filter_created_between, gallery_items
 from accounts.models import UserProfile
 
 
@@ -77,25 +90,16 @@ def dashboard(request):
     quick_filter = request.GET.get('quick', '')
     
     if search_query:
-        from django.db.models import Q
-        items_list = items_list.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(ai_tags__icontains=search_query)
-        )
+        items_list = search_items(items_list, search_query)
     
     if category_filter:
         items_list = items_list.filter(category=category_filter)
     if status_filter:
         items_list = items_list.filter(status=status_filter)
-    if date_from:
-        items_list = items_list.filter(created_at__date__gte=date_from)
-    if date_to:
-        items_list = items_list.filter(created_at__date__lte=date_to)
+    items_list = filter_created_between(items_list, date_from, date_to)
     if tags_filter:
         tags_list = [tag.strip().lower() for tag in tags_filter.split(',') if tag.strip()]
         if tags_list:
-            from django.db.models import Q
             tag_queries = Q()
             for tag in tags_list:
                 tag_queries |= Q(ai_tags__icontains=tag)
@@ -110,6 +114,8 @@ def dashboard(request):
         items_list = items_list.order_by('category')
     elif sort_by == 'oldest':
         items_list = items_list.order_by('created_at')
+    elif search_query and 'sort' not in request.GET:
+        items_list = items_list.order_by('-search_rank', '-created_at')
     else:
         items_list = items_list.order_by('-created_at')
 
@@ -126,10 +132,6 @@ def dashboard(request):
 
     # Only show the 9 most recent items, no pagination
     items = items_list
-    # Stats for hero section
-    total_items = Item.objects.count()
-    returned_items = Item.objects.filter(status='returned').count()
-    active_users = User.objects.filter(is_active=True).count()
     context = {
         'items': items,
         'search_query': search_query,
@@ -140,16 +142,11 @@ def dashboard(request):
         'tags_filter': tags_filter,
         'sort_by': sort_by,
         'quick_filter': quick_filter,
-        'total_items': total_items,
-        'returned_items': returned_items,
-        'active_users': active_users,
+        **hero_stats(),
     }
     
     if request.user.is_authenticated:
-        context['unread_notifications'] = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
+        context['unread_notifications'] = get_unread_count(request.user)
     
     return render(request, 'items/dashboard.html', context)
 
@@ -171,61 +168,31 @@ def report_item(request):
             item.item_type = form.cleaned_data['item_type']
             item.user = request.user
 
-            temp_image_path = None
             try:
-                temp_image_path = save_temp_image(image_file)
-
                 category = form.cleaned_data.get('category') or 'other'
                 manual_tags = form.cleaned_data.get('manual_tags', '')
                 ai_tags = [tag.strip() for tag in manual_tags.split(',') if tag.strip()] if manual_tags else []
 
-                # Upload image
-                try:
-                    cloudinary_result = cloudinary.uploader.upload(temp_image_path)
-                    image_url = cloudinary_result.get('secure_url')
-                    if not image_url:
-                        # Cloudinary failed, save locally
-                        import uuid
-                        from django.conf import settings
-                        from pathlib import Path
-
-                        media_dir = Path(settings.MEDIA_ROOT) / 'items'
-                        media_dir.mkdir(parents=True, exist_ok=True)
-                        file_extension = Path(temp_image_path).suffix
-                        unique_filename = f"{uuid.uuid4()}{file_extension}"
-                        local_path = media_dir / unique_filename
-
-                        import shutil
-                        shutil.copy2(temp_image_path, local_path)
-                        image_url = f"{settings.MEDIA_URL}items/{unique_filename}"
-
-                        messages.warning(request, 'Image upload to cloud failed. Image saved locally.', extra_tags='warning')
-                except Exception as e:
-                    # Cloudinary failed, save locally
-                    import uuid
-                    from django.conf import settings
-                    from pathlib import Path
-
-                    media_dir = Path(settings.MEDIA_ROOT) / 'items'
-                    media_dir.mkdir(parents=True, exist_ok=True)
-                    file_extension = Path(temp_image_path).suffix
-                    unique_filename = f"{uuid.uuid4()}{file_extension}"
-                    local_path = media_dir / unique_filename
-
-                    import shutil
-                    shutil.copy2(temp_image_path, local_path)
-                    image_url = f"{settings.MEDIA_URL}items/{unique_filename}"
-
-                    messages.warning(request, 'Image upload to cloud failed. Image saved locally.', extra_tags='warning')
+                # Hashed from the local copy, then published where the worker (and
+                # visitors) can read it; see publish_upload
+                image_url, _ = store_upload(image_file)
 
-                item.image_url = image_url
+                item.image_phash = compute_image_phash(image_url)
+                item.image_url = publish_upload(image_url)
                 item.category = category
                 item.title = sanitize_title(item.title)
                 item.description = sanitize_description(item.description)
                 item.location = sanitize_location(item.location)
                 item.ai_tags = sanitize_ai_tags(ai_tags)
                 item.save()
+                enqueue_image_processing(item)
+                # Tags (and the category, if none was chosen) are filled in by the worker
+                enqueue_ai_tagging(item, set_category=not form.cleaned_data.get('category'))
+                enqueue_item_matching(item)
                 
+                duplicates = flag_possible_duplicates(item)
+                if duplicates:
+                    messages.warning(request, f'This looks like an item that was already reported: "{html.unescape(duplicates[0].title)}". A moderator will review it.', extra_tags='warning')
                 messages.success(request, 'Item reported successfully!', extra_tags='success')
                 # Redirect to correct gallery based on item_type
                 if item.item_type == 'lost':
@@ -233,16 +200,12 @@ def report_item(request):
                 else:
                     return redirect('items:found_items_gallery')
             
+            except InvalidImageUpload as e:
+                messages.error(request, str(e), extra_tags='error')
+                return render(request, 'items/report_item.html', {'form': form})
             except Exception as e:
                 messages.error(request, f'An unexpected error occurred: {str(e)}', extra_tags='error')
                 return render(request, 'items/report_item.html', {'form': form})
-            
-            finally:
-                if temp_image_path and os.path.exists(temp_image_path):
-                    try:
-                        os.remove(temp_image_path)
-                    except:
-                        pass
         else:
             # Log form errors for debugging
             try:
@@ -261,17 +224,6 @@ def report_item(request):
     return render(request, 'items/report_item.html', {'form': form})
 
 
-def save_temp_image(image_file):
-    temp_dir = tempfile.gettempdir()
-    temp_path = os.path.join(temp_dir, image_file.name)
-    
-    with open(temp_path, 'wb') as f:
-        for chunk in image_file.chunks():
-            f.write(chunk)
-    
-    return temp_path
-
-
 @login_required(login_url='accounts:login')
 @require_http_methods(['POST'])
 @ratelimit(key='user', rate='10/h', method='POST')
@@ -305,13 +257,16 @@ def claim_item(request):
 
 @login_required(login_url='accounts:login')
 def notifications(request):
-    user_notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
+    cursor = request.GET.get('before')
+    user_notifications, next_cursor = notification_page(request.user, cursor)
     
-    unread_count = user_notifications.filter(is_read=False).count()
+    unread_count = get_unread_count(request.user)
     
     return render(request, 'items/notifications.html', {
         'notifications': user_notifications,
         'unread_count': unread_count,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     })
 
 
@@ -338,73 +293,14 @@ def reveal_contact_view(request, notification_id):
 @csrf_protect
 def accept_claim(request, claim_id):
     try:
-        claim = get_object_or_404(Claim, id=claim_id)
-        
-        if claim.item.user != request.user:
-            return JsonResponse({'error': 'Not authorized'}, status=403)
-        
-        if claim.status != 'pending':
-            return JsonResponse({'error': 'Claim already processed'}, status=400)
-        
-        claim.status = 'accepted'
-        claim.accepted_at = datetime.now()
-        claim.save()
-        
-        # Update item status to claimed
-        claim.item.status = 'claimed'
-        claim.item.save()
-        
-        # Create notification for claimer
-        notification_message = (
-            f"Great news! Your claim on \"{claim.item.title}\" has been accepted. "
-            f"The owner has revealed their contact information. Please arrange pickup soon."
-        )
-        
-        Notification.objects.create(
-            recipient=claim.claimer,
-            claim=claim,
-            message=notification_message
-        )
-        
-        # Send email to claimer
-        try:
-            subject = f'Your claim has been accepted - {claim.item.title}'
-            body = f"""
-Hello {claim.claimer.username},
-
-Great news! Your claim on "{claim.item.title}" has been accepted by the owner.
-
-Owner Contact Information:
-Email: {claim.item.user.email}
-Name: {claim.item.user.first_name} {claim.item.user.last_name or claim.item.user.username}
-
-Please contact the owner to arrange pickup of your item.
-
-Best regards,
-Campus Lost & Found Team
-            """
-            send_mail(
-                subject,
-                body,
-                settings.DEFAULT_FROM_EMAIL,
-                [claim.claimer.email],
-                fail_silently=True
-            )
-        except Exception as e:
-            pass
-        
-        ItemTimeline.objects.create(
-            item=claim.item,
-            status='claimed',
-            changed_by=request.user,
-            notes=f'Claim accepted by owner {request.user.username}'
-        )
-        
+        accept_pending_claim(claim_id, request.user)
         return JsonResponse({
             'success': True,
             'message': 'Claim accepted! The claimer has been notified.'
         })
-    
+
+    except ClaimTransitionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return JsonResponse({'error': f'Failed to accept claim: {str(e)}'}, status=500)
 
@@ -415,50 +311,28 @@ Campus Lost & Found Team
 @csrf_protect
 def reject_claim(request, claim_id):
     try:
-        claim = get_object_or_404(Claim, id=claim_id)
-        
-        if claim.item.user != request.user:
-            return JsonResponse({'error': 'Not authorized'}, status=403)
-        
-        if claim.status != 'pending':
-            return JsonResponse({'error': 'Claim already processed'}, status=400)
-        
-        claim.status = 'rejected'
-        claim.rejected_at = datetime.now()
-        claim.save()
-        
-        # Reset item status to reported so others can claim
-        claim.item.status = 'reported'
-        claim.item.save()
-        
-        # Create notification for claimer
-        notification_message = (
-            f"We're sorry, but your claim on \"{claim.item.title}\" was not accepted by the owner. "
-            f"You may try claiming other items or contact support if you believe this was an error."
-        )
-        
-        Notification.objects.create(
-            recipient=claim.claimer,
-            claim=claim,
-            message=notification_message
-        )
-        
-        ItemTimeline.objects.create(
-            item=claim.item,
-            status='reported',
-            changed_by=request.user,
-            notes=f'Claim rejected by owner {request.user.username}'
-        )
-        
+        reject_pending_claim(claim_id, request.user)
         return JsonResponse({
             'success': True,
             'message': 'Claim rejected. The item is now available for other claims.'
         })
-    
+
+    except ClaimTransitionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return JsonResponse({'error': f'Failed to reject claim: {str(e)}'}, status=500)
 
 
+@login_required(login_url='accounts:login')
+@require_http_methods(['POST'])
+def mark_all_notifications_read_view(request):
+    try:
+        marked = mark_notifications_read(request.user.id)
+        return JsonResponse({'success': True, 'marked': marked})
+    except Exception as e:
+        return JsonResponse({'error': f'Failed to mark as read: {str(e)}'}, status=500)
+
+
 @login_required(login_url='accounts:login')
 @require_http_methods(['POST'])
 def mark_notification_read_view(request, notification_id):
@@ -475,20 +349,16 @@ def mark_notification_read_view(request, notification_id):
 
 
 def leaderboard(request):
-    leaderboard_users = get_leaderboard(limit=20)
-
     context = {
-        'leaderboard': leaderboard_users,
-        'total_participants': UserProfile.objects.filter(karma_points__gt=0).count(),
-        'total_items_returned': UserProfile.objects.aggregate(total=Sum('total_items_returned'))['total'] or 0,
-        'total_karma_points': UserProfile.objects.aggregate(total=Sum('karma_points'))['total'] or 0,
+        'leaderboard': cached(LEADERBOARD_NAMESPACE, 'top', lambda: list(get_leaderboard(limit=20))),
+        **leaderboard_totals(),
     }
 
     if request.user.is_authenticated:
         try:
             user_profile = UserProfile.objects.get(user=request.user)
             context['user_karma'] = user_profile.karma_points
-            context['user_rank'] = get_user_rank(request.user)
+            context['user_rank'] = rank_for_karma(user_profile.karma_points)
             context['user_items_returned'] = user_profile.total_items_returned
         except UserProfile.DoesNotExist:
             context['user_karma'] = 0
@@ -499,13 +369,13 @@ def leaderboard(request):
 
 
 def item_detail(request, item_id):
-    item = get_object_or_404(Item, id=item_id)
+    item = get_object_or_404(Item.objects.select_related('user', 'claim__claimer'), id=item_id)
     timeline = item.timeline.all()
     claim = None
     claims_history = []
 
     from items.models import Claim
-    claims_history = Claim.objects.filter(item=item).order_by('-claimed_at')
+    claims_history = Claim.objects.filter(item=item).select_related('claimer').order_by('-claimed_at')
     if hasattr(item, 'claim'):
         claim = item.claim
 
@@ -560,35 +430,7 @@ def verify_qr_code(request):
         if not qr_code_id:
             return JsonResponse({'error': 'QR code required'}, status=400)
         
-        qr_code = validate_qr_code(qr_code_id)
-        
-        if not qr_code:
-            return JsonResponse({'error': 'Invalid QR code'}, status=400)
-        
-        if qr_code.scanned:
-            return JsonResponse({'error': 'QR code already scanned'}, status=400)
-        
-        claim = qr_code.claim
-        item = claim.item
-        
-        qr_code.scanned = True
-        qr_code.scanned_at = datetime.now()
-        qr_code.save()
-        
-        item.status = 'returned'
-        item.save()
-        
-        claim.verified_at = datetime.now()
-        claim.save()
-        
-        ItemTimeline.objects.create(
-            item=item,
-            status='returned',
-            changed_by=claim.claimer,
-            notes='Item returned - QR code scanned'
-        )
-        
-        award_karma_points(claim.claimer)
+        item = return_item_by_code(qr_code_id)
         
         return JsonResponse({
             'success': True,
@@ -596,6 +438,8 @@ def verify_qr_code(request):
             'item_title': item.title
         })
     
+    except ClaimTransitionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return JsonResponse({'error': f'Failed to verify QR code: {str(e)}'}, status=500)
 
@@ -623,7 +467,13 @@ def search_nearby_items(request):
         if radius < 0.1 or radius > 50:
             radius = 5
         
-        nearby = get_nearby_items(latitude, longitude, radius)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return JsonResponse({'error': 'Invalid coordinates'}, status=400)
+        
+        from django.core.paginator import Paginator
+        matches = get_nearby_item_distances(latitude, longitude, radius)
+        page_obj = Paginator(matches, NEARBY_PAGE_SIZE).get_page(data.get('page'))
+        nearby = load_nearby_items(page_obj.object_list)
         
         items_data = [{
             'id': item_obj['item'].id,
@@ -639,6 +489,9 @@ def search_nearby_items(request):
         return JsonResponse({
             'success': True,
             'count': len(items_data),
+            'total': page_obj.paginator.count,
+            'page': page_obj.number,
+            'has_next': page_obj.has_next(),
             'radius': radius,
             'items': items_data
         })
@@ -650,44 +503,24 @@ def search_nearby_items(request):
 @login_required(login_url='accounts:login')
 def mark_item_returned(request, item_id):
     try:
-        item = get_object_or_404(Item, id=item_id)
-        
-        if item.user != request.user:
-            return JsonResponse({'error': 'Not authorized'}, status=403)
-        
-        if not hasattr(item, 'claim'):
-            return JsonResponse({'error': 'Item has no claim'}, status=400)
-        
-        claim = item.claim
-        item.status = 'returned'
-        item.save()
-        
-        claim.verified_at = datetime.now()
-        claim.save()
-        
-        ItemTimeline.objects.create(
-            item=item,
-            status='returned',
-            changed_by=request.user,
-            notes='Item marked as returned by owner'
-        )
-        
-        award_karma_points(claim.claimer)
+        mark_claim_returned(item_id, request.user)
         
         return JsonResponse({
             'success': True,
             'message': 'Item marked as returned and karma awarded!'
         })
     
+    except ClaimTransitionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return JsonResponse({'error': f'Failed to mark item as returned: {str(e)}'}, status=500)
 
 
 @staff_member_required
 def admin_heatmap(request):
-    location_data = LocationHistory.objects.values('location_name', 'latitude', 'longitude').annotate(
+    location_data = list(LocationHistory.objects.values('location_name', 'latitude', 'longitude').annotate(
         count=Count('id')
-    ).order_by('-count')
+    ).order_by('-count'))
     
     heatmap_data = [{
         'location': loc['location_name'],
@@ -704,11 +537,25 @@ def admin_heatmap(request):
     return render(request, 'items/admin_heatmap.html', context)
 
 
+def _gallery_page(items, page_number, cache_name=None):
+    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+    paginator = Paginator(items, 12)  # 12 items per page
+    if cache_name:
+        paginator.count = cached(ITEMS_NAMESPACE, f'{cache_name}:count', items.count)
+    try:
+        page_obj = paginator.page(page_number)
+    except PageNotAnInteger:
+        page_obj = paginator.page(1)
+    except EmptyPage:
+        page_obj = paginator.page(paginator.num_pages)
+    if cache_name:
+        object_list = page_obj.object_list
+        page_obj.object_list = cached(ITEMS_NAMESPACE, f'{cache_name}:page:{page_obj.number}', lambda: list(object_list))
+    return page_obj
+
+
 def found_items_gallery(request):
-    total_items = Item.objects.filter(item_type='found').count()
-    available_items = Item.objects.filter(item_type='found', status='reported').count()
-    claimed_items = Item.objects.filter(item_type='found', status='claimed').count()
-    items = Item.objects.filter(item_type='found').exclude(status='returned').order_by('-created_at')
+    items = gallery_items('found')
     
     search_query = request.GET.get('search', '')
     category_filter = request.GET.get('category', '')
@@ -716,29 +563,16 @@ def found_items_gallery(request):
     date_to = request.GET.get('date_to', '')
 
     if search_query:
-        items = items.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(ai_tags__icontains=search_query)
-        )
+        items = search_items(items, search_query).order_by('-search_rank', '-created_at')
 
     if category_filter:
         items = items.filter(category=category_filter)
 
-    if date_from:
-        items = items.filter(created_at__date__gte=date_from)
-    if date_to:
-        items = items.filter(created_at__date__lte=date_to)
+    items = filter_created_between(items, date_from, date_to)
     
-    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-    paginator = Paginator(items, 12)  # 12 items per page
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    # Unfiltered pages are the same for every visitor, so they come from the cache
+    filtered = search_query or category_filter or date_from or date_to
+    page_obj = _gallery_page(items, request.GET.get('page'), None if filtered else 'gallery:found')
 
     context = {
         'items': page_obj.object_list,
@@ -751,18 +585,13 @@ def found_items_gallery(request):
         'category_filter': category_filter,
         'date_from': date_from,
         'date_to': date_to,
-        'total_items': total_items,
-        'available_items': available_items,
-        'claimed_items': claimed_items,
+        **gallery_counts('found'),
     }
     return render(request, 'items/items_gallery.html', context)
 
 
 def lost_items_gallery(request):
-    total_items = Item.objects.filter(item_type='lost').count()
-    available_items = Item.objects.filter(item_type='lost', status='reported').count()
-    claimed_items = Item.objects.filter(item_type='lost', status='claimed').count()
-    items = Item.objects.filter(item_type='lost').exclude(status='returned').order_by('-created_at')
+    items = gallery_items('lost')
     
     search_query = request.GET.get('search', '')
     category_filter = request.GET.get('category', '')
@@ -770,29 +599,16 @@ def lost_items_gallery(request):
     date_to = request.GET.get('date_to', '')
 
     if search_query:
-        items = items.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(ai_tags__icontains=search_query)
-        )
+        items = search_items(items, search_query).order_by('-search_rank', '-created_at')
 
     if category_filter:
         items = items.filter(category=category_filter)
 
-    if date_from:
-        items = items.filter(created_at__date__gte=date_from)
-    if date_to:
-        items = items.filter(created_at__date__lte=date_to)
+    items = filter_created_between(items, date_from, date_to)
     
-    from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-    paginator = Paginator(items, 12)  # 12 items per page
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    # Unfiltered pages are the same for every visitor, so they come from the cache
+    filtered = search_query or category_filter or date_from or date_to
+    page_obj = _gallery_page(items, request.GET.get('page'), None if filtered else 'gallery:lost')
 
     context = {
         'items': page_obj.object_list,
@@ -805,15 +621,10 @@ def lost_items_gallery(request):
         'category_filter': category_filter,
         'date_from': date_from,
         'date_to': date_to,
-        'total_items': total_items,
-        'available_items': available_items,
-        'claimed_items': claimed_items,
+        **gallery_counts('lost'),
     }
     if request.user.is_authenticated:
-        context['unread_notifications'] = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
+        context['unread_notifications'] = get_unread_count(request.user)
     return render(request, 'items/items_gallery.html', context)
 
 
@@ -837,41 +648,16 @@ def edit_item(request, item_id):
             # Handle image update if provided
             image_file = request.FILES.get('image')
             if image_file:
-                temp_image_path = None
                 try:
-                    temp_image_path = save_temp_image(image_file)
-                    
-                    # Try uploading to Cloudinary first
-                    try:
-                        cloudinary_result = cloudinary.uploader.upload(temp_image_path)
-                        image_url = cloudinary_result.get('secure_url')
-                        if not image_url:
-                            raise Exception("Cloudinary upload failed")
-                        item.image_url = image_url
-                    except Exception as e:
-                        # Fallback to local storage
-                        import uuid
-                        from django.conf import settings
-                        from pathlib import Path
-                        
-                        media_dir = Path(settings.MEDIA_ROOT) / 'items'
-                        media_dir.mkdir(parents=True, exist_ok=True)
-                        file_extension = Path(temp_image_path).suffix
-                        unique_filename = f"{uuid.uuid4()}{file_extension}"
-                        local_path = media_dir / unique_filename
-                        
-                        import shutil
-                        shutil.copy2(temp_image_path, local_path)
-                        item.image_url = f"{settings.MEDIA_URL}items/{unique_filename}"
-                        
-                        messages.warning(request, 'Image upload to cloud failed. Image saved locally.', extra_tags='warning')
-                
-                finally:
-                    if temp_image_path and os.path.exists(temp_image_path):
-                        try:
-                            os.remove(temp_image_path)
-                        except:
-                            pass
+                    image_url, _ = store_upload(image_file)
+                    item.image_phash = compute_image_phash(image_url)
+                    item.image_url = publish_upload(image_url)
+                except InvalidImageUpload as e:
+                    messages.error(request, str(e), extra_tags='error')
+                    return render(request, 'items/edit_item.html', {'form': form, 'item': item})
+                except Exception as e:
+                    messages.error(request, f'Image upload failed: {str(e)}', extra_tags='error')
+                    return render(request, 'items/edit_item.html', {'form': form, 'item': item})
             
             item.title = sanitize_title(form.cleaned_data.get('title'))
             item.description = sanitize_description(form.cleaned_data.get('description'))
@@ -886,6 +672,11 @@ def edit_item(request, item_id):
                 item.ai_tags = sanitize_ai_tags(list(set(existing_ai_tags + manual_tags_list)))
             
             item.save()
+            if image_file:
+                enqueue_image_processing(item)
+                enqueue_ai_tagging(item)
+                flag_possible_duplicates(item)
+            enqueue_item_matching(item)
             
             # Create timeline entry
             ItemTimeline.objects.create(
@@ -917,48 +708,76 @@ def edit_item(request, item_id):
 
 
 @login_required(login_url='accounts:login')
-@require_http_methods(['POST'])
+@require_http_methods(['GET', 'POST'])
 @csrf_protect
 def get_updates(request):
     try:
-        last_update_time = request.POST.get('last_update_time', '')
-        
-        updates = {
-            'new_claims': 0,
-            'claim_updates': [],
-            'new_notifications': 0,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        user_items = Item.objects.filter(user=request.user)
-        new_claims = Claim.objects.filter(
-            item__in=user_items,
-            status='pending'
-        ).select_related('claimer', 'item')
-        
-        updates['new_claims'] = new_claims.count()
-        
-        for claim in new_claims[:5]:
-            updates['claim_updates'].append({
-                'id': claim.id,
-                'item_title': claim.item.title,
-                'claimer': claim.claimer.username,
-                'claimed_at': claim.claimed_at.isoformat(),
-                'status': claim.status
-            })
-        
-        new_notifications = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
-        
-        updates['new_notifications'] = new_notifications
-        
-        return JsonResponse(updates)
+        params = request.POST if request.method == 'POST' else request.GET
+        cursor = params.get('last_update_time', '')
+        since = parse_update_cursor(cursor)
+        if cursor and since is None:
+            return JsonResponse({'error': 'Invalid last_update_time cursor'}, status=400)
+        updates = collect_updates(request.user, since)
+
+        # Same cursor and no new rows gives the same body, so the ETag lets idle polls end in a 304
+        etag = quote_etag(hashlib.md5(json.dumps(updates, sort_keys=True).encode()).hexdigest())
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(updates)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _stream_user(request):
+    return request.user if request.user.is_authenticated else None
+
+
+async def notification_stream(request):
+    # Server-sent events for new claim/match notifications, served by the ASGI
+    # `stream` process. Under the WSGI site an open stream would pin a worker for
+    # SSE_MAX_STREAM_SECONDS, so it answers 204, which tells EventSource not to reconnect.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    cursor = parse_event_id(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    if cursor is None:
+        cursor = await sync_to_async(latest_notification_id, thread_sensitive=False)(user.id)
+
+    async def events():
+        nonlocal cursor
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SSE_MAX_STREAM_SECONDS
+        last_sent = loop.time()
+        yield f'retry: {SSE_RETRY_MILLISECONDS}\n\n'
+
+        while loop.time() < deadline:
+            # Off the shared thread-sensitive executor, so open streams poll in parallel
+            batch = await sync_to_async(notification_events, thread_sensitive=False)(user.id, cursor)
+            for event_id, event, data in batch:
+                yield format_sse(data, event=event, event_id=event_id)
+                cursor = event_id
+            if batch:
+                yield format_sse({'count': await sync_to_async(get_unread_count, thread_sensitive=False)(user)}, event='unread')
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= SSE_HEARTBEAT_SECONDS:
+                yield ': keep-alive\n\n'
+                last_sent = loop.time()
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @staff_member_required
 def admin_moderation(request):
     pending_flags = ContentModeration.objects.filter(
@@ -967,11 +786,11 @@ def admin_moderation(request):
     
     approved_flags = ContentModeration.objects.filter(
         status='approved'
-    ).select_related('item', 'claim').order_by('-reviewed_at')[:10]
+    ).select_related('item', 'claim', 'reviewed_by').order_by('-reviewed_at')[:10]
     
     rejected_flags = ContentModeration.objects.filter(
         status='rejected'
-    ).select_related('item', 'claim').order_by('-reviewed_at')[:10]
+    ).select_related('item', 'claim', 'reviewed_by').order_by('-reviewed_at')[:10]
     
     stats = {
         'total_pending': pending_flags.count(),
@@ -1095,15 +914,15 @@ def handle_moderation(request):
 def disputes_dashboard(request):
     open_disputes = DisputeResolution.objects.filter(
         status='open'
-    ).select_related('claim', 'reporter', 'claimer').order_by('-created_at')
+    ).select_related('claim__item', 'reporter', 'claimer').order_by('-created_at')
     
     in_progress = DisputeResolution.objects.filter(
         status='in_progress'
-    ).select_related('claim', 'reporter', 'claimer').order_by('-created_at')[:10]
+    ).select_related('claim__item', 'reporter', 'claimer').order_by('-created_at')[:10]
     
     resolved = DisputeResolution.objects.filter(
         status='resolved'
-    ).select_related('claim', 'reporter', 'claimer').order_by('-resolved_at')[:10]
+    ).select_related('claim__item', 'reporter', 'claimer').order_by('-resolved_at')[:10]
     
     stats = {
         'total_open': open_disputes.count(),
@@ -1175,45 +994,18 @@ def resolve_dispute(request):
         resolution = request.POST.get('resolution')
         admin_notes = request.POST.get('admin_notes', '').strip()
         
-        dispute = DisputeResolution.objects.get(id=dispute_id)
-        
         valid_resolutions = ['favor_claimer', 'favor_reporter', 'mutual_agreement', 'no_resolution']
         if resolution not in valid_resolutions:
             return JsonResponse({'error': 'Invalid resolution'}, status=400)
         
-        dispute.status = 'resolved'
-        dispute.resolution = resolution
-        dispute.admin_notes = admin_notes
-        dispute.resolved_at = datetime.now()
-        dispute.save()
-        
-        if resolution == 'favor_claimer':
-            claim = dispute.claim
-            claim.status = 'accepted'
-            claim.save()
-            ItemTimeline.objects.create(
-                item=claim.item,
-                status='claimed',
-                changed_by=request.user,
-                notes=f'Dispute resolved in favor of claimer {claim.claimer.username}'
-            )
-        elif resolution == 'favor_reporter':
-            claim = dispute.claim
-            claim.status = 'rejected'
-            claim.save()
-            ItemTimeline.objects.create(
-                item=claim.item,
-                status='reported',
-                changed_by=request.user,
-                notes=f'Dispute resolved in favor of reporter'
-            )
+        resolve_claim_dispute(dispute_id, resolution, admin_notes, request.user)
         
         return JsonResponse({
             'success': True,
             'message': 'Dispute resolved successfully'
         })
-    except DisputeResolution.DoesNotExist:
-        return JsonResponse({'error': 'Dispute not found'}, status=404)
+    except ClaimTransitionError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -1,8 +1,13 @@
 import os
 from decouple import config
 
-# Email (Mailjet HTTP API via Anymail)
-EMAIL_BACKEND = 'anymail.backends.mailjet.EmailBackend'
+# Email (Mailjet HTTP API via Anymail). Mail is queued in the outbox and sent by
+# the worker; set EMAIL_BACKEND to django.core.mail.backends.filebased.EmailBackend
+# (writes to EMAIL_FILE_PATH) or .console.EmailBackend to work offline.
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='anymail.backends.mailjet.EmailBackend')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sent_emails'))
+# Seconds to collect notification emails into one digest per recipient (0 sends each immediately)
+EMAIL_DIGEST_WINDOW = config('EMAIL_DIGEST_WINDOW', default=0, cast=int)
 ANYMAIL = {
     'MAILJET_API_KEY': config('MAILJET_API_KEY', default=''),
     'MAILJET_SECRET_KEY': config('MAILJET_API_SECRET', default=''),
@@ -161,6 +166,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Set when MEDIA_ROOT is on a disk the worker also mounts and /media/ is served
+# (runserver does both in development). Otherwise uploads go to Cloudinary
+# during the request, since neither visitors nor the worker can read this
+# process's MEDIA_ROOT.
+LOCAL_MEDIA_SHARED = config('LOCAL_MEDIA_SHARED', default=DEBUG, cast=bool)
 
 import cloudinary
 cloudinary.config(
@@ -170,6 +180,9 @@ cloudinary.config(
 )
 
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
+# 'gemini' calls the Gemini API from the background worker; 'stub' tags images
+# offline (tests, local development); anything else disables AI tagging.
+AI_TAGGING_BACKEND = config('AI_TAGGING_BACKEND', default='gemini')
 
 CSRF_TRUSTED_ORIGINS = config('CSRF_TRUSTED_ORIGINS', default='http://localhost:8000,http://localhost:3000').split(',')
 CSRF_COOKIE_SECURE = not DEBUG
@@ -194,11 +207,31 @@ SECURE_CONTENT_SECURITY_POLICY = {
     'font-src': ("'self'", "cdn.jsdelivr.net", "data:"),
 }
 
+# Two cache tiers: 'local' is per-process memory for hot fragments, 'default' is
+# shared by every process when REDIS_URL is set. Without Redis it is per-process
+# memory too, and items.cache_utils keeps fragments only as long as the local tier.
+REDIS_URL = config('REDIS_URL', default='')
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lost-found-default',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lost-found-local',
+    },
 }
 
-RATELIMIT_USE_CACHE = 'default'
-RATELIMIT_ENABLE = False
+# Rate limit counters need atomic increments and must not cost a query per
+# request: Redis when available, otherwise per-process memory. Per-process
+# counters multiply every limit by the number of workers, so limits are only
+# on by default when they are shared.
+RATELIMIT_USE_CACHE = 'default' if REDIS_URL else 'local'
+RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=bool(REDIS_URL), cast=bool)
+# Proxies in front of the app (Render's load balancer is one); key='ip' limits
+# use the client address they forward instead of the proxy's own
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0 if DEBUG else 1, cast=int)
+RATELIMIT_IP_META_KEY = 'items.security_utils.client_ip'
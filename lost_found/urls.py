@@ -20,9 +20,10 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
+    # Ahead of the admin site, whose catch-all view would 404 the staff pages under admin/
     path('', include('items.urls')),
+    path('admin/', admin.site.urls),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,295 @@
+import io
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from items import ai_utils
+from items.models import Item, BackgroundJob, AITagResult
+from items.task_queue import register_job, enqueue_job, run_pending_jobs, JOB_HANDLERS, STALE_JOB_TIMEOUT
+from items.jobs import enqueue_ai_tagging, enqueue_image_processing, AI_TAGGING_JOB, IMAGE_PROCESSING_JOB
+
+
+def png_bytes(color=(220, 20, 20)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.AI_TAGGING_BACKEND = 'stub'
+    return tmp_path
+
+
+@pytest.fixture
+def flaky_handler():
+    calls = []
+
+    @register_job('test_flaky')
+    def handler(payload):
+        calls.append(payload)
+        if payload.get('fail'):
+            raise RuntimeError('boom')
+
+    yield calls
+    JOB_HANDLERS.pop('test_flaky', None)
+
+
+@pytest.mark.django_db
+def test_jobs_run_and_complete(flaky_handler):
+    job = enqueue_job('test_flaky', {'n': 1})
+
+    assert run_pending_jobs() == (1, 0)
+    job.refresh_from_db()
+    assert job.status == 'done' and job.attempts == 1
+    assert flaky_handler == [{'n': 1}]
+
+
+@pytest.mark.django_db
+def test_failed_jobs_back_off_then_give_up(flaky_handler):
+    job = enqueue_job('test_flaky', {'fail': True}, max_attempts=2)
+
+    assert run_pending_jobs() == (0, 1)
+    job.refresh_from_db()
+    assert job.status == 'pending' and job.last_error == 'boom'
+    assert job.run_after > timezone.now()
+    # Not due yet, so the worker leaves it alone
+    assert run_pending_jobs() == (0, 0)
+
+    BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+    run_pending_jobs()
+    job.refresh_from_db()
+    assert job.status == 'failed' and job.attempts == 2
+
+
+@pytest.mark.django_db
+def test_stale_jobs_are_reclaimed_until_attempts_run_out(flaky_handler):
+    stale = timezone.now() - STALE_JOB_TIMEOUT - timedelta(minutes=1)
+    retried = enqueue_job('test_flaky', {'n': 1}, max_attempts=2)
+    exhausted = enqueue_job('test_flaky', {'n': 2}, max_attempts=2)
+    BackgroundJob.objects.filter(id=retried.id).update(status='running', attempts=1, updated_at=stale)
+    BackgroundJob.objects.filter(id=exhausted.id).update(status='running', attempts=2, updated_at=stale)
+
+    assert run_pending_jobs() == (1, 0)
+    assert flaky_handler == [{'n': 1}]
+    exhausted.refresh_from_db()
+    assert exhausted.status == 'failed' and exhausted.last_error == 'worker lost'
+
+
+@pytest.mark.django_db
+def test_ai_tagging_job_fills_tags_and_category(media_root):
+    user = User.objects.create_user(username='tagger', password='pass123')
+    (media_root / 'items').mkdir()
+    (media_root / 'items' / 'red.png').write_bytes(png_bytes())
+    item = Item.objects.create(
+        user=user, title='Mystery object', category='other', image_url='/media/items/red.png',
+        location='Library', ai_tags=['mine'],
+    )
+
+    enqueue_ai_tagging(item, set_category=True)
+    assert run_pending_jobs(kinds=[AI_TAGGING_JOB]) == (1, 0)
+
+    item.refresh_from_db()
+    assert item.ai_tags == ['mine', 'red', 'png']
+    assert 'red' in item.search_document
+
+
+@pytest.mark.django_db
+def test_ai_tagging_job_keeps_edits_made_while_it_ran(media_root, monkeypatch):
+    user = User.objects.create_user(username='editor', password='pass123')
+    (media_root / 'items').mkdir()
+    (media_root / 'items' / 'red.png').write_bytes(png_bytes())
+    item = Item.objects.create(
+        user=user, title='Umbrella', category='other', image_url='/media/items/red.png', location='Library',
+    )
+    enqueue_ai_tagging(item, set_category=True)
+
+    real_tag_image_cached = ai_utils.tag_image_cached
+
+    def tag_while_user_edits(image_bytes, mime_type='image/jpeg'):
+        edited = Item.objects.get(id=item.id)
+        edited.title, edited.category, edited.ai_tags = 'Wallet', 'accessories', ['leather']
+        edited.save()
+        return real_tag_image_cached(image_bytes, mime_type)
+    monkeypatch.setattr('items.jobs.tag_image_cached', tag_while_user_edits)
+
+    assert run_pending_jobs(kinds=[AI_TAGGING_JOB]) == (1, 0)
+    item.refresh_from_db()
+    assert item.title == 'Wallet' and item.category == 'accessories'
+    assert item.ai_tags == ['leather', 'red', 'png']
+    assert 'wallet' in item.search_document.lower() and 'umbrella' not in item.search_document.lower()
+
+
+@pytest.mark.django_db
+def test_report_item_enqueues_tagging_without_calling_model(client, media_root, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('model called during request')
+    monkeypatch.setattr('items.jobs.tag_image_cached', fail)
+
+    User.objects.create_user(username='reporter_ai', password='pass123')
+    client.login(username='reporter_ai', password='pass123')
+    response = client.post(reverse('items:report_item'), {
+        'title': 'Red Umbrella',
+        'location': 'Main Gate',
+        'description': 'Found near the gate',
+        'item_type': 'found',
+        'image': SimpleUploadedFile('umbrella.png', png_bytes(), content_type='image/png'),
+    }, secure=True)
+
+    assert response.status_code == 302
+    item = Item.objects.get(title='Red Umbrella')
+    assert item.image_url.startswith('/media/items/')
+    job = BackgroundJob.objects.get(kind=AI_TAGGING_JOB)
+    assert job.payload == {'item_id': item.id, 'set_category': True, 'category': 'other'}
+    assert job.status == 'pending'
+
+
+@pytest.mark.django_db
+def test_tag_cache_skips_model_for_repeated_images(settings, monkeypatch):
+    settings.AI_TAGGING_BACKEND = 'stub'
+    calls = []
+    real_tag_image = ai_utils.tag_image
+
+    def counting_tag_image(image_bytes, mime_type='image/jpeg'):
+        calls.append(mime_type)
+        return real_tag_image(image_bytes, mime_type)
+    monkeypatch.setattr(ai_utils, 'tag_image', counting_tag_image)
+    ai_utils.clear_tag_cache()
+
+    first = ai_utils.tag_image_cached(png_bytes((20, 20, 220)))
+    second = ai_utils.tag_image_cached(png_bytes((20, 20, 220)))
+    assert first['tags'] == second['tags'] == ['blue', 'png']
+    assert second['cached'] and len(calls) == 1
+    assert ai_utils.tag_cache_stats == {'memory_hits': 1, 'db_hits': 0, 'misses': 1}
+    assert ai_utils.flush_tag_cache_hits() == 1
+
+    # A fresh process (empty LRU) is still served from the database
+    ai_utils.clear_tag_cache()
+    assert ai_utils.tag_image_cached(png_bytes((20, 20, 220)))['cached']
+    assert len(calls) == 1 and ai_utils.tag_cache_stats['db_hits'] == 1
+    ai_utils.flush_tag_cache_hits()
+    assert AITagResult.objects.get().hit_count == 2
+
+
+@pytest.mark.django_db
+def test_memory_tag_cache_hits_skip_the_database(settings, django_assert_num_queries):
+    settings.AI_TAGGING_BACKEND = 'stub'
+    ai_utils.clear_tag_cache()
+    ai_utils.tag_image_cached(png_bytes((200, 20, 20)))
+
+    with django_assert_num_queries(0):
+        for _ in range(5):
+            assert ai_utils.tag_image_cached(png_bytes((200, 20, 20)))['cached']
+
+    with django_assert_num_queries(1):
+        assert ai_utils.flush_tag_cache_hits() == 5
+    assert AITagResult.objects.get().hit_count == 5
+
+
+@pytest.mark.django_db
+def test_image_processing_job_swaps_to_remote_urls(media_root, monkeypatch):
+    uploaded = []
+
+    def fake_upload(path):
+        uploaded.append(path.name)
+        return f'https://res.cloudinary.com/demo/image/upload/{path.name}'
+    monkeypatch.setattr('items.jobs.remote_storage_configured', lambda: True)
+    monkeypatch.setattr('items.jobs.upload_to_remote', fake_upload)
+
+    user = User.objects.create_user(username='uploader', password='pass123')
+    (media_root / 'items').mkdir()
+    (media_root / 'items' / 'local.png').write_bytes(png_bytes())
+    item = Item.objects.create(
+        user=user, title='Scarf', category='clothing', image_url='/media/items/local.png', location='Gym',
+    )
+
+    enqueue_image_processing(item)
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (1, 0)
+
+    item.refresh_from_db()
+    assert item.image_url == 'https://res.cloudinary.com/demo/image/upload/local.png'
+    assert item.thumbnail_url.startswith('https://res.cloudinary.com/demo/image/upload/')
+    assert 'local.png' in uploaded and len(uploaded) == 3
+    # Local original and thumbnails are gone once the item points at Cloudinary
+    assert not (media_root / 'items' / 'local.png').exists()
+    assert not any((media_root / 'items' / 'variants').iterdir())
+
+
+@pytest.mark.django_db
+def test_image_processing_job_reads_remote_originals(media_root, monkeypatch):
+    monkeypatch.setattr('items.jobs.remote_storage_configured', lambda: True)
+    monkeypatch.setattr('items.jobs.upload_to_remote', lambda path: f'https://res.cloudinary.com/demo/{path.name}')
+    monkeypatch.setattr('items.jobs.load_image_bytes', lambda url: png_bytes())
+
+    user = User.objects.create_user(username='remote_first', password='pass123')
+    item = Item.objects.create(
+        user=user, title='Cap', category='clothing', image_url='https://res.cloudinary.com/demo/cap.png', location='Gym',
+    )
+
+    enqueue_image_processing(item)
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (1, 0)
+
+    item.refresh_from_db()
+    assert item.image_url == 'https://res.cloudinary.com/demo/cap.png'
+    assert item.thumbnail_url.startswith('https://res.cloudinary.com/demo/')
+    assert item.image_phash is not None
+    assert not any((media_root / 'items' / 'variants').iterdir())
+
+
+@pytest.mark.django_db
+def test_image_processing_job_keeps_files_shared_with_other_items(media_root, monkeypatch):
+    monkeypatch.setattr('items.jobs.remote_storage_configured', lambda: True)
+    monkeypatch.setattr('items.jobs.upload_to_remote', lambda path: f'https://res.cloudinary.com/demo/{path.name}')
+
+    user = User.objects.create_user(username='twin', password='pass123')
+    (media_root / 'items').mkdir()
+    (media_root / 'items' / 'shared.png').write_bytes(png_bytes())
+    first = Item.objects.create(
+        user=user, title='Glove', category='clothing', image_url='/media/items/shared.png', location='Gym',
+    )
+    second = Item.objects.create(
+        user=user, title='Glove', category='clothing', image_url='/media/items/shared.png', location='Gym',
+    )
+
+    enqueue_image_processing(first)
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (1, 0)
+    assert (media_root / 'items' / 'shared.png').exists()
+
+    enqueue_image_processing(second)
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (1, 0)
+    assert not (media_root / 'items' / 'shared.png').exists()
+
+
+@pytest.mark.django_db
+def test_image_processing_job_fails_fast_without_shared_media(media_root):
+    user = User.objects.create_user(username='elsewhere', password='pass123')
+    item = Item.objects.create(
+        user=user, title='Mug', category='other', image_url='/media/items/missing.png', location='Cafe',
+    )
+    job = enqueue_image_processing(item)
+
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (0, 1)
+    job.refresh_from_db()
+    assert job.status == 'failed' and job.attempts == 1
+    assert 'MEDIA_ROOT' in job.last_error
+
+
+@pytest.mark.django_db
+def test_image_processing_job_skips_replaced_images(media_root, monkeypatch):
+    monkeypatch.setattr('items.jobs.remote_storage_configured', lambda: True)
+    monkeypatch.setattr('items.jobs.upload_to_remote', lambda path: pytest.fail('uploaded stale image'))
+
+    user = User.objects.create_user(username='replacer', password='pass123')
+    item = Item.objects.create(
+        user=user, title='Hat', category='clothing', image_url='/media/items/old.png', location='Gym',
+    )
+    enqueue_image_processing(item)
+    Item.objects.filter(id=item.id).update(image_url='/media/items/new.png')
+
+    assert run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB]) == (1, 0)
+    item.refresh_from_db()
+    assert item.image_url == '/media/items/new.png'
@@ -0,0 +1,133 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory
+from django.urls import reverse
+from items.models import Item, Claim
+from items.cache_utils import (
+    cached, invalidate, cache_generation, shared_timeout, ITEMS_NAMESPACE, LOCAL_CACHE_SECONDS, SHARED_CACHE_SECONDS,
+)
+from items.karma_utils import award_karma_points
+from items.security_utils import client_ip
+
+
+def make_item(user, title='Wallet', item_type='found', status='reported'):
+    return Item.objects.create(user=user, title=title, category='wallet', item_type=item_type, status=status,
+                               image_url='/media/items/x.png', location='Library')
+
+
+# Invalidation happens on commit, so these run outside a test transaction
+@pytest.mark.django_db(transaction=True)
+def test_cached_reads_local_then_shared_tier():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'value': len(calls)}
+
+    assert cached('test', 'thing', compute) == {'value': 1}
+    assert cached('test', 'thing', compute) == {'value': 1}
+    caches['local'].clear()
+    assert cached('test', 'thing', compute) == {'value': 1}
+    assert len(calls) == 1
+
+    invalidate('test')
+    assert cached('test', 'thing', compute) == {'value': 2}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_invalidation_reaches_other_processes():
+    generation = cache_generation('test')
+    invalidate('test')
+    # Another process still holding the old generation locally picks up the new one once it expires
+    caches['local'].clear()
+    assert cache_generation('test') != generation
+
+
+def test_per_process_default_cache_keeps_fragments_briefly(settings):
+    assert shared_timeout(SHARED_CACHE_SECONDS) == LOCAL_CACHE_SECONDS
+    settings.CACHES = {**settings.CACHES, 'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+    assert shared_timeout(SHARED_CACHE_SECONDS) == SHARED_CACHE_SECONDS
+
+
+@pytest.mark.django_db
+def test_invalidation_waits_for_commit(django_capture_on_commit_callbacks):
+    generation = cache_generation('test')
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate('test')
+        # A reader before the commit still sees, and caches under, the old generation
+        assert cache_generation('test') == generation
+    caches['local'].clear()
+    assert cache_generation('test') != generation
+
+
+@pytest.mark.django_db(transaction=True)
+def test_item_and_claim_saves_invalidate_fragments():
+    owner = User.objects.create_user(username='cache_owner', password='pass123')
+    item = make_item(owner)
+    generation = cache_generation(ITEMS_NAMESPACE)
+
+    Claim.objects.create(item=item, claimer=User.objects.create_user(username='cache_claimer', password='pass123'))
+    assert cache_generation(ITEMS_NAMESPACE) != generation
+
+    generation = cache_generation(ITEMS_NAMESPACE)
+    item.status = 'claimed'
+    item.save()
+    assert cache_generation(ITEMS_NAMESPACE) != generation
+
+
+@pytest.mark.django_db(transaction=True)
+def test_gallery_served_from_cache_until_item_changes(client, settings, django_assert_max_num_queries):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    owner = User.objects.create_user(username='gallery_owner', password='pass123')
+    make_item(owner, title='Blue Umbrella')
+    url = reverse('items:found_items_gallery')
+
+    first = client.get(url, secure=True)
+    assert first.context['total_items'] == 1
+    assert [item.title for item in first.context['items']] == ['Blue Umbrella']
+
+    with django_assert_max_num_queries(0):
+        client.get(url, secure=True)
+
+    make_item(owner, title='Red Scarf')
+    response = client.get(url, secure=True)
+    assert response.context['total_items'] == 2
+    assert [item.title for item in response.context['items']] == ['Red Scarf', 'Blue Umbrella']
+
+
+@pytest.mark.django_db
+def test_filtered_gallery_bypasses_page_cache(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    owner = User.objects.create_user(username='filter_owner', password='pass123')
+    make_item(owner, title='Blue Umbrella')
+    url = reverse('items:found_items_gallery')
+    client.get(url, secure=True)
+
+    response = client.get(url, {'category': 'keys'}, secure=True)
+    assert list(response.context['items']) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_leaderboard_refreshes_when_karma_is_awarded(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    finder = User.objects.create_user(username='karma_finder', password='pass123')
+    url = reverse('items:leaderboard')
+
+    assert client.get(url, secure=True).context['leaderboard'] == []
+    award_karma_points(finder)
+
+    response = client.get(url, secure=True)
+    assert [profile.user.username for profile in response.context['leaderboard']] == ['karma_finder']
+    assert response.context['total_karma_points'] == 50
+
+
+def test_rate_limits_key_on_the_forwarded_client_ip(settings):
+    settings.TRUSTED_PROXY_COUNT = 1
+    request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+    # The spoofable left-hand entry is ignored; the load balancer's is used
+    assert client_ip(request) == '203.0.113.7'
+    assert client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')) == '10.0.0.1'
+
+    settings.TRUSTED_PROXY_COUNT = 0
+    assert client_ip(request) == '10.0.0.1'
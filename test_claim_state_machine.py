@@ -0,0 +1,190 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from accounts.models import UserProfile
+from items.models import Item, Claim, Notification, ItemTimeline, QRCode, DisputeResolution, KarmaEvent
+from items.claim_utils import (
+    create_claim, accept_pending_claim, reject_pending_claim, return_item_by_code, mark_claim_returned,
+    resolve_claim_dispute, ClaimTransitionError,
+)
+
+
+@pytest.fixture
+def claimed_item(db):
+    owner = User.objects.create_user(username='sm_owner', password='pass123', email='owner@example.com')
+    claimer = User.objects.create_user(username='sm_claimer', password='pass123', email='claimer@example.com')
+    item = Item.objects.create(user=owner, title='Backpack', category='bags',
+                               image_url='/media/items/x.png', location='Quad')
+    claim = Claim.objects.get(id=create_claim(item.id, claimer, 'Blue one')['claim_id'])
+    return owner, claimer, item, claim
+
+
+def karma(user):
+    return UserProfile.objects.get(user=user).karma_points
+
+
+def test_accept_moves_claim_and_item_together(claimed_item):
+    owner, claimer, item, claim = claimed_item
+
+    accept_pending_claim(claim.id, owner)
+
+    claim.refresh_from_db()
+    item.refresh_from_db()
+    assert claim.status == 'accepted' and claim.accepted_at is not None
+    assert item.status == 'claimed'
+    assert ItemTimeline.objects.filter(item=item, status='claimed').count() == 1
+    assert Notification.objects.filter(recipient=claimer, claim=claim).count() == 1
+
+
+def test_second_transition_is_refused_without_side_effects(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    accept_pending_claim(claim.id, owner)
+
+    with pytest.raises(ClaimTransitionError, match='already processed'):
+        reject_pending_claim(claim.id, owner)
+
+    item.refresh_from_db()
+    assert item.status == 'claimed'
+    assert not ItemTimeline.objects.filter(item=item, notes__startswith='Claim rejected').exists()
+    assert Notification.objects.filter(recipient=claimer).count() == 1
+
+
+def test_only_owner_can_decide(client, claimed_item):
+    owner, claimer, item, claim = claimed_item
+    client.force_login(claimer)
+
+    response = client.post(reverse('items:accept_claim', args=[claim.id]), secure=True)
+
+    assert response.status_code == 403
+    claim.refresh_from_db()
+    assert claim.status == 'pending'
+
+
+def test_rejected_claim_makes_way_for_a_new_one(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    reject_pending_claim(claim.id, owner)
+    other = User.objects.create_user(username='sm_other', password='pass123')
+
+    result = create_claim(item.id, other)
+
+    assert result['success']
+    assert Claim.objects.get(item=item).claimer == other
+    assert create_claim(item.id, claimer) == {'error': 'This item has already been claimed by someone else'}
+
+
+def test_new_claim_reuses_the_rejected_row_and_keeps_its_history(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    old_code = QRCode.objects.create(claim=claim).code
+    adjustment = KarmaEvent.objects.create(user=claimer, points=5, reason='adjustment', claim=claim)
+    reject_pending_claim(claim.id, owner)
+    rejection = Notification.objects.get(recipient=claimer)
+    other = User.objects.create_user(username='sm_next', password='pass123', email='next@example.com')
+
+    result = create_claim(item.id, other, 'Mine has a keychain')
+
+    assert result['claim_id'] == claim.id
+    claim.refresh_from_db()
+    assert (claim.claimer, claim.message, claim.status, claim.rejected_at) == (other, 'Mine has a keychain', 'pending', None)
+    # The rejected claimer keeps their notification but can no longer reach the new claim through it
+    rejection.refresh_from_db()
+    assert rejection.claim is None
+    # Past ledger entries stay, but no longer point at a claim that now shows someone else
+    adjustment.refresh_from_db()
+    assert adjustment.claim is None and adjustment.user == claimer
+    # The old handoff code no longer returns the item
+    assert QRCode.objects.get(claim=claim).code != old_code
+    with pytest.raises(ClaimTransitionError):
+        return_item_by_code(old_code)
+
+
+def test_open_dispute_blocks_a_new_claim(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    DisputeResolution.objects.create(claim=claim, reporter=owner, claimer=claimer, reason='Not theirs')
+    Claim.objects.filter(id=claim.id).update(status='rejected')
+    other = User.objects.create_user(username='sm_blocked', password='pass123')
+
+    assert create_claim(item.id, other) == {'error': 'This item has an open dispute'}
+
+
+def test_qr_code_returns_item_once(client, claimed_item):
+    owner, claimer, item, claim = claimed_item
+    accept_pending_claim(claim.id, owner)
+    code = str(QRCode.objects.create(claim=claim).code)
+    client.force_login(claimer)
+    url = reverse('items:verify_qr_code')
+
+    first = client.post(url, json.dumps({'qr_code': code}), content_type='application/json', secure=True)
+    second = client.post(url, json.dumps({'qr_code': code}), content_type='application/json', secure=True)
+
+    assert first.json()['success']
+    assert second.status_code == 400 and second.json()['error'] == 'QR code already scanned'
+    claim.refresh_from_db()
+    assert claim.status == 'completed' and claim.verified_at is not None
+    assert karma(claimer) == 50
+    with pytest.raises(ClaimTransitionError, match='Invalid QR code'):
+        return_item_by_code('not-a-code')
+
+
+def test_owner_cannot_mark_returned_twice(claimed_item):
+    owner, claimer, item, claim = claimed_item
+
+    mark_claim_returned(item.id, owner)
+    with pytest.raises(ClaimTransitionError, match='already returned'):
+        mark_claim_returned(item.id, owner)
+
+    item.refresh_from_db()
+    assert item.status == 'returned'
+    assert karma(claimer) == 50
+    assert create_claim(item.id, owner) == {'error': 'Item already returned'}
+
+
+def test_dispute_for_reporter_rejects_claim_and_notifies_both(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    accept_pending_claim(claim.id, owner)
+    admin = User.objects.create_superuser(username='sm_admin', password='pass123', email='admin@example.com')
+    dispute = DisputeResolution.objects.create(claim=claim, reporter=owner, claimer=claimer, reason='Not theirs')
+
+    resolve_claim_dispute(dispute.id, 'favor_reporter', 'Receipt shown', admin)
+
+    claim.refresh_from_db()
+    item.refresh_from_db()
+    dispute.refresh_from_db()
+    assert (dispute.status, claim.status, item.status) == ('resolved', 'rejected', 'reported')
+    assert Notification.objects.filter(message__contains='resolved in favor of reporter').count() == 2
+    assert UserProfile.objects.get(user=owner).unread_notifications == 2
+    with pytest.raises(ClaimTransitionError, match='already resolved'):
+        resolve_claim_dispute(dispute.id, 'favor_claimer', '', admin)
+
+
+@pytest.mark.parametrize('resolution, claim_status, item_status', [
+    ('favor_reporter', 'rejected', 'reported'),
+    ('favor_claimer', 'accepted', 'claimed'),
+])
+def test_dispute_still_resolves_after_owner_rejects(claimed_item, resolution, claim_status, item_status):
+    owner, claimer, item, claim = claimed_item
+    admin = User.objects.create_superuser(username='sm_admin', password='pass123', email='admin@example.com')
+    dispute = DisputeResolution.objects.create(claim=claim, reporter=owner, claimer=claimer, reason='Not theirs')
+    reject_pending_claim(claim.id, owner)
+
+    resolve_claim_dispute(dispute.id, resolution, '', admin)
+
+    claim.refresh_from_db()
+    item.refresh_from_db()
+    assert (claim.status, item.status) == (claim_status, item_status)
+    assert DisputeResolution.objects.get(id=dispute.id).status == 'resolved'
+    if resolution == 'favor_reporter':
+        other = User.objects.create_user(username='sm_after', password='pass123')
+        assert create_claim(item.id, other)['success']
+
+
+def test_open_dispute_blocks_returning_the_item(claimed_item):
+    owner, claimer, item, claim = claimed_item
+    accept_pending_claim(claim.id, owner)
+    DisputeResolution.objects.create(claim=claim, reporter=owner, claimer=claimer, reason='Not theirs')
+
+    with pytest.raises(ClaimTransitionError, match='open dispute'):
+        mark_claim_returned(item.id, owner)
+    claim.refresh_from_db()
+    assert claim.status == 'accepted'
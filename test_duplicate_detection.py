@@ -0,0 +1,141 @@
+import io
+import random
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from items.models import Item, ContentModeration
+from items.image_utils import image_dhash
+from items.duplicate_utils import BKTree, hamming_distance, duplicate_index, find_possible_duplicates
+from items.jobs import enqueue_image_processing, IMAGE_PROCESSING_JOB
+from items.task_queue import run_pending_jobs
+
+
+def pattern_image(seed, size=(240, 180), image_format='PNG'):
+    rng = random.Random(seed)
+    image = Image.new('RGB', (12, 9))
+    image.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(12 * 9)])
+    buffer = io.BytesIO()
+    image.resize(size, Image.BILINEAR).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    duplicate_index.reset()
+    yield
+    duplicate_index.reset()
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for item_id, value in enumerate(hashes):
+        tree.add(value, item_id)
+
+    query = hashes[42] ^ 0b1011
+    expected = {i for i, value in enumerate(hashes) if hamming_distance(query, value) <= 8}
+    assert {item_id for item_id, _ in tree.search(query, 8)} == expected
+
+
+def test_dhash_survives_resize_and_recompression():
+    original = image_dhash(pattern_image(1))
+    recompressed = image_dhash(pattern_image(1, size=(480, 360), image_format='JPEG'))
+    different = image_dhash(pattern_image(2))
+
+    assert hamming_distance(original, recompressed) <= 6
+    assert hamming_distance(original, different) > 12
+
+
+@pytest.mark.django_db
+def test_find_possible_duplicates_same_type_only():
+    user = User.objects.create_user(username='dupes', password='pass123')
+    phash = image_dhash(pattern_image(3))
+
+    def make(title, item_type='found', image_phash=phash):
+        return Item.objects.create(
+            user=user, title=title, category='other', image_url='/media/items/x.png',
+            location='Library', item_type=item_type, image_phash=image_phash,
+        )
+
+    first = make('Wallet')
+    make('Lost wallet', item_type='lost')
+    make('Other thing', image_phash=image_dhash(pattern_image(4)))
+    second = make('Wallet again', image_phash=phash ^ 0b11)
+
+    assert find_possible_duplicates(second) == [first]
+
+
+@pytest.mark.django_db
+def test_index_picks_up_rows_committed_late():
+    user = User.objects.create_user(username='dupes_late', password='pass123')
+    phash = image_dhash(pattern_image(6))
+
+    def make(title):
+        return Item.objects.create(
+            user=user, title=title, category='other', image_url='/media/items/x.png',
+            location='Library', item_type='found', image_phash=phash,
+        )
+
+    first = make('Keys')
+    duplicate_index.sync()
+    # Written by a transaction that started before ``first`` but committed after it
+    late = make('Keys on a ring')
+    Item.objects.filter(pk=late.pk).update(updated_at=first.updated_at - timedelta(seconds=5))
+    second = make('Keys again')
+
+    assert {item.id for item in find_possible_duplicates(second)} == {first.id, late.id}
+
+
+@pytest.mark.django_db
+def test_index_picks_up_hashes_backfilled_by_the_worker(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    user = User.objects.create_user(username='dupes_backfill', password='pass123')
+    (tmp_path / 'items').mkdir()
+    (tmp_path / 'items' / 'bag.png').write_bytes(pattern_image(7))
+    # Reported long ago without a hash (it couldn't be computed at report time)
+    backfilled = Item.objects.create(
+        user=user, title='Bag', category='other', image_url='/media/items/bag.png',
+        location='Library', item_type='found',
+    )
+    Item.objects.filter(pk=backfilled.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+    duplicate_index.sync()
+
+    enqueue_image_processing(backfilled)
+    run_pending_jobs(kinds=[IMAGE_PROCESSING_JOB])
+    second = Item.objects.create(
+        user=user, title='Bag again', category='other', image_url='/media/items/y.png',
+        location='Library', item_type='found', image_phash=image_dhash(pattern_image(7)),
+    )
+
+    assert find_possible_duplicates(second) == [backfilled]
+
+
+@pytest.mark.django_db
+def test_report_item_flags_duplicate(client, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    User.objects.create_user(username='dup_reporter', password='pass123')
+    client.login(username='dup_reporter', password='pass123')
+
+    def report(title, data):
+        return client.post(reverse('items:report_item'), {
+            'title': title,
+            'location': 'Main Gate',
+            'item_type': 'found',
+            'image': SimpleUploadedFile('photo.jpg', data, content_type='image/jpeg'),
+        }, secure=True)
+
+    report('Black umbrella & case', pattern_image(5, image_format='JPEG'))
+    assert not ContentModeration.objects.exists()
+
+    response = report('Umbrella', pattern_image(5, size=(300, 225), image_format='JPEG'))
+    warnings = [str(m) for m in get_messages(response.wsgi_request) if m.level_tag == 'warning']
+    assert warnings and '"Black umbrella & case"' in warnings[0]
+    flag = ContentModeration.objects.get(reason='duplicate')
+    assert flag.item.title == 'Umbrella'
+    assert '"Black umbrella & case"' in flag.description
@@ -0,0 +1,141 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.urls import reverse
+from django.utils import timezone
+from items.models import Item, BackgroundJob, OutgoingEmail
+from items.claim_utils import create_claim
+from items.jobs import enqueue_email, EMAIL_DELIVERY_JOB
+from items.task_queue import run_pending_jobs
+
+
+class CountingBackend(LocmemBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if any('bounce@example.com' in message.to for message in messages):
+            raise ConnectionError('Mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def counting_backend(settings):
+    settings.EMAIL_BACKEND = 'test_email_outbox.CountingBackend'
+    CountingBackend.opened = 0
+    return CountingBackend
+
+
+@pytest.mark.django_db
+def test_emails_are_queued_not_sent_inline():
+    email = enqueue_email('Hello', 'Body', ['a@example.com', ''])
+
+    assert mail.outbox == []
+    assert email.recipients == ['a@example.com'] and email.status == 'pending'
+    assert BackgroundJob.objects.get(kind=EMAIL_DELIVERY_JOB).payload == {'email_id': email.id}
+    assert enqueue_email('Hello', 'Body', ['']) is None
+
+
+@pytest.mark.django_db
+def test_worker_sends_batch_over_one_connection(counting_backend):
+    for n in range(5):
+        enqueue_email(f'Message {n}', 'Body', [f'user{n}@example.com'])
+
+    assert run_pending_jobs() == (5, 0)
+    assert counting_backend.opened == 1
+    assert len(mail.outbox) == 5
+    assert set(OutgoingEmail.objects.values_list('status', flat=True)) == {'sent'}
+    assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_failed_email_retries_then_gives_up(counting_backend):
+    enqueue_email('Good', 'Body', ['ok@example.com'])
+    bad = enqueue_email('Bad', 'Body', ['bounce@example.com'])
+    BackgroundJob.objects.filter(payload__email_id=bad.id).update(max_attempts=2)
+
+    assert run_pending_jobs() == (1, 1)
+    bad.refresh_from_db()
+    job = BackgroundJob.objects.get(payload__email_id=bad.id)
+    assert bad.status == 'pending' and bad.attempts == 1 and 'Mailbox unavailable' in bad.last_error
+    assert job.status == 'pending' and job.run_after > timezone.now()
+
+    BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+    assert run_pending_jobs() == (0, 1)
+    bad.refresh_from_db()
+    assert bad.status == 'failed' and bad.attempts == 2
+    assert [message.subject for message in mail.outbox] == ['Good']
+
+
+@pytest.mark.django_db
+def test_file_backend_writes_messages(settings, tmp_path):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+    settings.EMAIL_FILE_PATH = str(tmp_path)
+    enqueue_email('Offline', 'Delivered to disk', ['a@example.com'])
+
+    run_pending_jobs()
+
+    [written] = list(tmp_path.iterdir())
+    assert 'Subject: Offline' in written.read_text()
+
+
+@pytest.mark.django_db
+def test_create_claim_queues_owner_email():
+    owner = User.objects.create_user(username='owner_mail', password='pass123', email='owner@example.com')
+    claimer = User.objects.create_user(username='claimer_mail', password='pass123')
+    item = Item.objects.create(user=owner, title='Laptop', category='electronics',
+                               image_url='/media/items/x.png', location='Lab')
+
+    assert create_claim(item.id, claimer, 'mine')['success']
+    email = OutgoingEmail.objects.get()
+    assert email.recipients == ['owner@example.com'] and 'Laptop' in email.subject
+
+    run_pending_jobs()
+    assert mail.outbox[0].to == ['owner@example.com']
+
+
+@pytest.mark.django_db
+def test_accept_claim_queues_claimer_email(client):
+    owner = User.objects.create_user(username='owner_accept', password='pass123', email='owner@example.com')
+    claimer = User.objects.create_user(username='claimer_accept', password='pass123', email='claimer@example.com')
+    item = Item.objects.create(user=owner, title='Keys', category='keys',
+                               image_url='/media/items/x.png', location='Gym')
+    claim_id = create_claim(item.id, claimer)['claim_id']
+
+    client.login(username='owner_accept', password='pass123')
+    response = client.post(reverse('items:accept_claim', args=[claim_id]), secure=True)
+
+    assert response.json()['success']
+    assert OutgoingEmail.objects.filter(recipients=['claimer@example.com']).exists()
+
+
+@pytest.mark.django_db
+def test_digest_mode_coalesces_claim_emails(settings):
+    settings.EMAIL_DIGEST_WINDOW = 600
+    owner = User.objects.create_user(username='owner_digest', password='pass123', email='owner@example.com')
+    for n in range(3):
+        item = Item.objects.create(user=owner, title=f'Umbrella {n}', category='other',
+                                   image_url='/media/items/x.png', location='Hall')
+        claimer = User.objects.create_user(username=f'digest_claimer{n}', password='pass123')
+        assert create_claim(item.id, claimer)['success']
+
+    assert not OutgoingEmail.objects.exists()
+    digest = BackgroundJob.objects.get(kind='email_digest')
+    assert digest.run_after > timezone.now()
+
+    BackgroundJob.objects.filter(id=digest.id).update(run_after=timezone.now())
+    run_pending_jobs()
+    run_pending_jobs()
+
+    [message] = mail.outbox
+    assert message.to == ['owner@example.com'] and '3 new notifications' in message.subject
+    assert all(f'Umbrella {n}' in message.body for n in range(3))
+
+    # A later claim starts a new window
+    item = Item.objects.create(user=owner, title='Scarf', category='other', image_url='/media/items/x.png', location='Hall')
+    create_claim(item.id, User.objects.create_user(username='late_claimer', password='pass123'))
+    assert BackgroundJob.objects.filter(kind='email_digest', status='pending').count() == 1
@@ -0,0 +1,102 @@
+import hashlib
+import io
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from items.image_utils import store_upload, publish_upload, generate_image_variants, InvalidImageUpload
+
+
+def image_bytes(color=(200, 30, 30), size=(32, 32), image_format='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def test_store_upload_is_content_addressed(media_root):
+    data = image_bytes()
+    url, digest = store_upload(SimpleUploadedFile('photo.png', data, content_type='image/png'))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert url == f'/media/items/{digest}.png'
+    assert (media_root / 'items' / f'{digest}.png').read_bytes() == data
+
+
+@pytest.mark.django_db
+def test_publish_upload_sends_unshared_uploads_to_remote_storage(media_root, settings, monkeypatch):
+    monkeypatch.setattr('items.image_utils.remote_storage_configured', lambda: True)
+    monkeypatch.setattr('items.image_utils.upload_to_remote', lambda path: f'https://res.cloudinary.com/demo/{path.name}')
+    url, digest = store_upload(SimpleUploadedFile('photo.png', image_bytes(), content_type='image/png'))
+
+    settings.LOCAL_MEDIA_SHARED = True
+    assert publish_upload(url) == url
+    assert (media_root / 'items' / f'{digest}.png').exists()
+
+    settings.LOCAL_MEDIA_SHARED = False
+    assert publish_upload(url) == f'https://res.cloudinary.com/demo/{digest}.png'
+    # Nothing but this request could read the local copy
+    assert not (media_root / 'items' / f'{digest}.png').exists()
+
+
+def test_store_upload_dedupes_identical_files(media_root):
+    data = image_bytes()
+    first, _ = store_upload(SimpleUploadedFile('a.png', data, content_type='image/png'))
+    second, _ = store_upload(SimpleUploadedFile('../../b.png', data, content_type='image/png'))
+
+    assert first == second
+    # No leftover temp files, one stored copy
+    assert [path.name for path in (media_root / 'items').iterdir()] == [first.rsplit('/', 1)[1]]
+
+
+def test_store_upload_uses_content_type_not_filename(media_root):
+    url, _ = store_upload(SimpleUploadedFile('photo.png', image_bytes(image_format='JPEG')))
+    assert url.endswith('.jpg')
+
+
+def test_store_upload_rejects_non_images_and_oversized(media_root):
+    with pytest.raises(InvalidImageUpload):
+        store_upload(SimpleUploadedFile('evil.png', b'<?php echo 1; ?>'))
+    with pytest.raises(InvalidImageUpload):
+        store_upload(SimpleUploadedFile('big.png', image_bytes()), max_size=10)
+
+    assert list((media_root / 'items').iterdir()) == []
+
+
+def test_generate_image_variants_sizes_and_formats(media_root):
+    variants = generate_image_variants(image_bytes(size=(800, 600)))
+
+    assert set(variants) == {'webp', 'jpeg'}
+    # 960 would upscale the 800px original, so it is skipped
+    assert set(variants['webp']) == {'320', '640'}
+    with Image.open(media_root / variants['jpeg']['320'].split('/media/', 1)[1]) as thumb:
+        assert thumb.size == (320, 240) and thumb.format == 'JPEG'
+
+
+def test_generate_image_variants_small_image_keeps_one_size(media_root):
+    variants = generate_image_variants(image_bytes(size=(100, 50)))
+    assert list(variants['webp']) == ['100']
+
+
+@pytest.mark.django_db
+def test_item_srcset_from_variants(media_root):
+    from django.contrib.auth.models import User
+    from items.models import Item
+    from items.jobs import enqueue_image_processing
+    from items.task_queue import run_pending_jobs
+
+    user = User.objects.create_user(username='thumbs', password='pass123')
+    url, _ = store_upload(SimpleUploadedFile('photo.png', image_bytes(size=(1200, 900))))
+    item = Item.objects.create(user=user, title='Bike', category='other', image_url=url, location='Gate')
+
+    enqueue_image_processing(item)
+    run_pending_jobs()
+    item.refresh_from_db()
+
+    assert item.image_url == url
+    assert item.webp_srcset.endswith('960w') and item.webp_srcset.count('w,') == 2
+    assert item.thumbnail_url.endswith('-320.jpg')
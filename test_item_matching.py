@@ -0,0 +1,138 @@
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from items.models import Item, ItemMatch, Notification
+from items.matching_utils import geo_cell_for, nearby_geo_cells, score_pair, match_candidates, update_item_matches
+from items.jobs import enqueue_item_matching
+from items.task_queue import run_pending_jobs
+
+
+@pytest.fixture
+def users(db):
+    return (
+        User.objects.create_user(username='loser', password='pass123'),
+        User.objects.create_user(username='finder', password='pass123'),
+    )
+
+
+def make_item(user, title, item_type, **fields):
+    fields.setdefault('category', 'electronics')
+    fields.setdefault('location', 'Main Library')
+    return Item.objects.create(
+        user=user, title=title, item_type=item_type, image_url='/media/items/x.png', **fields
+    )
+
+
+def test_geo_cells_cover_neighbours_and_wrap_antimeridian():
+    cells = nearby_geo_cells(12.97, 77.59)
+    assert geo_cell_for(12.97, 77.59) in cells
+    assert geo_cell_for(13.0, 77.62) in cells
+    assert geo_cell_for(13.5, 77.59) not in cells
+
+    assert geo_cell_for(0.0, -179.99) in nearby_geo_cells(0.0, 179.99)
+    assert nearby_geo_cells(89.99, 0.0) is None
+
+
+@pytest.mark.django_db
+def test_score_prefers_similar_nearby_items(users):
+    loser, finder = users
+    lost = make_item(loser, 'Black iPhone 13', 'lost', ai_tags=['phone', 'black', 'iphone'],
+                     latitude=12.9700, longitude=77.5900)
+    close = make_item(finder, 'iPhone in black case', 'found', ai_tags=['phone', 'black'],
+                      latitude=12.9710, longitude=77.5905)
+    far = make_item(finder, 'Laptop charger', 'found', ai_tags=['charger'],
+                    latitude=12.9900, longitude=77.6200)
+    other_category = make_item(finder, 'Black iPhone 13', 'found', category='keys')
+
+    assert score_pair(lost, close) > score_pair(lost, far) > 0
+    assert score_pair(lost, other_category) == 0
+
+
+@pytest.mark.django_db
+def test_candidates_are_blocked_by_category_cell_and_window(users):
+    loser, finder = users
+    lost = make_item(loser, 'Wallet', 'lost', latitude=12.97, longitude=77.59)
+    nearby = make_item(finder, 'Wallet', 'found', latitude=12.98, longitude=77.60)
+    no_coords = make_item(finder, 'Wallet', 'found')
+    make_item(finder, 'Wallet', 'found', latitude=28.61, longitude=77.21)
+    make_item(finder, 'Wallet', 'found', category='books', latitude=12.97, longitude=77.59)
+    make_item(loser, 'Wallet', 'found', latitude=12.97, longitude=77.59)
+    old = make_item(finder, 'Wallet', 'found', latitude=12.97, longitude=77.59)
+    Item.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=90))
+
+    assert {item.id for item in match_candidates(lost)} == {nearby.id, no_coords.id}
+
+
+@pytest.mark.django_db
+def test_matching_stores_top_k_and_notifies_once(users):
+    loser, finder = users
+    lost = make_item(loser, 'Blue water bottle', 'lost', ai_tags=['bottle', 'blue'])
+    for n in range(4):
+        make_item(finder, f'Blue water bottle {n}', 'found', ai_tags=['bottle', 'blue'])
+    make_item(finder, 'Textbook', 'found', description='calculus')
+
+    matches = update_item_matches(lost, top_k=3)
+    assert len(matches) == 3
+    assert ItemMatch.objects.filter(lost_item=lost).count() == 3
+    assert Notification.objects.filter(recipient=loser, match__isnull=False).count() == 3
+
+    update_item_matches(lost, top_k=3)
+    assert Notification.objects.filter(recipient=loser).count() == 3
+
+
+@pytest.mark.django_db
+def test_new_found_item_is_matched_by_worker(users):
+    loser, finder = users
+    lost = make_item(loser, 'Silver house keys', 'lost', category='keys', ai_tags=['keys', 'silver'])
+    found = make_item(finder, 'Set of silver keys', 'found', category='keys', ai_tags=['keys', 'silver'])
+
+    enqueue_item_matching(found)
+    run_pending_jobs()
+
+    match = ItemMatch.objects.get()
+    assert (match.lost_item, match.found_item) == (lost, found)
+    assert Notification.objects.get().recipient == loser
+
+
+@pytest.mark.django_db
+def test_match_notification_message_is_not_double_escaped(users):
+    loser, finder = users
+    make_item(loser, 'Tom&#x27;s keys', 'lost', category='keys', ai_tags=['keys'])
+    make_item(finder, 'Keys &amp; fob', 'found', category='keys', ai_tags=['keys'], location='Caf&eacute; &quot;B&quot;')
+    update_item_matches(Item.objects.get(item_type='lost'))
+
+    assert Notification.objects.get().message == (
+        'A found item "Keys & fob" reported at Café "B" may be your lost "Tom\'s keys".'
+    )
+
+
+@pytest.mark.django_db
+def test_edited_item_drops_stale_matches(users):
+    loser, finder = users
+    lost = make_item(loser, 'Red umbrella', 'lost', category='other', ai_tags=['umbrella', 'red'])
+    make_item(finder, 'Red umbrella', 'found', category='other', ai_tags=['umbrella', 'red'])
+    update_item_matches(lost)
+    assert ItemMatch.objects.count() == 1
+
+    lost.category = 'books'
+    lost.save()
+    update_item_matches(lost)
+    assert not ItemMatch.objects.exists()
+    # The notification outlives the match it pointed to
+    assert Notification.objects.get().match is None
+
+
+@pytest.mark.django_db
+def test_notifications_page_renders_match_notifications(client, settings, users):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    loser, finder = users
+    lost = make_item(loser, 'Green scarf', 'lost', category='clothing', ai_tags=['scarf', 'green'])
+    found = make_item(finder, 'Green scarf', 'found', category='clothing', ai_tags=['scarf', 'green'])
+    update_item_matches(lost)
+
+    client.login(username='loser', password='pass123')
+    response = client.get(reverse('items:notifications'), secure=True)
+    assert response.status_code == 200
+    assert reverse('items:item_detail', args=[found.id]) in response.content.decode()
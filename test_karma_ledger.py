@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from accounts.models import UserProfile
+from items.models import BackgroundJob, KarmaEvent
+from items.jobs import schedule_karma_compaction, KARMA_COMPACTION_JOB
+from items.karma_utils import award_karma_points, compact_karma_ledger, rebuild_karma_from_ledger
+from items.task_queue import run_pending_jobs
+
+
+def profile(user):
+    return UserProfile.objects.get(user=user)
+
+
+@pytest.mark.django_db
+def test_award_appends_event_and_updates_counters_atomically():
+    finder = User.objects.create_user(username='ledger_finder', password='pass123')
+    stale = profile(finder)
+
+    award_karma_points(finder)
+    award_karma_points(finder, points=10, items_returned=0, reason='adjustment')
+
+    fresh = profile(finder)
+    assert (fresh.karma_points, fresh.total_items_returned) == (60, 1)
+    assert list(KarmaEvent.objects.filter(user=finder).order_by('id').values_list('points', 'reason')) == [
+        (50, 'item_returned'), (10, 'adjustment')
+    ]
+    # The award never read the profile, so an instance loaded earlier is simply stale
+    assert stale.karma_points == 0
+
+
+@pytest.mark.django_db
+def test_award_creates_missing_profile():
+    finder = User.objects.create_user(username='ledger_new', password='pass123')
+    UserProfile.objects.filter(user=finder).delete()
+
+    award_karma_points(finder)
+
+    assert profile(finder).karma_points == 50
+
+
+@pytest.mark.django_db
+def test_compaction_keeps_totals_and_recent_events():
+    finder = User.objects.create_user(username='ledger_old', password='pass123')
+    for _ in range(3):
+        award_karma_points(finder)
+    KarmaEvent.objects.update(created_at=timezone.now() - timedelta(days=200))
+    award_karma_points(finder)
+
+    assert compact_karma_ledger() == 2
+
+    events = KarmaEvent.objects.filter(user=finder)
+    assert sorted(events.values_list('reason', 'points')) == [('compacted', 150), ('item_returned', 50)]
+    assert compact_karma_ledger() == 0
+
+    UserProfile.objects.filter(user=finder).update(karma_points=0, total_items_returned=0)
+    rebuild_karma_from_ledger()
+    assert (profile(finder).karma_points, profile(finder).total_items_returned) == (200, 4)
+
+
+@pytest.mark.django_db
+def test_compaction_job_reschedules_itself():
+    assert schedule_karma_compaction() is not None
+    assert schedule_karma_compaction() is None
+
+    run_pending_jobs()
+
+    jobs = BackgroundJob.objects.filter(kind=KARMA_COMPACTION_JOB)
+    assert sorted(jobs.values_list('status', flat=True)) == ['done', 'pending']
+    assert jobs.get(status='pending').run_after > timezone.now() + timedelta(hours=23)
@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from accounts.models import UserProfile
+from items.karma_utils import award_karma_points, get_user_rank, rank_for_karma, leaderboard_totals
+
+
+def make_user(username, karma=0, returned=0):
+    user = User.objects.create_user(username=username, password='pass123')
+    UserProfile.objects.filter(user=user).update(karma_points=karma, total_items_returned=returned)
+    return User.objects.get(pk=user.pk)
+
+
+@pytest.mark.django_db
+def test_rank_counts_profiles_with_more_karma():
+    top = make_user('rank_top', 200, 4)
+    tied = [make_user('rank_tied_a', 100, 2), make_user('rank_tied_b', 100, 2)]
+    low = make_user('rank_low', 50, 1)
+    make_user('rank_zero')
+
+    assert get_user_rank(top) == 1
+    assert [get_user_rank(user) for user in tied] == [2, 2]
+    assert get_user_rank(low) == 4
+    assert rank_for_karma(0) == 5
+    assert rank_for_karma(1000) == 1
+    assert leaderboard_totals() == {'total_participants': 4, 'total_items_returned': 9, 'total_karma_points': 450}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_award_refreshes_ranks(django_assert_num_queries):
+    leader = make_user('award_leader', 100)
+    chaser = make_user('award_chaser', 50)
+    assert get_user_rank(chaser) == 2
+
+    # Served from the cached index until the next award
+    with django_assert_num_queries(0):
+        assert rank_for_karma(50) == 2
+
+    award_karma_points(chaser)
+    award_karma_points(chaser)
+
+    assert get_user_rank(chaser) == 1
+    assert get_user_rank(leader) == 2
+
+
+@pytest.mark.django_db
+def test_leaderboard_view_uses_rank_index(client, settings, django_assert_max_num_queries):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    for n in range(5):
+        make_user(f'board_{n}', 50 * (n + 1), n)
+    viewer = make_user('board_viewer', 60)
+    client.force_login(viewer)
+    url = reverse('items:leaderboard')
+    client.get(url, secure=True)
+
+    with django_assert_max_num_queries(4):
+        response = client.get(url, secure=True)
+
+    assert response.context['user_rank'] == 5
+    assert [profile.karma_points for profile in response.context['leaderboard']][:2] == [250, 200]
+    assert response.context['total_participants'] == 6
@@ -0,0 +1,105 @@
+import json
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from items.models import Item
+from items.location_utils import (
+    bounding_box, haversine_distance, haversine_distances, rank_within_radius,
+    get_nearby_items, get_nearby_item_distances,
+)
+
+
+def make_item(user, title, latitude, longitude, status='reported'):
+    return Item.objects.create(
+        user=user,
+        title=title,
+        category='other',
+        image_url='https://via.placeholder.com/150',
+        location='Campus',
+        latitude=latitude,
+        longitude=longitude,
+        status=status,
+    )
+
+
+@pytest.mark.parametrize('latitude,longitude,radius', [
+    (12.97, 77.59, 5),
+    (64.5, -20.0, 50),
+    (-33.9, 151.2, 0.1),
+])
+def test_bounding_box_contains_circle(latitude, longitude, radius):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius)
+    # Points on the circle edge in each compass direction stay inside the box
+    for lat, lon in [(min_lat, longitude), (max_lat, longitude)]:
+        assert haversine_distance(latitude, longitude, lat, lon) == pytest.approx(radius, rel=1e-6)
+    assert haversine_distance(latitude, longitude, latitude, max_lon) >= radius
+    assert haversine_distance(latitude, longitude, latitude, min_lon) >= radius
+
+
+@pytest.mark.django_db
+def test_nearby_items_sorted_and_filtered():
+    user = User.objects.create_user(username='geo', password='pass123')
+    near = make_item(user, 'Near', 12.9700, 77.5900)
+    nearer = make_item(user, 'Nearer', 12.9716, 77.5946)
+    make_item(user, 'Far', 13.5, 78.2)
+    make_item(user, 'Returned', 12.9716, 77.5946, status='returned')
+
+    results = get_nearby_items(12.9716, 77.5946, radius_km=5)
+    assert [r['item'] for r in results] == [nearer, near]
+    assert results[0]['distance'] == 0
+
+
+@pytest.mark.django_db
+def test_nearby_items_across_antimeridian():
+    user = User.objects.create_user(username='dateline', password='pass123')
+    east = make_item(user, 'East', 0.0, 179.99)
+    west = make_item(user, 'West', 0.0, -179.99)
+
+    matches = get_nearby_item_distances(0.0, 179.995, radius_km=5)
+    assert {item_id for item_id, _ in matches} == {east.id, west.id}
+
+
+@pytest.mark.django_db
+def test_nearby_results_are_capped():
+    user = User.objects.create_user(username='capped', password='pass123')
+    for i in range(5):
+        make_item(user, f'Item {i}', 10.0 + i * 0.001, 10.0)
+
+    assert len(get_nearby_item_distances(10.0, 10.0, radius_km=5, limit=3)) == 3
+
+
+@pytest.mark.django_db
+def test_search_nearby_endpoint_paginates(client):
+    user = User.objects.create_user(username='pager', password='pass123')
+    for i in range(25):
+        make_item(user, f'Item {i}', 10.0 + i * 0.0001, 10.0)
+
+    url = reverse('items:search_nearby_items')
+    payload = {'latitude': 10.0, 'longitude': 10.0, 'radius': 5}
+    first = client.post(url, json.dumps(payload), content_type='application/json', secure=True).json()
+    second = client.post(url, json.dumps({**payload, 'page': 2}), content_type='application/json', secure=True).json()
+
+    assert first['total'] == 25 and first['count'] == 20 and first['has_next']
+    assert second['count'] == 5 and not second['has_next']
+    assert first['items'][0]['title'] == 'Item 0'
+
+
+def test_vectorized_haversine_matches_scalar():
+    latitudes = [12.97, 13.5, -33.9, 0.0]
+    longitudes = [77.59, 78.2, 151.2, -179.99]
+    distances = haversine_distances(12.9716, 77.5946, latitudes, longitudes)
+
+    for distance, lat, lon in zip(distances, latitudes, longitudes):
+        assert distance == pytest.approx(haversine_distance(12.9716, 77.5946, lat, lon))
+
+
+def test_rank_within_radius_orders_and_limits():
+    latitudes = [10.03, 10.0, 10.01, 11.0, 10.02]
+    longitudes = [10.0] * 5
+
+    order, distances = rank_within_radius(10.0, 10.0, latitudes, longitudes, radius_km=5)
+    assert order == [1, 2, 4, 0]
+    assert distances == sorted(distances)
+
+    order, _ = rank_within_radius(10.0, 10.0, latitudes, longitudes, radius_km=5, limit=2)
+    assert order == [1, 2]
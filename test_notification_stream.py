@@ -0,0 +1,100 @@
+import json
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from items import views
+from items.models import Item, Notification
+from items.claim_utils import create_claim
+from items.event_utils import notification_events, format_sse
+
+
+def make_claim(owner_name='stream_owner', claimer_name='stream_claimer'):
+    owner = User.objects.create_user(username=owner_name, password='pass123')
+    claimer = User.objects.create_user(username=claimer_name, password='pass123')
+    item = Item.objects.create(user=owner, title='Headphones', category='electronics',
+                               image_url='/media/items/x.png', location='Cafe')
+    create_claim(item.id, claimer)
+    return owner
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':') and ': ' in line)
+        if 'data' in fields:
+            events.append((fields.get('id'), fields.get('event'), json.loads(fields['data'])))
+    return events
+
+
+@pytest.mark.django_db
+def test_notification_events_follow_cursor():
+    owner = make_claim()
+    first = Notification.objects.get(recipient=owner)
+    second = Notification.objects.create(recipient=owner, message='Something else')
+
+    events = notification_events(owner.id, 0)
+    assert [(event_id, event) for event_id, event, _ in events] == [(first.id, 'claim'), (second.id, 'notification')]
+    assert events[0][2]['claim']['item_title'] == 'Headphones'
+    assert [event_id for event_id, _, _ in notification_events(owner.id, first.id)] == [second.id]
+
+
+def test_format_sse():
+    assert format_sse({'a': 1}, event='claim', event_id=7) == 'id: 7\nevent: claim\ndata: {"a": 1}\n\n'
+
+
+async def read_stream(response, chunks):
+    received = []
+    async for chunk in response.streaming_content:
+        received.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+        if len(received) >= chunks:
+            break
+    await response.streaming_content.aclose()
+    return ''.join(received)
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_stream_resumes_from_last_event_id(monkeypatch):
+    monkeypatch.setattr(views, 'SSE_POLL_SECONDS', 0)
+    owner = await sync_to_async(make_claim)()
+    client = AsyncClient()
+    await sync_to_async(client.force_login)(owner)
+
+    response = await client.get(reverse('items:notification_stream'), headers={'Last-Event-ID': '0'}, secure=True)
+    assert response['Content-Type'] == 'text/event-stream'
+    events = parse_events(await read_stream(response, 3))
+
+    notification = await Notification.objects.aget(recipient=owner)
+    assert events[0][:2] == (str(notification.id), 'claim')
+    assert events[1][1:] == ('unread', {'count': 1})
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_stream_without_cursor_only_sends_new_events(monkeypatch):
+    monkeypatch.setattr(views, 'SSE_POLL_SECONDS', 0)
+    owner = await sync_to_async(make_claim)()
+    client = AsyncClient()
+    await sync_to_async(client.force_login)(owner)
+
+    response = await client.get(reverse('items:notification_stream'), secure=True)
+    first_chunk = await response.streaming_content.__anext__()
+    assert first_chunk.startswith(b'retry:')
+    new = await Notification.objects.acreate(recipient=owner, message='Fresh')
+    events = parse_events(await read_stream(response, 1))
+
+    assert [(event_id, event) for event_id, event, _ in events] == [(str(new.id), 'notification')]
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_stream_requires_login():
+    response = await AsyncClient().get(reverse('items:notification_stream'), secure=True)
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_stream_is_not_served_under_wsgi(client):
+    owner = make_claim()
+    client.force_login(owner)
+    response = client.get(reverse('items:notification_stream'), secure=True)
+    assert response.status_code == 204
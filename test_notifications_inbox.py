@@ -0,0 +1,76 @@
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from items.models import Item, Notification
+from items.claim_utils import create_claim
+from items.notification_utils import notification_page, get_unread_count, create_notification
+
+
+@pytest.fixture
+def owner(db):
+    return User.objects.create_user(username='inbox_owner', password='pass123')
+
+
+def test_keyset_pages_cover_everything_once(owner):
+    now = timezone.now()
+    created = [Notification.objects.create(recipient=owner, message=f'n{n}') for n in range(7)]
+    # Two rows share a timestamp so the id tie-breaker matters
+    for n, notification in enumerate(created):
+        Notification.objects.filter(id=notification.id).update(created_at=now - timedelta(minutes=n // 2))
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = notification_page(owner, cursor, page_size=3)
+        seen += [notification.id for notification in page]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(notification.id for notification in created)
+    assert len(seen) == len(set(seen))
+
+
+def test_inbox_query_count_is_flat(client, owner, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    for n in range(5):
+        item = Item.objects.create(user=owner, title=f'Item {n}', category='other',
+                                   image_url='/media/items/x.png', location='Hall')
+        create_claim(item.id, User.objects.create_user(username=f'inbox_claimer{n}', password='pass123'), 'hi')
+    client.login(username='inbox_owner', password='pass123')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('items:notifications'), secure=True)
+
+    assert response.status_code == 200 and len(response.context['notifications']) == 5
+    notification_queries = [q for q in queries.captured_queries if 'items_notification' in q['sql']]
+    assert len(notification_queries) == 1
+    assert not any('FROM "items_claim"' in q['sql'] for q in queries.captured_queries)
+
+
+def test_inbox_older_link(client, owner, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    for n in range(25):
+        Notification.objects.create(recipient=owner, message=f'message {n}')
+    client.login(username='inbox_owner', password='pass123')
+
+    first = client.get(reverse('items:notifications'), secure=True)
+    assert len(first.context['notifications']) == 20
+    second = client.get(reverse('items:notifications'), {'before': first.context['next_cursor']}, secure=True)
+    assert len(second.context['notifications']) == 5 and second.context['next_cursor'] is None
+
+
+def test_mark_all_read_is_one_update(client, owner):
+    for n in range(3):
+        create_notification(owner, f'n{n}')
+    client.login(username='inbox_owner', password='pass123')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse('items:mark_all_notifications_read'), secure=True)
+
+    assert response.json() == {'success': True, 'marked': 3}
+    assert len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "items_notification"')]) == 1
+    assert not Notification.objects.filter(is_read=False).exists()
+    assert get_unread_count(owner) == 0
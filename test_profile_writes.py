@@ -0,0 +1,90 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import UserProfile
+from items.notification_utils import adjust_unread_count
+
+
+def profile_queries(queries, verb=''):
+    return [
+        query['sql'] for query in queries
+        if 'accounts_userprofile' in query['sql'] and query['sql'].lstrip().upper().startswith(verb)
+    ]
+
+
+@pytest.mark.django_db
+def test_login_does_not_touch_profile(client):
+    User.objects.create_user(username='writes_login', email='writes_login@example.com', password='pass12345')
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post(reverse('accounts:login'), {
+            'email': 'writes_login@example.com', 'password': 'pass12345',
+        }, secure=True)
+
+    assert response.status_code == 302
+    assert profile_queries(ctx.captured_queries) == []
+    assert len(ctx.captured_queries) <= 10
+
+
+@pytest.mark.django_db
+def test_signup_inserts_profile_once(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post(reverse('accounts:signup'), {
+            'username': 'writes_signup', 'email': 'writes_signup@vitapstudent.ac.in',
+            'first_name': 'Write', 'last_name': 'Signup',
+            'password1': 'Sturdy-pass-91', 'password2': 'Sturdy-pass-91',
+        }, secure=True)
+
+    assert response.status_code == 200
+    assert User.objects.filter(username='writes_signup').exists()
+    assert len(profile_queries(ctx.captured_queries, 'INSERT')) == 1
+    assert profile_queries(ctx.captured_queries, 'UPDATE') == []
+
+
+@pytest.mark.django_db
+def test_user_save_leaves_profile_alone(django_assert_num_queries):
+    user = User.objects.create_user(username='writes_user', password='pass12345')
+    user = User.objects.select_related('profile').get(pk=user.pk)
+    user.first_name = 'Changed'
+
+    with django_assert_num_queries(1):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_unchanged_profile_save_is_skipped(django_assert_num_queries):
+    user = User.objects.create_user(username='writes_unchanged', password='pass12345')
+    profile = UserProfile.objects.get(user=user)
+
+    with django_assert_num_queries(0):
+        profile.save()
+
+
+@pytest.mark.django_db
+def test_stale_profile_save_keeps_counters():
+    user = User.objects.create_user(username='writes_stale', password='pass12345')
+    stale = UserProfile.objects.get(user=user)
+
+    UserProfile.objects.filter(user=user).update(karma_points=40)
+    adjust_unread_count(user.id, 3)
+    stale.profile_photo = 'https://example.com/photo.jpg'
+    stale.save()
+
+    profile = UserProfile.objects.get(user=user)
+    assert profile.profile_photo == 'https://example.com/photo.jpg'
+    assert profile.karma_points == 40
+    assert profile.unread_notifications == 3
+
+
+@pytest.mark.django_db
+def test_assigned_deferred_field_is_saved():
+    user = User.objects.create_user(username='writes_deferred', password='pass12345')
+    partial = UserProfile.objects.only('id', 'user').get(user=user)
+    partial.profile_photo = 'https://example.com/deferred.jpg'
+    partial.save()
+
+    profile = UserProfile.objects.get(user=user)
+    assert profile.profile_photo == 'https://example.com/deferred.jpg'
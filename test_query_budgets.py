@@ -0,0 +1,242 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from accounts import urls as accounts_urls
+from accounts.models import EmailVerificationToken
+from items import urls as items_urls
+from items.claim_utils import accept_pending_claim, create_claim, mark_claim_returned
+from items.models import (
+    Claim, ContentModeration, DisputeResolution, Item, ItemMatch, ItemTimeline, LocationHistory, QRCode,
+)
+from items.notification_utils import create_notification
+
+
+# Database cost of one request to each URL against the ``seeded`` data set, as
+# (queries, milliseconds of SQL). Lists are seeded past their page size, so a
+# per-row query in a view or template shows up as a budget overrun, and a query
+# that stops using its index shows up as a time overrun. Re-record a budget only
+# when a change adds work on purpose, and say why in the commit.
+# Time budgets are about 20x what SQLite takes on a laptop plus 40 ms, since a
+# busy CI runner pre-empting the test adds a fixed stall rather than a multiple.
+# Scale them for a slower database with QUERY_BUDGET_TIME_SCALE (e.g. 3 for
+# Postgres over the network).
+SQL_TIME_SCALE = float(os.environ.get('QUERY_BUDGET_TIME_SCALE', 1))
+QUERY_BUDGETS = {
+    'items:welcome': (0, 0),
+    'items:dashboard': (5, 55),
+    'items:report_item': (2, 45),
+    'items:claim_item': (15, 65),
+    'items:search_nearby_items': (2, 55),
+    'items:notifications': (4, 60),
+    'items:reveal_contact': (7, 55),
+    'items:mark_notification_read': (8, 55),
+    'items:mark_all_notifications_read': (6, 50),
+    'items:accept_claim': (19, 65),
+    'items:reject_claim': (15, 65),
+    'items:leaderboard': (5, 55),
+    'items:item_detail': (5, 65),
+    'items:edit_item': (4, 50),
+    'items:delete_item': (13, 60),
+    'items:notify_owner': (6, 50),
+    'items:generate_qr_code': (10, 55),
+    'items:verify_qr_code': (17, 70),
+    'items:mark_item_returned': (18, 65),
+    'items:admin_heatmap': (3, 50),
+    'items:found_items_gallery': (3, 55),
+    'items:lost_items_gallery': (3, 55),
+    'items:get_updates': (6, 60),
+    'items:admin_moderation': (9, 75),
+    'items:flag_content': (5, 50),
+    'items:handle_moderation': (4, 50),
+    'items:disputes_dashboard': (8, 80),
+    'items:create_dispute': (8, 55),
+    'items:resolve_dispute': (19, 70),
+    'accounts:signup': (0, 0),
+    'accounts:login': (0, 0),
+    'accounts:logout': (4, 45),
+    'accounts:profile': (9, 65),
+    'accounts:edit_profile': (3, 50),
+    'accounts:verify_email': (5, 50),
+    'accounts:password_reset': (0, 0),
+    'accounts:password_reset_done': (0, 0),
+    'accounts:password_reset_confirm': (5, 50),
+    'accounts:password_reset_complete': (0, 0),
+}
+
+# URLs measured elsewhere, with the reason
+UNBUDGETED = {
+    'items:notification_stream': 'async streaming view; polling cost is covered in test_notification_stream.py',
+}
+
+
+@pytest.fixture
+def seeded(db, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    owner = User.objects.create_user(username='budget_owner', email='owner@vitapstudent.ac.in', password='pass12345')
+    claimer = User.objects.create_user(username='budget_claimer', email='claimer@vitapstudent.ac.in', password='pass12345')
+    staff = User.objects.create_user(username='budget_staff', email='staff@vitapstudent.ac.in', password='pass12345',
+                                     is_staff=True)
+    pending_user = User.objects.create_user(username='budget_pending', email='pending@vitapstudent.ac.in',
+                                            password='pass12345', is_active=False)
+    for n in range(25):
+        User.objects.create_user(username=f'budget_member_{n}', password='pass12345')
+
+    categories = ['electronics', 'books', 'clothing', 'accessories', 'other']
+    found, lost = [], []
+    for n in range(20):
+        for item_type, bucket in (('found', found), ('lost', lost)):
+            bucket.append(Item.objects.create(
+                user=owner, title=f'{item_type.title()} item {n}', category=categories[n % len(categories)],
+                description=f'Seeded {item_type} item number {n}', image_url=f'https://example.com/{item_type}/{n}.jpg',
+                location='Library', latitude=16.49 + n / 1000, longitude=80.50 + n / 1000, item_type=item_type,
+                ai_tags=['black', 'small'],
+            ))
+
+    # Claims at every stage, each one notifying the owner
+    claims = [Claim.objects.get(pk=create_claim(item.id, claimer, message=f'Mine, near {item.location}')['claim_id'])
+              for item in found[:14]]
+    for claim in claims[:8]:
+        accept_pending_claim(claim.id, owner)
+    for claim in claims[:4]:
+        mark_claim_returned(claim.item_id, owner)
+    for n, item in enumerate(found[:14]):
+        for status in ('claimed', 'verified'):
+            ItemTimeline.objects.create(item=item, status=status, changed_by=claimer, notes=f'Step {n}')
+    for n, item in enumerate(found + lost):
+        LocationHistory.objects.create(item=item, latitude=item.latitude, longitude=item.longitude,
+                                       location_name=['Library', 'Cafeteria', 'Gym'][n % 3])
+
+    for lost_item, found_item in zip(lost[:10], found[10:]):
+        match = ItemMatch.objects.create(lost_item=lost_item, found_item=found_item, score=0.8)
+        create_notification(owner, f'Possible match for {lost_item.title}', match=match)
+    for n in range(5):
+        create_notification(owner, f'Reminder {n}')
+
+    for n, item in enumerate(found[14:20]):
+        ContentModeration.objects.create(
+            item=item, flagged_by=claimer, reason='spam', description=f'Flag {n}',
+            status=['pending', 'approved', 'rejected', 'pending'][n % 4],
+            reviewed_by=staff if n % 4 in (1, 2) else None,
+        )
+    for n, claim in enumerate(claims[4:10]):
+        ContentModeration.objects.create(claim=claim, flagged_by=owner, reason='fraud', description=f'Claim flag {n}')
+        DisputeResolution.objects.create(
+            claim=claim, reporter=owner, claimer=claimer, reason=f'Dispute {n}',
+            # Claims 5 and 7 are completed by the QR and mark-returned requests, which an open dispute blocks
+            status=['open', 'resolved', 'in_progress', 'resolved', 'open', 'in_progress'][n], assigned_to=staff,
+        )
+
+    return SimpleNamespace(
+        owner=owner, claimer=claimer, staff=staff, found=found, lost=lost, claims=claims,
+        verification=EmailVerificationToken.objects.create(user=pending_user),
+        notification=owner.notifications.filter(claim__isnull=False, is_read=False).first(),
+        qr_code=QRCode.objects.create(claim=claims[5]),
+    )
+
+
+def _json(data):
+    return {'data': json.dumps(data), 'content_type': 'application/json'}
+
+
+# url name -> (user attribute on ``seeded`` or None, method, url kwargs, request body)
+REQUESTS = {
+    'items:welcome': lambda s: (None, 'get', {}, {}),
+    'items:dashboard': lambda s: ('owner', 'get', {}, {}),
+    'items:report_item': lambda s: ('owner', 'get', {}, {}),
+    'items:claim_item': lambda s: ('claimer', 'post', {}, {'data': {'item_id': s.found[15].id, 'message': 'Mine'}}),
+    'items:search_nearby_items': lambda s: (None, 'post', {}, _json({'latitude': 16.5, 'longitude': 80.51, 'radius': 10})),
+    'items:notifications': lambda s: ('owner', 'get', {}, {}),
+    'items:reveal_contact': lambda s: ('owner', 'post', {'notification_id': s.notification.id}, {}),
+    'items:mark_notification_read': lambda s: ('owner', 'post', {'notification_id': s.notification.id}, {}),
+    'items:mark_all_notifications_read': lambda s: ('owner', 'post', {}, {}),
+    'items:accept_claim': lambda s: ('owner', 'post', {'claim_id': s.claims[10].id}, {}),
+    'items:reject_claim': lambda s: ('owner', 'post', {'claim_id': s.claims[11].id}, {}),
+    'items:leaderboard': lambda s: ('owner', 'get', {}, {}),
+    'items:item_detail': lambda s: ('claimer', 'get', {'item_id': s.found[3].id}, {}),
+    'items:edit_item': lambda s: ('owner', 'get', {'item_id': s.found[15].id}, {}),
+    'items:delete_item': lambda s: ('owner', 'post', {'item_id': s.lost[19].id}, {}),
+    'items:notify_owner': lambda s: ('claimer', 'post', {}, {'data': {'item_id': s.lost[15].id, 'message': 'Seen it'}}),
+    'items:generate_qr_code': lambda s: ('owner', 'get', {'claim_id': s.claims[6].id}, {}),
+    'items:verify_qr_code': lambda s: (None, 'post', {}, _json({'qr_code': str(s.qr_code.code)})),
+    'items:mark_item_returned': lambda s: ('owner', 'post', {'item_id': s.claims[7].item_id}, {}),
+    'items:admin_heatmap': lambda s: ('staff', 'get', {}, {}),
+    'items:found_items_gallery': lambda s: (None, 'get', {}, {}),
+    'items:lost_items_gallery': lambda s: (None, 'get', {}, {}),
+    'items:get_updates': lambda s: ('owner', 'get', {}, {}),
+    'items:admin_moderation': lambda s: ('staff', 'get', {}, {}),
+    'items:flag_content': lambda s: ('claimer', 'post', {}, {
+        'data': {'item_id': s.lost[16].id, 'reason': 'spam', 'description': 'Looks fake'}}),
+    'items:handle_moderation': lambda s: ('staff', 'post', {}, {'data': {
+        'flag_id': ContentModeration.objects.filter(status='pending', item__isnull=False).first().id,
+        'action': 'reject'}}),
+    'items:disputes_dashboard': lambda s: ('staff', 'get', {}, {}),
+    'items:create_dispute': lambda s: ('owner', 'post', {}, {'data': {'claim_id': s.claims[12].id, 'reason': 'Wrong person'}}),
+    'items:resolve_dispute': lambda s: ('staff', 'post', {}, {'data': {
+        'dispute_id': DisputeResolution.objects.filter(status='open').first().id,
+        'resolution': 'favor_reporter', 'admin_notes': 'Checked'}}),
+    'accounts:signup': lambda s: (None, 'get', {}, {}),
+    'accounts:login': lambda s: (None, 'get', {}, {}),
+    'accounts:logout': lambda s: ('owner', 'get', {}, {}),
+    'accounts:profile': lambda s: ('claimer', 'get', {}, {}),
+    'accounts:edit_profile': lambda s: ('owner', 'get', {}, {}),
+    'accounts:verify_email': lambda s: (None, 'get', {'token': s.verification.token}, {}),
+    'accounts:password_reset': lambda s: (None, 'get', {}, {}),
+    'accounts:password_reset_done': lambda s: (None, 'get', {}, {}),
+    'accounts:password_reset_confirm': lambda s: (None, 'get', {
+        'uidb64': urlsafe_base64_encode(force_bytes(s.owner.pk)),
+        'token': default_token_generator.make_token(s.owner)}, {}),
+    'accounts:password_reset_complete': lambda s: (None, 'get', {}, {}),
+}
+
+
+def url_names():
+    return [
+        f'{module.app_name}:{pattern.name}'
+        for module in (items_urls, accounts_urls)
+        for pattern in module.urlpatterns if isinstance(pattern, URLPattern)
+    ]
+
+
+def test_every_url_has_a_budget():
+    missing = [name for name in url_names() if name not in QUERY_BUDGETS and name not in UNBUDGETED]
+    assert missing == []
+    assert set(REQUESTS) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize('url_name', sorted(QUERY_BUDGETS))
+def test_view_stays_within_query_budget(client, seeded, url_name):
+    user, method, kwargs, body = REQUESTS[url_name](seeded)
+    if user:
+        client.force_login(getattr(seeded, user))
+    url = reverse(url_name, kwargs=kwargs)
+
+    sql_seconds = []
+
+    def timed(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sql_seconds.append(time.perf_counter() - start)
+
+    with CaptureQueriesContext(connection) as ctx, connection.execute_wrapper(timed):
+        response = getattr(client, method)(url, secure=True, **body)
+
+    assert response.status_code < 400, response.content[:500]
+    queries = ctx.captured_queries
+    sql_ms = sum(sql_seconds) * 1000
+    listing = '\n'.join(query['sql'] for query in queries)
+    query_budget, time_budget_ms = QUERY_BUDGETS[url_name]
+    assert len(queries) <= query_budget, f'{len(queries)} queries:\n{listing}'
+    assert sql_ms <= time_budget_ms * SQL_TIME_SCALE, f'{sql_ms:.1f} ms of SQL:\n{listing}'
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from items.models import Item
+from items.query_utils import filter_created_between, gallery_items
+
+
+def make_item(user, days_ago=0, **fields):
+    item = Item.objects.create(user=user, title=fields.pop('title', 'Mug'), category='other',
+                               image_url='/media/items/x.png', location='Cafe', **fields)
+    Item.objects.filter(id=item.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return item
+
+
+@pytest.mark.django_db
+def test_date_range_is_inclusive_and_ignores_bad_dates():
+    owner = User.objects.create_user(username='range_owner', password='pass123')
+    today = make_item(owner, title='Today')
+    make_item(owner, days_ago=10, title='Old')
+    start = (timezone.now() - timedelta(days=1)).date().isoformat()
+    end = timezone.now().date().isoformat()
+
+    assert list(filter_created_between(Item.objects.all(), start, end)) == [today]
+    assert filter_created_between(Item.objects.all(), '2024-02-30', 'soon').count() == 2
+
+
+@pytest.mark.django_db
+def test_gallery_items_skip_returned_newest_first():
+    owner = User.objects.create_user(username='gallery_shape_owner', password='pass123')
+    older = make_item(owner, days_ago=2, item_type='found')
+    newer = make_item(owner, item_type='found')
+    make_item(owner, item_type='found', status='returned')
+    make_item(owner, item_type='lost')
+
+    assert list(gallery_items('found')) == [newer, older]
+
+
+@pytest.mark.django_db
+def test_explain_queries_reports_every_shape():
+    out = StringIO()
+    call_command('explain_queries', repeat=1, stdout=out)
+
+    output = out.getvalue()
+    for name in ('found_gallery_page', 'dashboard_category_range', 'item_status_counts'):
+        assert f'{name}:' in output
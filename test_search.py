@@ -0,0 +1,86 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from items.models import Item
+from items.search_utils import search_items, rebuild_search_index
+
+
+def make_item(user, title, description='', ai_tags=None, item_type='found'):
+    return Item.objects.create(
+        user=user,
+        title=title,
+        category='other',
+        description=description,
+        image_url='https://via.placeholder.com/150',
+        location='Library',
+        ai_tags=ai_tags or [],
+        item_type=item_type,
+    )
+
+
+@pytest.mark.django_db
+def test_search_matches_title_description_and_tags():
+    user = User.objects.create_user(username='searcher', password='pass123')
+    laptop = make_item(user, 'MacBook Pro', 'Silver laptop found in the cafeteria')
+    jacket = make_item(user, 'Blue Jacket', 'Warm winter jacket')
+    ring = make_item(user, 'Gold Ring', ai_tags=['gold', 'diamond'])
+
+    assert list(search_items(Item.objects.all(), 'macbook')) == [laptop]
+    assert list(search_items(Item.objects.all(), 'winter')) == [jacket]
+    assert list(search_items(Item.objects.all(), 'diamond')) == [ring]
+    # Prefix matching for search-as-you-type
+    assert list(search_items(Item.objects.all(), 'cafet')) == [laptop]
+
+
+@pytest.mark.django_db
+def test_search_ranks_better_matches_first():
+    user = User.objects.create_user(username='ranker', password='pass123')
+    weak = make_item(user, 'Notebook', 'Has a red cover')
+    strong = make_item(user, 'Red backpack', 'Red bag with red straps', ai_tags=['red'])
+
+    results = list(search_items(Item.objects.all(), 'red').order_by('-search_rank'))
+    assert results == [strong, weak]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_updates_and_deletes():
+    user = User.objects.create_user(username='updater', password='pass123')
+    item = make_item(user, 'Umbrella')
+
+    item.title = 'Black umbrella'
+    item.save()
+    assert list(search_items(Item.objects.all(), 'black')) == [item]
+
+    item.delete()
+    assert list(search_items(Item.objects.all(), 'umbrella')) == []
+
+
+@pytest.mark.django_db
+def test_search_ignores_query_syntax():
+    user = User.objects.create_user(username='syntax', password='pass123')
+    item = make_item(user, 'Water bottle')
+
+    assert list(search_items(Item.objects.all(), 'bottle" ^*(')) == [item]
+    assert list(search_items(Item.objects.all(), '***')) == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_backfills_documents():
+    user = User.objects.create_user(username='rebuilder', password='pass123')
+    item = make_item(user, 'Calculator')
+    Item.objects.filter(pk=item.pk).update(search_document='')
+
+    assert rebuild_search_index() == 1
+    assert list(search_items(Item.objects.all(), 'calculator')) == [item]
+
+
+@pytest.mark.django_db
+def test_gallery_search_uses_index(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    user = User.objects.create_user(username='galleryuser', password='pass123')
+    make_item(user, 'Red Backpack', item_type='lost')
+    make_item(user, 'Green Scarf', item_type='lost')
+
+    response = client.get(reverse('items:lost_items_gallery'), {'search': 'backpack'}, secure=True)
+    items = list(response.context['items'])
+    assert [item.title for item in items] == ['Red Backpack']
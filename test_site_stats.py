@@ -0,0 +1,96 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from items.models import Item, SiteCounter
+from items.stats_utils import hero_stats, gallery_counts
+
+
+def make_item(user, item_type='found', status='reported'):
+    return Item.objects.create(user=user, title='Bottle', category='other', item_type=item_type, status=status,
+                               image_url='/media/items/x.png', location='Gym')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_counters_follow_item_and_user_changes():
+    owner = User.objects.create_user(username='stats_owner', password='pass123')
+    found = make_item(owner)
+    make_item(owner, item_type='lost')
+    assert hero_stats() == {'total_items': 2, 'returned_items': 0, 'active_users': 1}
+
+    found.status = 'returned'
+    found.save()
+    assert hero_stats()['returned_items'] == 1
+    assert gallery_counts('found') == {'total_items': 1, 'available_items': 0, 'claimed_items': 0}
+
+    Item.objects.get(id=found.id).delete()
+    assert gallery_counts('found')['total_items'] == 0
+
+    owner.is_active = False
+    owner.save()
+    assert hero_stats() == {'total_items': 1, 'returned_items': 0, 'active_users': 0}
+
+
+@pytest.mark.django_db
+def test_deferred_loads_do_not_disturb_counters():
+    owner = User.objects.create_user(username='deferred_owner', password='pass123')
+    item = make_item(owner, status='claimed')
+    partial = Item.objects.only('id', 'title').get(id=item.id)
+    partial.title = 'Water bottle'
+    partial.save()
+
+    assert gallery_counts('found') == {'total_items': 1, 'available_items': 0, 'claimed_items': 1}
+
+
+@pytest.mark.django_db
+def test_recompute_repairs_drift():
+    owner = User.objects.create_user(username='drift_owner', password='pass123')
+    make_item(owner)
+    SiteCounter.objects.update(value=99)
+    SiteCounter.objects.create(key='items:found:verified', value=3)
+
+    call_command('refresh_site_stats')
+
+    assert hero_stats() == {'total_items': 1, 'returned_items': 0, 'active_users': 1}
+    assert not SiteCounter.objects.filter(key='items:found:verified').exists()
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_counters_not_tables(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    owner = User.objects.create_user(username='hero_owner', password='pass123')
+    make_item(owner, status='returned')
+    SiteCounter.objects.filter(key='users:active').update(value=7)
+
+    response = client.get(reverse('items:dashboard'), secure=True)
+    assert response.context['total_items'] == 1
+    assert response.context['returned_items'] == 1
+    assert response.context['active_users'] == 7
+
+
+@pytest.mark.django_db
+def test_empty_counter_table_falls_back_to_one_grouped_query(django_assert_num_queries):
+    owner = User.objects.create_user(username='fallback_owner', password='pass123')
+    make_item(owner)
+    make_item(owner, status='claimed')
+    make_item(owner, item_type='lost')
+    SiteCounter.objects.all().delete()
+
+    with django_assert_num_queries(2):
+        assert gallery_counts('found') == {'total_items': 2, 'available_items': 1, 'claimed_items': 1}
+    with django_assert_num_queries(0):
+        assert hero_stats()['total_items'] == 3
+
+
+@pytest.mark.django_db
+def test_admin_item_list_shows_type_summary(client, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    admin = User.objects.create_superuser(username='stats_admin', password='pass123', email='admin@example.com')
+    make_item(admin, status='returned')
+    client.force_login(admin)
+
+    response = client.get(reverse('admin:items_item_changelist'), secure=True)
+
+    [found] = [summary for summary in response.context['item_type_summary'] if summary['item_type'] == 'found']
+    assert found['total'] == 1 and ('Returned', 1) in found['statuses']
+    assert b'Found: 1' in response.content
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import UserProfile
+from items.models import Item, Notification
+from items.claim_utils import create_claim, mark_notification_read
+from items.notification_utils import create_notification, mark_notifications_read, get_unread_count
+
+
+@pytest.fixture
+def owner(db):
+    return User.objects.create_user(username='counter_owner', password='pass123')
+
+
+def stored_count(user):
+    return UserProfile.objects.get(user=user).unread_notifications
+
+
+def make_item(owner, title='Phone'):
+    return Item.objects.create(user=owner, title=title, category='electronics',
+                               image_url='/media/items/x.png', location='Lab')
+
+
+def test_counter_follows_create_and_read(owner):
+    claimer = User.objects.create_user(username='counter_claimer', password='pass123')
+    result = create_claim(make_item(owner).id, claimer)
+    create_notification(owner, 'Another')
+    assert stored_count(owner) == get_unread_count(owner) == 2
+
+    assert mark_notification_read(result['notification_id'], owner) == {'success': True}
+    # Marking twice doesn't decrement twice
+    mark_notification_read(result['notification_id'], owner)
+    assert stored_count(owner) == 1
+
+    assert mark_notifications_read(owner.id) == 1
+    assert stored_count(owner) == 0
+
+
+def test_accept_and_reject_notify_claimer(client, owner):
+    claimer = User.objects.create_user(username='counter_claimer2', password='pass123')
+    first = create_claim(make_item(owner, 'Watch').id, claimer)['claim_id']
+    second = create_claim(make_item(owner, 'Ring').id, claimer)['claim_id']
+    client.login(username='counter_owner', password='pass123')
+
+    client.post(reverse('items:accept_claim', args=[first]), secure=True)
+    client.post(reverse('items:reject_claim', args=[second]), secure=True)
+    assert stored_count(claimer) == 2
+
+
+def test_deleted_unread_notifications_release_count(owner):
+    claimer = User.objects.create_user(username='counter_claimer3', password='pass123')
+    item = make_item(owner)
+    create_claim(item.id, claimer)
+    assert stored_count(owner) == 1
+
+    item.claim.delete()
+    assert stored_count(owner) == 0
+
+
+def test_repair_command_recomputes(owner):
+    Notification.objects.create(recipient=owner, message='Created behind the counter\'s back')
+    UserProfile.objects.filter(user=owner).update(unread_notifications=42)
+
+    call_command('repair_unread_counts')
+    assert stored_count(owner) == 1
+
+
+def test_dashboard_reads_counter_not_count(client, owner, settings):
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    create_notification(owner, 'Hello')
+    client.login(username='counter_owner', password='pass123')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('items:dashboard'), secure=True)
+
+    assert response.context['unread_notifications'] == 1
+    assert not any('items_notification' in query['sql'] for query in queries.captured_queries)
+
+
+def test_stale_profile_save_keeps_counter(owner):
+    profile = UserProfile.objects.get(user=owner)
+    create_notification(owner, 'Hello')
+
+    profile.karma_points = 5
+    profile.save()
+
+    assert stored_count(owner) == 1
+    assert UserProfile.objects.get(user=owner).karma_points == 5
+
+
+def test_cached_count_is_dropped_after_commit(owner, django_capture_on_commit_callbacks):
+    assert get_unread_count(owner) == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        create_notification(owner, 'Pending commit')
+        # Readers before the commit keep the old cached count rather than re-caching it
+        assert get_unread_count(owner) == 0
+    assert get_unread_count(owner) == 1
@@ -0,0 +1,122 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from items.models import Item, Notification
+from items.claim_utils import create_claim
+from items.event_utils import collect_updates, parse_update_cursor
+
+
+@pytest.fixture
+def owner(db):
+    return User.objects.create_user(username='cursor_owner', password='pass123')
+
+
+def claim_new_item(owner, n):
+    item = Item.objects.create(user=owner, title=f'Bag {n}', category='other',
+                               image_url='/media/items/x.png', location='Library')
+    claimer = User.objects.create_user(username=f'cursor_claimer{n}', password='pass123')
+    create_claim(item.id, claimer)
+
+
+# Totals read the cached unread counter, which is refreshed on commit
+@pytest.mark.django_db(transaction=True)
+def test_cursor_returns_only_deltas(owner):
+    claim_new_item(owner, 0)
+    snapshot = collect_updates(owner)
+    assert snapshot['new_claims'] == 1 and snapshot['new_notifications'] == 1
+
+    cursor = snapshot['cursor']
+    idle = collect_updates(owner, parse_update_cursor(cursor))
+    assert idle['claim_updates'] == [] and idle['notification_updates'] == []
+    # Totals are unaffected by the cursor
+    assert idle['new_claims'] == 1 and idle['new_notifications'] == 1
+    assert idle['cursor'] == cursor
+
+    claim_new_item(owner, 1)
+    delta = collect_updates(owner, parse_update_cursor(cursor))
+    assert [claim['item_title'] for claim in delta['claim_updates']] == ['Bag 1']
+    assert len(delta['notification_updates']) == 1 and not delta['has_more']
+    assert delta['new_claims'] == 2 and delta['new_notifications'] == 2
+
+
+def test_cursor_pages_when_capped(owner):
+    claim_new_item(owner, 0)
+    cursor = parse_update_cursor(collect_updates(owner)['cursor'])
+    for n in range(1, 4):
+        claim_new_item(owner, n)
+
+    seen = []
+    page = collect_updates(owner, cursor, limit=4)
+    while True:
+        seen += [('claim', c['id']) for c in page['claim_updates']]
+        seen += [('notification', n['id']) for n in page['notification_updates']]
+        if not page['has_more']:
+            break
+        page = collect_updates(owner, parse_update_cursor(page['cursor']), limit=4)
+
+    # 3 new claims, each with its owner notification, none missed or repeated
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_cursor_keeps_rows_sharing_a_timestamp(owner):
+    cursor = parse_update_cursor(collect_updates(owner)['cursor'] or '2000-01-01T00:00:00+00:00')
+    created = [Notification.objects.create(recipient=owner, message=f'Same instant {n}') for n in range(5)]
+    Notification.objects.filter(id__in=[n.id for n in created]).update(created_at=created[0].created_at)
+
+    seen = []
+    page = collect_updates(owner, cursor, limit=2)
+    while True:
+        seen += [n['id'] for n in page['notification_updates']]
+        if not page['has_more']:
+            break
+        page = collect_updates(owner, parse_update_cursor(page['cursor']), limit=2)
+
+    assert seen == [n.id for n in created]
+
+
+def test_parse_update_cursor_forms():
+    assert parse_update_cursor('2026-01-02T03:04:05+05:30')[1:] == (None, None)
+    # '+' sent unencoded in a GET query string arrives as a space
+    assert parse_update_cursor('2026-01-02T03:04:05.123 05:30') == parse_update_cursor('2026-01-02T03:04:05.123+05:30')
+    assert parse_update_cursor('2026-01-02T03:04:05+00:00|claim|7')[1:] == ('claim', 7)
+    assert parse_update_cursor('2026-01-02T03:04:05+00:00|other|7') is None
+    assert parse_update_cursor('garbage') is None
+
+
+def test_get_updates_conditional_response(client, owner):
+    claim_new_item(owner, 0)
+    client.login(username='cursor_owner', password='pass123')
+    url = reverse('items:get_updates')
+
+    first = client.get(url, secure=True)
+    assert first.status_code == 200 and first.json()['new_claims'] == 1
+    cursor = first.json()['cursor']
+
+    again = client.get(url, {'last_update_time': cursor}, secure=True)
+    assert again.status_code == 200 and again.json()['claim_updates'] == []
+    unchanged = client.get(url, {'last_update_time': cursor}, HTTP_IF_NONE_MATCH=again['ETag'], secure=True)
+    assert unchanged.status_code == 304
+
+    Notification.objects.create(recipient=owner, message='New thing')
+    changed = client.get(url, {'last_update_time': cursor}, HTTP_IF_NONE_MATCH=again['ETag'], secure=True)
+    assert changed.status_code == 200 and len(changed.json()['notification_updates']) == 1
+
+
+def test_get_updates_post_snapshot_and_bad_cursor(client, owner):
+    claim_new_item(owner, 0)
+    client.login(username='cursor_owner', password='pass123')
+    url = reverse('items:get_updates')
+
+    response = client.post(url, secure=True)
+    assert response.json()['claim_updates'][0]['item_title'] == 'Bag 0'
+    assert client.post(url, {'last_update_time': 'garbage'}, secure=True).status_code == 400
+
+
+def test_get_updates_accepts_unencoded_plus(client, owner):
+    claim_new_item(owner, 0)
+    client.login(username='cursor_owner', password='pass123')
+    url = reverse('items:get_updates')
+    timestamp = client.get(url, secure=True).json()['timestamp']
+
+    response = client.get(f'{url}?last_update_time={timestamp}', secure=True)
+    assert response.status_code == 200 and response.json()['claim_updates'] == []